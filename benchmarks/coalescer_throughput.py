@@ -0,0 +1,76 @@
+"""
+Throughput benchmark of :py:class:`solposx.Coalescer`.
+
+Submits single-timestamp requests from a pool of threads, once calling the
+solar position function on a length-1 index per request and once through a
+coalescer, and prints the throughput and the latency percentiles. The
+results of the coalescer are checked against those of the direct calls.
+
+Usage::
+
+    python benchmarks/coalescer_throughput.py [--algorithm sg2] [--threads 64]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from solposx import Coalescer, solarposition
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--algorithm", default="sg2")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--window", type=float, default=0.002)
+    parser.add_argument("--max-batch", type=int, default=1024)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = pd.Timestamp("2020-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 365 * 86400, args.requests), unit="s"
+    )
+    latitudes = rng.uniform(-60, 60, args.requests)
+    longitudes = rng.uniform(-180, 180, args.requests)
+    function = getattr(solarposition, args.algorithm)
+
+    def direct(timestamp, latitude, longitude):
+        start = time.perf_counter()
+        result = function(pd.DatetimeIndex([timestamp]), latitude, longitude)
+        return result["zenith"].iloc[0], time.perf_counter() - start
+
+    with ThreadPoolExecutor(args.threads) as executor:
+        start = time.perf_counter()
+        direct_results = list(executor.map(direct, times, latitudes, longitudes))
+        direct_time = time.perf_counter() - start
+    latencies = np.array([latency for _, latency in direct_results])
+
+    coalescer = Coalescer(args.algorithm, window=args.window, max_batch=args.max_batch)
+    with coalescer, ThreadPoolExecutor(args.threads) as executor:
+        coalesced = list(executor.map(coalescer, times, latitudes, longitudes))
+    stats = coalescer.stats()
+    np.testing.assert_allclose(
+        [solpos["zenith"] for solpos in coalesced],
+        [zenith for zenith, _ in direct_results],
+        rtol=0,
+        atol=1e-9,
+    )
+
+    print(f"{'':>10} {'req/s':>10} {'p50 [ms]':>9} {'p99 [ms]':>9}")
+    print(
+        f"{'direct':>10} {args.requests / direct_time:10.0f} "
+        f"{np.percentile(latencies, 50) * 1e3:9.2f} "
+        f"{np.percentile(latencies, 99) * 1e3:9.2f}"
+    )
+    print(
+        f"{'coalesced':>10} {stats['throughput']:10.0f} "
+        f"{stats['latency_p50'] * 1e3:9.2f} {stats['latency_p99'] * 1e3:9.2f}"
+    )
+    print(f"mean batch size: {stats['mean_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
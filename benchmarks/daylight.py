@@ -0,0 +1,75 @@
+"""
+Benchmark of ``daylight_only=True`` of the solar position functions.
+
+Calculates the solar position of a year of timestamps for a few sites of one
+region with and without ``daylight_only=True`` and prints the fraction of skipped rows
+and the speed-up. The calculated rows are checked to be identical and the
+skipped rows to be below the threshold.
+
+Usage::
+
+    python benchmarks/daylight.py [--algorithm sg2] [--sites 4] [--freq 1min]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+
+
+def _best_of(function, repeat):
+    """Return the result and the shortest run time of ``function``."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return result, min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--algorithm", default="sg2")
+    parser.add_argument("--sites", type=int, default=4)
+    parser.add_argument("--freq", default="1min")
+    parser.add_argument("--threshold", type=float, default=-1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    times = pd.date_range("2020-01-01", "2021-01-01", freq=args.freq, tz="UTC")
+    # site axis of one region, such that the nights of the sites overlap
+    latitudes = rng.uniform(35, 55, (1, args.sites))
+    longitudes = rng.uniform(-10, 20, (1, args.sites))
+
+    function = getattr(solarposition, args.algorithm)
+    expected, full_time = _best_of(
+        lambda: function(times, latitudes, longitudes, output="dict"), args.repeat
+    )
+    result, daylight_time = _best_of(
+        lambda: function(
+            times,
+            latitudes,
+            longitudes,
+            daylight_only=True,
+            daylight_threshold=args.threshold,
+            output="dict",
+        ),
+        args.repeat,
+    )
+    night = np.isnan(result["elevation"])
+    assert (expected["elevation"][night] < args.threshold).all()
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name][~night], value[~night])
+
+    print(f"rows: {night.size}, skipped: {night.mean():.3f}")
+    print(
+        f"time [s]: {full_time:.3f} (all rows), {daylight_time:.3f} "
+        f"(daylight_only), speed-up: {full_time / daylight_time:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
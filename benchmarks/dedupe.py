@@ -0,0 +1,77 @@
+"""
+Benchmark of ``dedupe=True`` of the solar position functions.
+
+Calculates the solar position of a joined dataset, in which each pair of
+timestamp and site occurs several times, e.g., once per inverter, with and
+without ``dedupe=True``, and prints the reduction ratio, i.e., the number of
+unique pairs divided by the number of rows, and the speed-up. The results
+are checked to be identical.
+
+Usage::
+
+    python benchmarks/dedupe.py [--algorithm sg2] [--sites 20] [--repeats 8]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+
+
+def _best_of(function, repeat):
+    """Return the result and the shortest run time of ``function``."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return result, min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--algorithm", default="sg2")
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=8)
+    parser.add_argument("--freq", default="15min")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    hours = pd.date_range("2020-01-01", "2021-01-01", freq=args.freq, tz="UTC")
+    latitudes = rng.uniform(-60, 60, args.sites)
+    longitudes = rng.uniform(-180, 180, args.sites)
+    # every pair of timestamp and site repeated once per inverter
+    rows = pd.MultiIndex.from_product(
+        [hours, np.arange(args.sites), np.arange(args.repeats)]
+    ).to_frame(index=False)
+    rows = rows.sample(frac=1, random_state=0)
+    times = pd.DatetimeIndex(rows[0])
+    site = rows[1].to_numpy()
+    latitude = latitudes[site][:, np.newaxis]
+    longitude = longitudes[site][:, np.newaxis]
+    unique = len(rows[[0, 1]].drop_duplicates())
+
+    function = getattr(solarposition, args.algorithm)
+    expected, full_time = _best_of(
+        lambda: function(times, latitude, longitude, output="dict"), args.repeat
+    )
+    result, dedupe_time = _best_of(
+        lambda: function(times, latitude, longitude, dedupe=True, output="dict"),
+        args.repeat,
+    )
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+    print(f"rows: {len(times)}, unique pairs of timestamp and site: {unique}")
+    print(f"reduction ratio: {unique / len(times):.3f}")
+    print(
+        f"time [s]: {full_time:.3f} (all rows), {dedupe_time:.3f} (dedupe), "
+        f"speed-up: {full_time / dedupe_time:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
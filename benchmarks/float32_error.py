@@ -0,0 +1,73 @@
+"""
+Errors of ``dtype=numpy.float32`` of the solar position functions.
+
+Calculates the solar position of hourly timestamps from 2000 to 2029 at
+latitudes between -80 and 80 degrees in single and double precision and
+prints the absolute differences of the table in
+docs/source/solarposition.rst. The zenith is compared for all rows and for
+the rows with the sun above the horizon, and the azimuth for zenith angles
+between 10 and 90 degrees.
+
+Usage::
+
+    python benchmarks/float32_error.py [--sites 161] [--freq 1h]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+
+ALGORITHMS = ("iqbal", "michalsky", "noaa", "psa", "sg2", "usno", "walraven")
+
+
+def _errors(function, times, latitude, longitude):
+    """Return the zenith, daytime zenith, and azimuth errors of float32."""
+    # the refraction models divide by the tangent of the elevation at night
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = function(times, latitude, longitude, output="dict")
+        result = function(times, latitude, longitude, dtype=np.float32, output="dict")
+    zenith_error = np.abs(result["zenith"] - expected["zenith"])
+    day = expected["zenith"] < 90
+    azimuth_error = np.abs((result["azimuth"] - expected["azimuth"] + 180) % 360 - 180)
+    # the azimuth is undefined near the zenith
+    azimuth_error = azimuth_error[day & (expected["zenith"] > 10)]
+    return zenith_error, zenith_error[day], azimuth_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sites", type=int, default=161)
+    parser.add_argument("--freq", default="1h")
+    args = parser.parse_args()
+
+    times = pd.date_range("2000-01-01", "2029-12-31 23:00", freq=args.freq, tz="UTC")
+    rng = np.random.default_rng(0)
+    latitudes = np.linspace(-80, 80, args.sites)
+    longitudes = rng.uniform(-180, 180, args.sites)
+
+    print(
+        f"{'Algorithm':<10} {'max zenith':>11} {'max zenith':>11} "
+        f"{'mean zenith':>12} {'max azimuth':>12} {'mean azimuth':>13}"
+    )
+    print(f"{'':<10} {'(all)':>11} {'(day)':>11} {'(day)':>12}")
+    for name in ALGORITHMS:
+        function = getattr(solarposition, name)
+        # maximum, sum, and number of the errors, accumulated site by site
+        maximum, total, count = np.zeros(3), np.zeros(3), np.zeros(3)
+        for latitude, longitude in zip(latitudes, longitudes):
+            errors = _errors(function, times, latitude, longitude)
+            for i, error in enumerate(errors):
+                maximum[i] = max(maximum[i], error.max(initial=0))
+                total[i] += error.sum()
+                count[i] += error.size
+        print(
+            f"{name:<10} {maximum[0]:11.2g} {maximum[1]:11.2g} "
+            f"{total[1] / count[1]:12.1g} {maximum[2]:12.2g} "
+            f"{total[2] / count[2]:13.1g}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Scaling benchmark of :py:func:`solposx.parallel.compute`.
+
+Times the calculation of one year of 1-minute timestamps for a number of
+sites with an increasing number of threads and prints the speed-up relative
+to the serial function. The results are checked to be identical to those of
+the serial function.
+
+Usage::
+
+    python benchmarks/parallel_scaling.py [--algorithm sg2] [--sites 4]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+from solposx.parallel import compute
+
+
+def _best_of(function, repeat):
+    """Return the result and the shortest run time of ``function``."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return result, min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--algorithm", default="sg2")
+    parser.add_argument("--sites", type=int, default=4)
+    parser.add_argument("--freq", default="1min")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    times = pd.date_range("2020-01-01", "2021-01-01", freq=args.freq, tz="UTC")
+    # site axis of shape (1, M)
+    latitudes = np.linspace(-60, 60, args.sites)[np.newaxis]
+    longitudes = np.linspace(-120, 120, args.sites)[np.newaxis]
+    serial = getattr(solarposition, args.algorithm)
+
+    expected, serial_time = _best_of(
+        lambda: serial(times, latitudes, longitudes, output="dict"), args.repeat
+    )
+    print(
+        f"{args.algorithm}: {len(times)} timestamps x {args.sites} sites, "
+        f"{os.cpu_count()} CPUs"
+    )
+    print(f"{'threads':>8} {'time [s]':>10} {'speed-up':>9}")
+    print(f"{'serial':>8} {serial_time:10.3f} {1:9.2f}")
+    n_threads = 1
+    while n_threads <= 2 * os.cpu_count():
+        result, duration = _best_of(
+            lambda: compute(
+                args.algorithm,
+                times,
+                latitudes,
+                longitudes,
+                n_threads=n_threads,
+                output="dict",
+            ),
+            args.repeat,
+        )
+        for name, value in expected.items():
+            np.testing.assert_array_equal(result[name], value)
+        print(f"{n_threads:>8} {duration:10.3f} {serial_time / duration:9.2f}")
+        n_threads *= 2
+
+
+if __name__ == "__main__":
+    main()
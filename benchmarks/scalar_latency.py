@@ -0,0 +1,70 @@
+"""
+Latency benchmark of :py:mod:`solposx.scalar`.
+
+Times the calculation of the solar position of a single timestamp with the
+scalar functions and with the functions in :py:mod:`solposx.solarposition`
+for a one-element DatetimeIndex, and prints the time per call. The results
+of the scalar functions are checked against those of the array functions.
+
+Usage::
+
+    python benchmarks/scalar_latency.py [--number 10000]
+"""
+
+import argparse
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+from solposx import scalar, solarposition
+
+_ALGORITHMS = ("iqbal", "michalsky", "noaa", "psa", "sg2", "usno", "walraven")
+
+
+def _time_per_call(function, number, repeat):
+    """Return the shortest time per call of ``function``. [s]"""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--number", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    latitude, longitude = 45.0, 10.0
+    now = time.time()
+    times = pd.DatetimeIndex([pd.Timestamp(now, unit="s", tz="UTC")])
+    unix_seconds = times.as_unit("ns").asi8[0] / 1e9
+
+    print(f"{'algorithm':>10} {'scalar [us]':>12} {'array [us]':>11} {'ratio':>7}")
+    for name in _ALGORITHMS:
+        scalar_function = getattr(scalar, name)
+        array_function = getattr(solarposition, name)
+        zenith, azimuth = scalar_function(unix_seconds, latitude, longitude)
+        expected = array_function(times, latitude, longitude)
+        np.testing.assert_allclose(
+            [zenith, azimuth],
+            expected[["zenith", "azimuth"]].iloc[0],
+            rtol=0,
+            atol=1e-6,
+        )
+        scalar_time = _time_per_call(
+            lambda: scalar_function(unix_seconds, latitude, longitude),
+            args.number,
+            args.repeat,
+        )
+        array_time = _time_per_call(
+            lambda: array_function(times, latitude, longitude),
+            max(1, args.number // 100),
+            args.repeat,
+        )
+        print(
+            f"{name:>10} {scalar_time * 1e6:12.2f} {array_time * 1e6:11.1f} "
+            f"{array_time / scalar_time:7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
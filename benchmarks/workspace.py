@@ -0,0 +1,58 @@
+"""
+Latency benchmark of :py:class:`solposx.kernels.Workspace`.
+
+Times repeated calls of the array kernels on a batch of timestamps of one
+site, writing the results into ``out`` arrays, without and with a Workspace,
+and prints the time per call. The results with a Workspace are checked to
+be identical.
+
+Usage::
+
+    python benchmarks/workspace.py [--size 1000000] [--max-memory 4194304]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from solposx import Site, kernels
+
+_ALGORITHMS = ("iqbal", "michalsky", "noaa", "psa", "sg2", "usno", "walraven")
+
+
+def _time_per_call(function, repeat):
+    """Return the shortest time per call of ``function``. [s]"""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--max-memory", type=int, default=2**22)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    jd = 2459000.5 + np.arange(args.size) / 86400
+    site = Site(45, 10)
+    workspace = kernels.Workspace(max_memory=args.max_memory)
+
+    print(f"{'algorithm':>10} {'plain [ms]':>11} {'workspace [ms]':>15} {'ratio':>7}")
+    for name in _ALGORITHMS:
+        kernel = getattr(kernels, name)
+        expected = kernel(jd, site)
+        out = {column: np.empty_like(value) for column, value in expected.items()}
+        kernel(jd, site, out=out, workspace=workspace)
+        for column, value in expected.items():
+            np.testing.assert_array_equal(out[column], value)
+        plain = _time_per_call(lambda: kernel(jd, site, out=out), args.repeat)
+        blocked = _time_per_call(
+            lambda: kernel(jd, site, out=out, workspace=workspace), args.repeat
+        )
+        print(
+            f"{name:>10} {plain * 1e3:11.1f} {blocked * 1e3:15.1f} "
+            f"{plain / blocked:7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,16 @@ except PackageNotFoundError:  # pragma: no cover
 
 # Make the modules directly available to the package
 from solposx import (  # noqa: F401
+    aio,
+    kernels,
+    parallel,
     solarposition,
     refraction,
+    scalar,
     tools,
+    ufunc,
 )
+from solposx.site import Site, Fleet  # noqa: F401
+from solposx.raster import grid  # noqa: F401
+from solposx.streaming import stream  # noqa: F401
+from solposx.batching import Coalescer  # noqa: F401
@@ -0,0 +1,140 @@
+"""Solar position published on a fixed cadence for asyncio applications."""
+
+import asyncio
+import functools
+import time
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+from solposx.parallel import _FLEET_ALGORITHMS
+
+
+def _period_ns(period):
+    """Return a period in seconds, str, or Timedelta in integer nanoseconds."""
+    if isinstance(period, (int, float)):
+        period = pd.Timedelta(period, unit="s")
+    return pd.Timedelta(period).value
+
+
+async def _ticks(function, fleet, step, block, executor, kwargs):
+    """Yield the solar position of the ticks, see :py:func:`ticks`."""
+    loop = asyncio.get_running_loop()
+
+    def submit(first_tick):
+        """Calculate the block of ticks starting at first_tick in executor."""
+        times = pd.DatetimeIndex((first_tick + np.arange(block)) * step, tz="UTC")
+        calculate = functools.partial(function, times, fleet, output="dict", **kwargs)
+        return loop.run_in_executor(executor, calculate)
+
+    # index of the next tick, i.e., number of periods since 1970-01-01
+    tick = -(-time.time_ns() // step)
+    block_start = tick
+    pending = submit(block_start)
+    try:
+        while True:
+            current = {
+                name: value.reshape(block, -1)
+                for name, value in (await pending).items()
+            }
+            pending = submit(block_start + block)
+            while tick < block_start + block:
+                lag = time.time_ns() - tick * step
+                if lag > step:
+                    # the consumer fell behind, skip to the latest due tick
+                    tick = time.time_ns() // step
+                    continue
+                if lag < 0:
+                    await asyncio.sleep(-lag / 1e9)
+                row = tick - block_start
+                yield (
+                    pd.Timestamp(tick * step, tz="UTC"),
+                    {name: value[row] for name, value in current.items()},
+                )
+                tick += 1
+            block_start += block
+            if tick >= block_start + block:
+                # the precomputed block was skipped as well
+                pending.cancel()
+                block_start = tick
+                pending = submit(block_start)
+    finally:
+        pending.cancel()
+
+
+def ticks(
+    algorithm,
+    fleet,
+    period,
+    *,
+    block=100,
+    executor=None,
+    **kwargs,
+):
+    """
+    Publish the solar position of a fleet of sites on a fixed cadence.
+
+    The ticks are the multiples of ``period`` since 1970-01-01 UTC, e.g.,
+    every full 100 ms. The solar position of ``block`` consecutive ticks is
+    calculated at a time in ``executor``, off the event loop, and the next
+    block is calculated while the current one is published, such that the
+    event loop only waits for the tick deadlines. The jitter of the ticks is
+    then bounded by the latency of the event loop.
+
+    If the consumer falls more than one period behind, the missed ticks are
+    skipped and the latest due tick is yielded.
+
+    Parameters
+    ----------
+    algorithm : str
+        Solar position algorithm, i.e., name of a function in
+        :py:mod:`solposx.solarposition` that accepts a Site or Fleet.
+    fleet : Site or Fleet
+        Location(s) of the calculation, e.g., of the trackers.
+    period : float, str, or pandas.Timedelta
+        Interval between the ticks, e.g., ``0.1`` or ``'100ms'``. Numbers
+        are in seconds. [s]
+    block : int, default : 100
+        Number of ticks calculated at a time.
+    executor : concurrent.futures.Executor, optional
+        Executor of the calculation. If not specified, the default executor
+        of the event loop is used.
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t`` or ``backend``.
+
+    Returns
+    -------
+    async generator
+        Asynchronous generator of tuples ``(time, solpos)`` of the tick
+        timestamp in UTC as a pandas.Timestamp and a dictionary of arrays
+        with one value per site, keyed by the column names of the function
+        of ``algorithm``.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if
+        ``period`` is not positive, or if ``block`` is less than 1.
+
+    See Also
+    --------
+    solposx.stream
+
+    Examples
+    --------
+    >>> fleet = Fleet(latitudes, longitudes)
+    >>> async for time, solpos in ticks('psa', fleet, '100ms'):
+    ...     await publish(time, solpos['zenith'], solpos['azimuth'])
+    """
+    if algorithm not in _FLEET_ALGORITHMS:
+        raise ValueError(
+            f"Unknown algorithm: {algorithm}. "
+            f"Available options are: {list(_FLEET_ALGORITHMS)}."
+        )
+    step = _period_ns(period)
+    if step <= 0:
+        raise ValueError(f"period must be positive, got {period}.")
+    if block < 1:
+        raise ValueError(f"block must be at least 1, got {block}.")
+    function = getattr(solarposition, algorithm)
+    return _ticks(function, fleet, step, block, executor, kwargs)
@@ -0,0 +1,294 @@
+"""Coalescing of concurrent single-timestamp requests into vectorized calls."""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+from solposx.parallel import _FLEET_ALGORITHMS
+from solposx.tools import _pandas_to_utc
+
+_clock = time.perf_counter
+
+
+def _nanoseconds(time):
+    """Return a timestamp in int64 nanoseconds since 1970-01-01 UTC."""
+    if isinstance(time, np.datetime64):
+        # numpy.datetime64 is interpreted as UTC
+        return int(time.astype("datetime64[ns]").astype(np.int64))
+    return _pandas_to_utc(pd.Timestamp(time)).value
+
+
+def _resolve(future, result=None, exception=None):
+    """Set the result or exception of a future, unless it is already done."""
+    try:
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
+    except InvalidStateError:
+        # the future was cancelled or resolved before
+        pass
+
+
+class Coalescer:
+    """
+    Thread-safe coalescer of solar position requests of single timestamps.
+
+    Requests submitted concurrently from many threads are collected for up
+    to ``window`` seconds, or until ``max_batch`` requests are pending, and
+    calculated in one vectorized call of the solar position function in a
+    background thread. Each caller then receives the result of its request.
+    Compared to one call per request on a length-1 index, the pandas and
+    NumPy overhead is paid once per batch.
+
+    Parameters
+    ----------
+    algorithm : str, default : 'sg2'
+        Solar position algorithm, i.e., name of a function in
+        :py:mod:`solposx.solarposition` that accepts arrays of sites.
+    window : float, default : 0.002
+        Time to collect requests after the first request of a batch. [s]
+    max_batch : int, default : 1024
+        Maximum number of requests per batch. A full batch is calculated
+        without waiting for the end of the window.
+    max_samples : int, default : 100000
+        Number of latest request latencies kept for :py:meth:`stats`.
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t``, which apply to all
+        requests.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if
+        ``window`` is negative, or if ``max_batch`` is less than 1.
+
+    See Also
+    --------
+    solposx.scalar
+
+    Examples
+    --------
+    >>> coalescer = Coalescer('sg2', window=0.005, max_batch=512)
+    >>> with ThreadPoolExecutor(64) as executor:
+    ...     results = list(executor.map(coalescer, times, latitudes, longitudes))
+    >>> results[0]['zenith']
+    51.48...
+    >>> coalescer.stats()['latency_p99']
+    0.0061...
+    """
+
+    def __init__(
+        self,
+        algorithm="sg2",
+        *,
+        window=0.002,
+        max_batch=1024,
+        max_samples=100000,
+        **kwargs,
+    ):
+        if algorithm not in _FLEET_ALGORITHMS:
+            raise ValueError(
+                f"Unknown algorithm: {algorithm}. "
+                f"Available options are: {list(_FLEET_ALGORITHMS)}."
+            )
+        if window < 0:
+            raise ValueError(f"window must not be negative, got {window}.")
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be at least 1, got {max_batch}.")
+        self.algorithm = algorithm
+        self.window = window
+        self.max_batch = max_batch
+        self._function = getattr(solarposition, algorithm)
+        self._kwargs = kwargs
+        self._pending = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._latencies = collections.deque(maxlen=max_samples)
+        self._requests = 0
+        self._batches = 0
+        self._started = _clock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def __repr__(self):
+        return (
+            f"Coalescer({self.algorithm!r}, window={self.window}, "
+            f"max_batch={self.max_batch})"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __call__(self, time, latitude, longitude):
+        """
+        Calculate the solar position of a timestamp and a site.
+
+        Blocks until the batch of the request is calculated.
+
+        Parameters
+        ----------
+        time : pandas.Timestamp, datetime, str, or numpy.datetime64
+            Timestamp - must be localized. ``numpy.datetime64`` is
+            interpreted as UTC.
+        latitude : float
+            Latitude in decimal degrees. Positive north of equator, negative
+            to south. [degrees]
+        longitude : float
+            Longitude in decimal degrees. Positive east of prime meridian,
+            negative to west. [degrees]
+
+        Returns
+        -------
+        dict
+            Dictionary of floats keyed by the column names of the function of
+            ``algorithm``. [degrees]
+        """
+        return self.submit(time, latitude, longitude).result()
+
+    def submit(self, time, latitude, longitude):
+        """
+        Submit a request without waiting for its result.
+
+        See :py:meth:`__call__` for the parameters.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future of the dictionary of floats of the solar position.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the coalescer is closed.
+        TypeError
+            Raised if ``time`` is timezone naive.
+        """
+        future = Future()
+        request = (
+            _nanoseconds(time),
+            float(latitude),
+            float(longitude),
+            future,
+            _clock(),
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Cannot submit requests to a closed Coalescer.")
+            self._pending.append(request)
+            if len(self._pending) in (1, self.max_batch):
+                # wake up the background thread to start or finish a batch
+                self._condition.notify()
+        return future
+
+    def close(self):
+        """Calculate the pending requests and stop the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join()
+
+    def stats(self):
+        """
+        Return the throughput and latency statistics of the requests.
+
+        The latency of a request is the time from its submission to the
+        availability of its result, including the wait for the batch window.
+
+        Returns
+        -------
+        dict
+            Dictionary with the keys ``'requests'`` and ``'batches'``, the
+            numbers of calculated requests and batches, ``'mean_batch_size'``,
+            ``'throughput'``, the calculated requests per second since the
+            coalescer was created, and ``'latency_p50'``, ``'latency_p90'``,
+            ``'latency_p99'``, and ``'latency_max'``, the percentiles of the
+            latest latencies. [s]
+        """
+        with self._condition:
+            requests, batches = self._requests, self._batches
+            latencies = np.array(self._latencies)
+        elapsed = _clock() - self._started
+        if len(latencies):
+            percentiles = np.percentile(latencies, [50, 90, 99, 100])
+            p50, p90, p99, pmax = percentiles.tolist()
+        else:
+            p50 = p90 = p99 = pmax = np.nan
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else np.nan,
+            "throughput": requests / elapsed,
+            "latency_p50": p50,
+            "latency_p90": p90,
+            "latency_p99": p99,
+            "latency_max": pmax,
+        }
+
+    def _next_batch(self):
+        """Wait for and return the next batch of requests, or None if closed."""
+        with self._condition:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            deadline = self._pending[0][4] + self.window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - _clock()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+        # cancelled requests are skipped, the others can no longer be cancelled
+        return [
+            request for request in batch if request[3].set_running_or_notify_cancel()
+        ]
+
+    def _calculate(self, batch):
+        """Calculate a batch of requests and set the results of the futures."""
+        times, latitudes, longitudes, futures, _ = zip(*batch)
+        try:
+            result = self._function(
+                pd.DatetimeIndex(np.array(times, dtype=np.int64), tz="UTC"),
+                np.array(latitudes)[:, None],
+                np.array(longitudes)[:, None],
+                output="dict",
+                **self._kwargs,
+            )
+        except Exception as exc:
+            if len(batch) == 1:
+                _resolve(futures[0], exception=exc)
+                return
+            # calculate the requests one by one, such that an invalid request
+            # does not fail the other requests of the batch
+            for request in batch:
+                self._calculate([request])
+            return
+        columns = [value.tolist() for value in result.values()]
+        for future, values in zip(futures, zip(*columns)):
+            _resolve(future, dict(zip(result, values)))
+
+    def _run(self):
+        """Calculate batches of requests until the coalescer is closed."""
+        while (batch := self._next_batch()) is not None:
+            if not batch:
+                continue
+            try:
+                self._calculate(batch)
+            except Exception as exc:
+                # an unexpected error must not stop the background thread
+                for request in batch:
+                    _resolve(request[3], exception=exc)
+            finished = _clock()
+            with self._condition:
+                self._requests += len(batch)
+                self._batches += 1
+                self._latencies.extend(finished - request[4] for request in batch)
@@ -0,0 +1,16 @@
+from .iqbal import iqbal, iqbal_geocentric, iqbal_topocentric  # noqa: F401
+from .michalsky import (  # noqa: F401
+    michalsky,
+    michalsky_geocentric,
+    michalsky_topocentric,
+)
+from .noaa import noaa, noaa_geocentric, noaa_topocentric  # noqa: F401
+from .psa import psa, psa_geocentric, psa_topocentric  # noqa: F401
+from .sg2 import sg2, sg2_geocentric, sg2_topocentric  # noqa: F401
+from .usno import usno, usno_geocentric, usno_topocentric  # noqa: F401
+from .walraven import (  # noqa: F401
+    walraven,
+    walraven_geocentric,
+    walraven_topocentric,
+)
+from .workspace import Workspace  # noqa: F401
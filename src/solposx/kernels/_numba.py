@@ -0,0 +1,471 @@
+"""
+Numba-compiled kernels of the solar position algorithms.
+
+Each algorithm is evaluated in two fused loops, one over the timestamps for
+the geocentric ephemeris and one over all combinations of timestamps and
+sites for the solar position, such that no temporary arrays of the size of
+the inputs are allocated. The loops are parallelized over the elements and
+compiled on first use. The compiled code is cached on disk, such that later
+processes do not compile the loops again.
+
+The element-wise equations are those of :py:mod:`solposx.scalar`. The
+calculations are carried out in double precision. ``dtype`` sets the
+data type of the results.
+"""
+
+import math
+
+import numpy as np
+from numba import njit, prange
+from numba.extending import register_jitable
+from solposx import scalar
+from solposx.kernels.michalsky import _michalsky_julian_date
+from solposx.kernels.noaa import _noaa_location_terms
+from solposx.kernels.psa import _psa_coefficients, _psa_julian_date
+from solposx.kernels.sg2 import _sg2_julian_dates
+from solposx.kernels.walraven import _walraven_days
+from solposx.site import _is_site, _location_terms, _parallax_terms
+from solposx.tools import (
+    _calculate_deltat,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+# division by zero results in inf or nan as in NumPy
+_loop = njit(parallel=True, cache=True, error_model="numpy")
+_element = njit(cache=True, error_model="numpy")
+
+# the equations of the algorithms are the plain Python functions of
+# solposx.scalar, whose helpers are compiled into the calling functions
+for _helper in (
+    scalar._sind,
+    scalar._cosd,
+    scalar._tand,
+    scalar._clip_unit,
+    scalar._asind,
+    scalar._acosd,
+):
+    register_jitable(_helper)
+
+_iqbal_geocentric = _element(scalar._iqbal_geocentric)
+_iqbal_topocentric = _element(scalar._iqbal_topocentric)
+_michalsky_geocentric = _element(scalar._michalsky_geocentric)
+_michalsky_topocentric = _element(scalar._michalsky_topocentric)
+_noaa_geocentric = _element(scalar._noaa_geocentric)
+_noaa_topocentric = _element(scalar._noaa_topocentric)
+_psa_geocentric = _element(scalar._psa_geocentric)
+_psa_topocentric = _element(scalar._psa_topocentric)
+_sg2_geocentric = _element(scalar._sg2_geocentric)
+_sg2_topocentric = _element(scalar._sg2_topocentric)
+_usno_geocentric = _element(scalar._usno_geocentric)
+_usno_topocentric = _element(scalar._usno_topocentric)
+_walraven_geocentric = _element(scalar._walraven_geocentric)
+_walraven_topocentric = _element(scalar._walraven_topocentric)
+
+
+@_element
+def _at(array, i, j):
+    """Return element (i, j) of ``array`` broadcast along axes of size 1."""
+    return array[i if array.shape[0] > 1 else 0, j if array.shape[1] > 1 else 0]
+
+
+def _vector(value, shape):
+    """Return ``value`` broadcast to ``shape`` as a flat float64 array."""
+    value = np.broadcast_to(np.asarray(value, dtype=np.float64), shape)
+    return np.ascontiguousarray(value).reshape(-1)
+
+
+def _matrix(value, shape):
+    """
+    Return ``value`` as a two-dimensional float64 array that broadcasts
+    against the two-dimensional form of ``shape``.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    if len(shape) > 2:
+        value = np.broadcast_to(value, shape).reshape(-1, 1)
+    else:
+        value = value.reshape((1,) * (2 - value.ndim) + value.shape)
+    return np.ascontiguousarray(value)
+
+
+def _ephemeris(loop, count, fields, *args):
+    """Evaluate the loop of the geocentric ephemeris over the timestamps."""
+    shape = np.broadcast_shapes(*(np.shape(field) for field in fields))
+    out = np.empty((count, math.prod(shape)))
+    loop(*(_vector(field, shape) for field in fields), *args, out)
+    return [values.reshape(shape) for values in out]
+
+
+def _position(loop, names, dtype, terms, *args):
+    """
+    Evaluate the loop of the solar position over all combinations of
+    timestamps and sites.
+    """
+    shape = np.broadcast_shapes(*(np.shape(term) for term in terms))
+    if len(shape) > 2:
+        shape_2d = (math.prod(shape), 1)
+    else:
+        shape_2d = (1,) * (2 - len(shape)) + shape
+    out = np.empty((len(names), *shape_2d), dtype=dtype)
+    loop(*(_matrix(term, shape) for term in terms), *args, out)
+    return {name: values.reshape(shape) for name, values in zip(names, out)}
+
+
+_APPARENT_OUTPUTS = (
+    "elevation",
+    "apparent_elevation",
+    "zenith",
+    "apparent_zenith",
+    "azimuth",
+)
+_OUTPUTS = ("elevation", "zenith", "azimuth")
+
+# periodic terms of SG2 with precomputed angular frequencies, see scalar
+_HELIOCENTRIC_LONGITUDE_TERMS = np.array(scalar._HELIOCENTRIC_LONGITUDE_TERMS)
+
+
+@_loop
+def _iqbal_ephemeris(dayofyear, hour, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_iqbal_geocentric(dayofyear[i], hour[i])):
+            out[q, i] = value
+
+
+@_loop
+def _iqbal_position(
+    declination, greenwich_hour_angle, longitude, sin_latitude, cos_latitude, out
+):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _iqbal_topocentric(
+            _at(declination, i, j),
+            _at(greenwich_hour_angle, i, j),
+            _at(longitude, i, j),
+            _at(sin_latitude, i, j),
+            _at(cos_latitude, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def iqbal(jd_ut, latitude, longitude=None, *, dtype=np.float64):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.iqbal`."""
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    ephemeris = _ephemeris(_iqbal_ephemeris, 2, (time.dayofyear, time.hour))
+    _, longitude, sin_latitude, cos_latitude = _location_terms(latitude, longitude)
+    return _position(
+        _iqbal_position,
+        _OUTPUTS,
+        dtype,
+        (*ephemeris, longitude, sin_latitude, cos_latitude),
+    )
+
+
+@_loop
+def _michalsky_ephemeris(jd, hour, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_michalsky_geocentric(jd[i], hour[i])):
+            out[q, i] = value
+
+
+@_loop
+def _michalsky_position(
+    dec, ra, gmst, longitude, sin_latitude, cos_latitude, spencer_correction, out
+):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _michalsky_topocentric(
+            _at(dec, i, j),
+            _at(ra, i, j),
+            _at(gmst, i, j),
+            _at(longitude, i, j),
+            _at(sin_latitude, i, j),
+            _at(cos_latitude, i, j),
+            spencer_correction,
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def michalsky(
+    jd_ut,
+    latitude,
+    longitude=None,
+    spencer_correction=True,
+    julian_date="original",
+    *,
+    dtype=np.float64,
+):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.michalsky`."""
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    jd = _michalsky_julian_date(time, julian_date)
+    ephemeris = _ephemeris(_michalsky_ephemeris, 3, (jd, time.hour))
+    _, longitude, sin_latitude, cos_latitude = _location_terms(latitude, longitude)
+    return _position(
+        _michalsky_position,
+        _APPARENT_OUTPUTS,
+        dtype,
+        (*ephemeris, longitude, sin_latitude, cos_latitude),
+        bool(spencer_correction),
+    )
+
+
+@_loop
+def _noaa_ephemeris(julian_date, fraction, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_noaa_geocentric(julian_date[i], fraction[i])):
+            out[q, i] = value
+
+
+@_loop
+def _noaa_position(
+    sun_declin, true_solar_time, longitude, sin_latitude, cos_latitude, out
+):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _noaa_topocentric(
+            _at(sun_declin, i, j),
+            _at(true_solar_time, i, j),
+            _at(longitude, i, j),
+            _at(sin_latitude, i, j),
+            _at(cos_latitude, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def noaa(jd_ut, latitude, longitude=None, *, delta_t=67.0, dtype=np.float64):
+    """
+    Numba-compiled equivalent of :py:func:`solposx.kernels.noaa`.
+
+    ``delta_t`` is accepted for compatibility, but not used by the algorithm.
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    ephemeris = _ephemeris(_noaa_ephemeris, 2, (time.julian_date, time.fraction))
+    longitude, sin_latitude, cos_latitude = _noaa_location_terms(latitude, longitude)
+    return _position(
+        _noaa_position,
+        _APPARENT_OUTPUTS,
+        dtype,
+        (*ephemeris, longitude, sin_latitude, cos_latitude),
+    )
+
+
+@_loop
+def _psa_ephemeris(n, hour, p, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_psa_geocentric(n[i], hour[i], p)):
+            out[q, i] = value
+
+
+@_loop
+def _psa_position(d, ra, gmst, lambda_t, sin_phi, cos_phi, out):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _psa_topocentric(
+            _at(d, i, j),
+            _at(ra, i, j),
+            _at(gmst, i, j),
+            _at(lambda_t, i, j),
+            _at(sin_phi, i, j),
+            _at(cos_phi, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def psa(jd_ut, latitude, longitude=None, *, coefficients=2020, dtype=np.float64):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.psa`."""
+    p = np.asarray(_psa_coefficients(coefficients), dtype=np.float64)
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    # days since J2000.0
+    n = _psa_julian_date(time) - 2451545.0
+    ephemeris = _ephemeris(_psa_ephemeris, 3, (n, time.hour), p)
+    _, lambda_t, sin_phi, cos_phi = _location_terms(latitude, longitude)
+    return _position(
+        _psa_position, _OUTPUTS, dtype, (*ephemeris, lambda_t, sin_phi, cos_phi)
+    )
+
+
+@_loop
+def _sg2_ephemeris(jd_ut, jd_tt, params, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_sg2_geocentric(jd_ut[i], jd_tt[i], params)):
+            out[q, i] = value
+
+
+@_loop
+def _sg2_position(
+    decl_g,
+    ra,
+    v,
+    longitude,
+    sin_latitude,
+    cos_latitude,
+    x,
+    y,
+    pressure,
+    temperature,
+    out,
+):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _sg2_topocentric(
+            _at(decl_g, i, j),
+            _at(ra, i, j),
+            _at(v, i, j),
+            _at(longitude, i, j),
+            _at(sin_latitude, i, j),
+            _at(cos_latitude, i, j),
+            _at(x, i, j),
+            _at(y, i, j),
+            _at(pressure, i, j),
+            _at(temperature, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def sg2(
+    jd_ut,
+    latitude,
+    longitude=None,
+    elevation=0,
+    *,
+    pressure=101325,
+    temperature=12,
+    dtype=np.float64,
+):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.sg2`."""
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    ephemeris = _ephemeris(
+        _sg2_ephemeris, 3, _sg2_julian_dates(time), _HELIOCENTRIC_LONGITUDE_TERMS
+    )
+    if _is_site(latitude):
+        site = latitude
+        longitude = site.longitude
+        sin_latitude, cos_latitude = site.sin_latitude, site.cos_latitude
+        x, y = site.parallax_x, site.parallax_y
+        pressure, temperature = site.pressure, site.temperature
+    else:
+        latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+            latitude, longitude
+        )
+        x, y = _parallax_terms(latitude, elevation, sin_latitude, cos_latitude)
+    return _position(
+        _sg2_position,
+        _APPARENT_OUTPUTS,
+        dtype,
+        (
+            *ephemeris,
+            longitude,
+            sin_latitude,
+            cos_latitude,
+            x,
+            y,
+            pressure,
+            temperature,
+        ),
+    )
+
+
+@_loop
+def _usno_ephemeris(JD, JD_0, delta_t, gmst_option, out):
+    for i in prange(out.shape[1]):
+        values = _usno_geocentric(JD[i], JD_0[i], delta_t[i], gmst_option)
+        for q, value in enumerate(values):
+            out[q, i] = value
+
+
+@_loop
+def _usno_position(d, greenwich_hour_angle, longitude, sin_latitude, cos_latitude, out):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _usno_topocentric(
+            _at(d, i, j),
+            _at(greenwich_hour_angle, i, j),
+            _at(longitude, i, j),
+            _at(sin_latitude, i, j),
+            _at(cos_latitude, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def usno(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    delta_t=67.0,
+    gmst_option=1,
+    dtype=np.float64,
+):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.usno`."""
+    if gmst_option not in (1, 2):
+        raise ValueError(f"{gmst_option} is not a valid `gmst_option`")
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    if delta_t is None:
+        delta_t = _calculate_deltat(time)
+    # JD_0 is the Julian date of the previous midnight (0h) UT1
+    fields = (time.julian_date, time.days + 2440587.5, delta_t)
+    ephemeris = _ephemeris(_usno_ephemeris, 2, fields, gmst_option)
+    _, longitude, sin_latitude, cos_latitude = _location_terms(latitude, longitude)
+    return _position(
+        _usno_position,
+        _OUTPUTS,
+        dtype,
+        (*ephemeris, longitude, sin_latitude, cos_latitude),
+    )
+
+
+@_loop
+def _walraven_ephemeris(time, delta, T, out):
+    for i in prange(out.shape[1]):
+        for q, value in enumerate(_walraven_geocentric(time[i], delta[i], T[i])):
+            out[q, i] = value
+
+
+@_loop
+def _walraven_position(DECL, RA, ST, solar_time, longitude, sin_phi, cos_phi, out):
+    m = out.shape[2]
+    for k in prange(out.shape[1] * m):
+        i, j = k // m, k % m
+        values = _walraven_topocentric(
+            _at(DECL, i, j),
+            _at(RA, i, j),
+            _at(ST, i, j),
+            _at(solar_time, i, j),
+            _at(longitude, i, j),
+            _at(sin_phi, i, j),
+            _at(cos_phi, i, j),
+        )
+        for q, value in enumerate(values):
+            out[q, i, j] = value
+
+
+def walraven(jd_ut, latitude, longitude=None, *, dtype=np.float64):
+    """Numba-compiled equivalent of :py:func:`solposx.kernels.walraven`."""
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    days, delta = _walraven_days(time)
+    ephemeris = _ephemeris(_walraven_ephemeris, 4, (days, delta, time.hour))
+    _, longitude, sin_phi, cos_phi = _location_terms(latitude, longitude)
+    return _position(
+        _walraven_position,
+        _OUTPUTS,
+        dtype,
+        (*ephemeris, longitude, sin_phi, cos_phi),
+    )
@@ -0,0 +1,30 @@
+"""Selection of the implementation of the array kernels."""
+
+import warnings
+
+_BACKENDS = ("numpy", "numba")
+
+
+def _numba_kernels(backend):
+    """
+    Return the module of the numba-compiled kernels if ``backend`` is
+    ``'numba'``, otherwise None.
+
+    If numba is not installed, a warning is issued and None is returned, such
+    that the calculation falls back to NumPy.
+    """
+    if backend not in _BACKENDS:
+        raise ValueError(
+            f"Unknown backend: {backend}. Available options are: {list(_BACKENDS)}."
+        )
+    if backend == "numpy":
+        return None
+    try:
+        from solposx.kernels import _numba
+    except ImportError:
+        warnings.warn(
+            "numba is not installed, falling back to backend='numpy'.",
+            stacklevel=3,
+        )
+        return None
+    return _numba
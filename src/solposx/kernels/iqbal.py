@@ -0,0 +1,228 @@
+"""Iqbal solar position kernel operating on NumPy arrays."""
+
+import functools
+
+import numpy as np
+from pvlib.tools import acosd, sind, cosd
+from solposx.site import _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _calendar_from_days,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+    day_cache,
+)
+
+
+def _iqbal_day_terms(days, dtype):
+    """Return the declination [degrees] and equation of time [minutes]."""
+    dayofyear = _calendar_from_days(days)[3]
+    day_angle = 2 * np.pi * _as_dtype(dayofyear - 1, dtype) / 365  # [radians]
+
+    # declination [degrees]
+    declination = (
+        +0.006918
+        - 0.399912 * np.cos(day_angle)
+        + 0.070257 * np.sin(day_angle)
+        - 0.006758 * np.cos(2 * day_angle)
+        + 0.000907 * np.sin(2 * day_angle)
+        - 0.002697 * np.cos(3 * day_angle)
+        + 0.00148 * np.sin(3 * day_angle)
+    ) * (180 / np.pi)
+
+    # equation of time [minutes]
+    eot = (
+        (
+            0.0000075
+            + 0.001868 * np.cos(day_angle)
+            - 0.032077 * np.sin(day_angle)
+            - 0.014615 * np.cos(2 * day_angle)
+            - 0.040849 * np.sin(2 * day_angle)
+        )
+        * 1440
+        / 2
+        / np.pi
+    )
+
+    return declination, eot
+
+
+def iqbal_geocentric(jd_ut, *, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the Iqbal algorithm.
+
+    Location-independent stage of :py:func:`iqbal`, see
+    :py:func:`iqbal_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'`` and
+        ``'greenwich_hour_angle'``. [degrees]
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+
+    # the terms depend on the day of year only and are cached per day
+    declination, eot = day_cache.lookup(
+        ("iqbal", dtype), time.days, functools.partial(_iqbal_day_terms, dtype=dtype)
+    )
+
+    return {
+        "declination": declination,
+        "greenwich_hour_angle": (_as_dtype(time.hour, dtype) - 12) * 15 + eot / 4,
+    }
+
+
+def iqbal_topocentric(ephemeris, latitude, longitude=None):
+    """
+    Calculate the solar position from the Iqbal geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`iqbal`, see
+    :py:func:`iqbal_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`iqbal_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    declination = ephemeris["declination"]
+    latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    # hour angle [degrees]
+    hour_angle = ephemeris["greenwich_hour_angle"] + longitude
+
+    zenith = acosd(
+        _clip_unit(
+            sind(declination) * sin_latitude
+            + cosd(declination) * cos_latitude * cosd(hour_angle)
+        )
+    )
+
+    # The azimuth function provided by Iqbal does not always select the right
+    # quadrant. Therefore, this implementation uses the arctan2 method.
+    azimuth = (
+        np.rad2deg(
+            np.arctan2(
+                sind(hour_angle) * cosd(declination),
+                cosd(hour_angle) * sin_latitude * cosd(declination)
+                - cos_latitude * sind(declination),
+            )
+        )
+        + 180
+    )
+
+    return {
+        "elevation": 90 - zenith,
+        "zenith": zenith,
+        "azimuth": azimuth,
+    }
+
+
+def iqbal(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the Iqbal algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.iqbal`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.iqbal
+    iqbal_geocentric
+    iqbal_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.iqbal(jd_ut, latitude, longitude, dtype=dtype)
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"dtype": dtype}
+        return workspace._evaluate(iqbal, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = iqbal_geocentric(jd_ut, dtype=dtype)
+    result = iqbal_topocentric(ephemeris, latitude, longitude)
+    return _finish(result, out)
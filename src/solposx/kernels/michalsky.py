@@ -0,0 +1,299 @@
+"""Michalsky solar position kernel operating on NumPy arrays."""
+
+import numpy as np
+from pvlib.tools import sind, cosd, asind
+from solposx import refraction
+from solposx.site import _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+
+def _michalsky_julian_date(time, julian_date="original"):
+    """Return the Julian date of the Michalsky algorithm."""
+    if julian_date == "original":
+        delta = time.year - 1949
+        leap = np.floor(delta / 4)
+        return 2432916.5 + delta * 365 + leap + time.dayofyear + time.hour / 24
+    elif julian_date == "pandas":
+        return time.julian_date
+    raise ValueError("`julian_date` has to be either `original` or `pandas`.")
+
+
+def michalsky_geocentric(jd_ut, julian_date="original", *, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the Michalsky algorithm.
+
+    Location-independent stage of :py:func:`michalsky`, see
+    :py:func:`michalsky_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    julian_date : string, default 'original'
+        Julian date calculation. Can be one of the following:
+
+        * ``'original'``: calculation based on Michalsky's paper.
+        * ``'pandas'``: use ``jd_ut`` as is, corresponding to
+          :py:meth:`pandas.DatetimeIndex.to_julian_date`.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'`` [degrees],
+        ``'right_ascension'`` [degrees], and
+        ``'greenwich_mean_sidereal_time'`` [hours].
+
+    Raises
+    ------
+    ValueError
+        An error is raised if the julian_date calculation is not `original`
+        or `pandas`.
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    hour = time.hour
+
+    # days since J2000.0, re-based before the conversion to dtype
+    n = _as_dtype(_michalsky_julian_date(time, julian_date) - 2451545.0, dtype)
+
+    # L - mean longitude [degrees]
+    L = 280.460 + 0.9856474 * n
+    # L has to be between 0 and 360 deg
+    L = L % 360
+
+    # g - mean anomaly [degrees]
+    g = 357.528 + 0.9856003 * n
+    # g has to be between 0 and 360 deg
+    g = g % 360
+
+    # l - ecliptic longitude [degrees]
+    l = L + 1.915 * sind(g) + 0.02 * sind(2 * g)
+    # l has to be between 0 and 360 deg
+    l = l % 360
+
+    # ep - obliquity of the ecliptic [degrees]
+    ep = 23.439 - 0.0000004 * n
+
+    # ra - right ascension [degrees]
+    ra = np.rad2deg(np.arctan2(cosd(ep) * sind(l), cosd(l)))
+    # ra has to be between 0 and 360 deg
+    ra = ra % 360
+
+    # dec - declination angle [degrees]
+    dec = asind(sind(ep) * sind(l))
+
+    # gmst - Greenwich mean sidereal time [hr]
+    gmst = 6.697375 + 0.0657098242 * n + _as_dtype(hour, dtype)
+    # gmst has to be between 0 and 24 h
+    gmst = gmst % 24
+
+    return {
+        "declination": dec,
+        "right_ascension": ra,
+        "greenwich_mean_sidereal_time": gmst,
+    }
+
+
+def michalsky_topocentric(ephemeris, latitude, longitude=None, spencer_correction=True):
+    """
+    Calculate the solar position from the Michalsky geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`michalsky`, see
+    :py:func:`michalsky_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`michalsky_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    spencer_correction : bool, default True
+        Applies the correction suggested by Spencer so the algorithm
+        works for all latitudes.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    dec = ephemeris["declination"]
+    ra = ephemeris["right_ascension"]
+    gmst = ephemeris["greenwich_mean_sidereal_time"]
+    latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    # lmst - local mean sideral time [hr]
+    lmst = gmst + longitude / 15  # to convert deg to h, divide with 15
+    # lmst has to be between 0 and 24 h
+    lmst = lmst % 24
+
+    # ha - hour angle [hr]
+    ha = lmst - ra / 15
+    # ha has to be between -12 and 12 h
+    ha = (ha + 12) % 24 - 12
+
+    # el - solar elevation angle [degrees]
+    el = asind(
+        _clip_unit(sind(dec) * sin_latitude + cosd(dec) * cos_latitude * cosd(15 * ha))
+    )  # to convert h to deg, multiply with 15
+
+    # az - azimuth [degrees]
+    az = asind(_clip_unit(-cosd(dec) * sind(15 * ha) / cosd(el)))
+
+    if spencer_correction:
+        # Spencer correction for the azimuth quadrant assignment
+        cos_az = sind(dec) - sind(el) * sin_latitude
+        az = np.where((cos_az >= 0) & (sind(az) < 0), 360 + az, az)
+        az = np.where(cos_az < 0, 180 - az, az)
+    else:
+        # Original Michalsky implementation does not work for all latitudes
+        # calcualte critical elevation
+        elc = asind(sind(dec) / sin_latitude)
+        # correct azimuth using critical elevation
+        az = np.where(el >= elc, 180 - az, az)
+        az = np.where((el <= elc) & (ha > 0), az + 360, az)
+        az = az % 360
+
+    # refraction correction
+    el = np.asanyarray(el)
+    r = refraction.michalsky(el)
+
+    return {
+        "elevation": el,
+        "apparent_elevation": el + r,
+        "zenith": 90 - el,
+        "apparent_zenith": 90 - (el + r),
+        "azimuth": az,
+    }
+
+
+def michalsky(
+    jd_ut,
+    latitude,
+    longitude=None,
+    spencer_correction=True,
+    julian_date="original",
+    *,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the Michalsky algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.michalsky`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    spencer_correction : bool, default True
+        Applies the correction suggested by Spencer so the algorithm
+        works for all latitudes.
+    julian_date : string, default 'original'
+        Julian date calculation. Can be one of the following:
+
+        * ``'original'``: calculation based on Michalsky's paper.
+        * ``'pandas'``: use ``jd_ut`` as is, corresponding to
+          :py:meth:`pandas.DatetimeIndex.to_julian_date`.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    Raises
+    ------
+    ValueError
+        An error is raised if the julian_date calculation is not `original`
+        or `pandas`.
+
+    See Also
+    --------
+    solposx.solarposition.michalsky
+    michalsky_geocentric
+    michalsky_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.michalsky(
+            jd_ut,
+            latitude,
+            longitude,
+            spencer_correction,
+            julian_date,
+            dtype=dtype,
+        )
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {
+            "spencer_correction": spencer_correction,
+            "julian_date": julian_date,
+            "dtype": dtype,
+        }
+        return workspace._evaluate(michalsky, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = michalsky_geocentric(jd_ut, julian_date=julian_date, dtype=dtype)
+    result = michalsky_topocentric(
+        ephemeris, latitude, longitude, spencer_correction=spencer_correction
+    )
+    return _finish(result, out)
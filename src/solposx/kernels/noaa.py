@@ -0,0 +1,282 @@
+"""NOAA solar position kernel operating on NumPy arrays."""
+
+import numpy as np
+from pvlib.tools import sind, cosd, asind, acosd, tand
+from solposx import refraction
+from solposx.site import _latitude_terms, _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _calculate_deltat,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+    _set_where,
+)
+
+
+def noaa_geocentric(jd_ut, *, delta_t=67.0, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the NOAA algorithm.
+
+    Location-independent stage of :py:func:`noaa`, see
+    :py:func:`noaa_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    delta_t : numeric, default 67.0
+        Difference between terrestrial time and UT1. If ``delta_t`` is None,
+        uses :py:func:`pvlib.spa.calculate_deltat`. [seconds]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'`` [degrees] and
+        ``'true_solar_time'``, the true solar time at the prime meridian.
+        [minutes]
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    julian_date = time.julian_date
+    # Julian centuries since J2000.0, re-based before the conversion to dtype
+    jc = _as_dtype((julian_date - 2451545) / 36525, dtype)
+
+    if delta_t is None:
+        delta_t = _calculate_deltat(time)
+
+    # [degrees]
+    mean_long = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360
+
+    mean_anom = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+
+    eccent_earth_orbit = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    sun_eq_ctr = (
+        sind(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + sind(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+        + sind(3 * mean_anom) * 0.000289
+    )
+
+    sun_true_long = mean_long + sun_eq_ctr
+
+    sun_app_long = sun_true_long - 0.00569 - 0.00478 * sind(125.04 - 1934.136 * jc)
+
+    mean_obliq_ecliptic = (
+        23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    )
+
+    obliq_corr = mean_obliq_ecliptic + 0.00256 * cosd(125.04 - 1934.136 * jc)
+
+    sun_declin = asind(sind(obliq_corr) * sind(sun_app_long))
+
+    var_y = tand(obliq_corr / 2) ** 2
+
+    eot = 4 * np.degrees(
+        +var_y * sind(2 * mean_long)
+        - 2 * eccent_earth_orbit * sind(mean_anom)
+        + 4 * eccent_earth_orbit * var_y * sind(mean_anom) * cosd(2 * mean_long)
+        - 0.5 * (var_y**2) * sind(4 * mean_long)
+        - 1.25 * (eccent_earth_orbit**2) * sind(2 * mean_anom)
+    )
+
+    minutes = _as_dtype(time.fraction * 1440, dtype)
+
+    return {
+        "declination": sun_declin,
+        "true_solar_time": minutes + eot,
+    }
+
+
+def _noaa_location_terms(latitude, longitude, dtype=np.float64):
+    """Return longitude and the sine and cosine of the latitude of NOAA."""
+    latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+        latitude, longitude, dtype
+    )
+    # Allow for latitude of -90 and 90 on Ubunty and MacOS
+    polar = np.abs(latitude) > 90 - 1e-6
+    if np.any(polar):
+        sin_latitude, cos_latitude = (
+            _as_dtype(term, np.result_type(sin_latitude))
+            for term in _latitude_terms(np.clip(latitude, -90 + 1e-6, 90 - 1e-6))
+        )
+    return longitude, sin_latitude, cos_latitude
+
+
+def noaa_topocentric(ephemeris, latitude, longitude=None):
+    """
+    Calculate the solar position from the NOAA geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`noaa`, see
+    :py:func:`noaa_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`noaa_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    sun_declin = ephemeris["declination"]
+
+    longitude, sin_latitude, cos_latitude = _noaa_location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    true_solar_time = (ephemeris["true_solar_time"] + 4 * longitude) % 1440
+
+    hour_angle = np.where(
+        true_solar_time / 4 < 0,
+        true_solar_time / 4 + 180,
+        true_solar_time / 4 - 180,
+    )
+
+    zenith = acosd(
+        _clip_unit(
+            sin_latitude * sind(sun_declin)
+            + cos_latitude * cosd(sun_declin) * cosd(hour_angle)
+        )
+    )
+
+    azimuth = np.where(
+        hour_angle > 0,
+        (
+            acosd(
+                _clip_unit(
+                    ((sin_latitude * cosd(zenith)) - sind(sun_declin))
+                    / (cos_latitude * sind(zenith))
+                )
+            )
+            + 180 % 360
+        ),
+        (
+            540
+            - acosd(
+                _clip_unit(
+                    ((sin_latitude * cosd(zenith)) - sind(sun_declin))
+                    / (cos_latitude * sind(zenith))
+                )
+            )
+        )
+        % 360,
+    )
+
+    elevation = 90 - zenith
+    refraction_correction = refraction.hughes(
+        elevation=np.asanyarray(elevation), pressure=101325, temperature=10
+    )
+    # Minor deviation of the refraction correction used by NOAA
+    refraction_correction = _set_where(refraction_correction, elevation > 85, 0)
+
+    return {
+        "elevation": elevation,
+        "apparent_elevation": elevation + refraction_correction,
+        "zenith": zenith,
+        "apparent_zenith": zenith - refraction_correction,
+        "azimuth": azimuth,
+    }
+
+
+def noaa(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    delta_t=67.0,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the NOAA algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.noaa`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    delta_t : numeric, default 67.0
+        Difference between terrestrial time and UT1. If ``delta_t`` is None,
+        uses :py:func:`pvlib.spa.calculate_deltat`. [seconds]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.noaa
+    noaa_geocentric
+    noaa_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.noaa(jd_ut, latitude, longitude, delta_t=delta_t, dtype=dtype)
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"delta_t": delta_t, "dtype": dtype}
+        return workspace._evaluate(noaa, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = noaa_geocentric(jd_ut, delta_t=delta_t, dtype=dtype)
+    result = noaa_topocentric(ephemeris, latitude, longitude)
+    return _finish(result, out)
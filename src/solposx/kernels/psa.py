@@ -0,0 +1,301 @@
+"""PSA solar position kernel operating on NumPy arrays."""
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from solposx.site import _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+_PSA_PARAMS = {
+    2020: [
+        2.267127827,
+        -9.300339267e-4,
+        4.895036035,
+        1.720279602e-2,
+        6.239468336,
+        1.720200135e-2,
+        3.338320972e-2,
+        3.497596876e-4,
+        -1.544353226e-4,
+        -8.689729360e-6,
+        4.090904909e-1,
+        -6.213605399e-9,
+        4.418094944e-5,
+        6.697096103,
+        6.570984737e-2,
+    ],
+    2001: [
+        2.1429,
+        -0.0010394594,
+        4.8950630,
+        0.017202791698,
+        6.2400600,
+        0.0172019699,
+        0.03341607,
+        0.00034894,
+        -0.0001134,
+        -0.0000203,
+        0.4090928,
+        -6.2140e-09,
+        0.0000396,
+        6.6974243242,
+        0.0657098283,
+    ],
+}
+
+
+def _psa_coefficients(coefficients):
+    """Return the coefficients of the PSA algorithm, validating the choice."""
+    if isinstance(coefficients, int):
+        try:
+            return _PSA_PARAMS[coefficients]
+        except KeyError:
+            raise ValueError(
+                f"Unknown coefficients set: {coefficients}. "
+                f"Available options are: {_PSA_PARAMS.keys()}."
+            ) from None
+    elif isinstance(coefficients, Iterable) and len(coefficients) == 15:
+        return coefficients
+    raise ValueError(
+        f"Coefficients must be one of: {_PSA_PARAMS.keys()}, "
+        "or a list of 15 coefficients."
+    )
+
+
+def _psa_julian_date(time):
+    """Return the Julian date of the PSA algorithm from the calendar fields."""
+    year = time.year
+    month = time.month
+
+    month_term = ((month - 14) / 12).astype(int)
+
+    return (
+        (1461 * (year + 4800 + month_term) / 4).astype(int)
+        + (367 * (month - 2 - 12 * (month_term)) / 12).astype(int)
+        - ((3 * ((year + 4900 + month_term) / 100).astype(int)) / 4).astype(int)
+        + time.day
+        - 32075
+        - 0.5
+        + time.hour / 24.0
+    )
+
+
+def psa_geocentric(jd_ut, *, coefficients=2020, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the PSA algorithm.
+
+    Location-independent stage of :py:func:`psa`, see
+    :py:func:`psa_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    coefficients : int or list, default 2020
+        Coefficients for the solar position algorithm. Available options
+        include 2001 or 2020. Alternatively a list of custom coefficients
+        can be specified.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'`` [radians],
+        ``'right_ascension'`` [radians], and
+        ``'greenwich_mean_sidereal_time'`` [hours].
+
+    Raises
+    ------
+    ValueError
+        Raises an error if ``coefficients`` is not in [2001, 2020] or a list
+        of the 15 coefficients.
+    """
+    p = _psa_coefficients(coefficients)
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    hour = time.hour
+
+    # days since J2000.0, re-based before the conversion to dtype
+    n = _as_dtype(_psa_julian_date(time) - 2451545.0, dtype)
+    p = _as_dtype(p, dtype)
+
+    # ecliptic longitude (lambda_e) and obliquity (epsilon):
+    omega = p[0] + p[1] * n  # Eq 3
+    L = p[2] + p[3] * n  # Eq 4
+    g = p[4] + p[5] * n  # Eq 5
+    lambda_e = (
+        L + p[6] * np.sin(g) + p[7] * np.sin(2 * g) + p[8] + p[9] * np.sin(omega)
+    )  # Eq 6
+    epsilon = p[10] + p[11] * n + p[12] * np.cos(omega)  # Eq 7
+
+    # celestial right ascension (ra) and declination (d):
+    ra = np.arctan2(np.cos(epsilon) * np.sin(lambda_e), np.cos(lambda_e))  # Eq 8
+    ra = ra % (2 * np.pi)
+    d = np.arcsin(np.sin(epsilon) * np.sin(lambda_e))  # Eq 9
+
+    # Greenwich mean sidereal time [hours]
+    gmst = p[13] + p[14] * n + _as_dtype(hour, dtype)  # Eq 10
+
+    return {
+        "declination": d,
+        "right_ascension": ra,
+        "greenwich_mean_sidereal_time": gmst,
+    }
+
+
+def psa_topocentric(ephemeris, latitude, longitude=None):
+    """
+    Calculate the solar position from the PSA geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`psa`, see
+    :py:func:`psa_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`psa_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    d = ephemeris["declination"]
+    ra = ephemeris["right_ascension"]
+    gmst = ephemeris["greenwich_mean_sidereal_time"]
+
+    _, lambda_t, sin_phi, cos_phi = _location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    # local coordinates:
+    lmst = (gmst * 15 + lambda_t) * np.pi / 180  # Eq 11
+    w = lmst - ra  # Eq 12
+    theta_z = np.arccos(
+        _clip_unit(cos_phi * np.cos(w) * np.cos(d) + np.sin(d) * sin_phi)
+    )  # Eq 13
+    gamma = np.arctan2(-np.sin(w), (np.tan(d) * cos_phi - sin_phi * np.cos(w)))  # Eq 14
+
+    EMR = 6371.01  # Earth Mean Radius in km
+    AU = 149597890  # Astronomical Unit in km
+    theta_z = theta_z + (EMR / AU) * np.sin(theta_z)  # Eq 15,16
+
+    return {
+        "elevation": 90 - np.degrees(theta_z),
+        "zenith": np.degrees(theta_z),
+        "azimuth": np.degrees(gamma) % 360,
+    }
+
+
+def psa(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    coefficients=2020,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the PSA algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.psa`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    coefficients : int or list, default 2020
+        Coefficients for the solar position algorithm. Available options
+        include 2001 or 2020. Alternatively a list of custom coefficients
+        can be specified.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raises an error if ``coefficients`` is not in [2001, 2020] or a list
+        of the 15 coefficients.
+
+    See Also
+    --------
+    solposx.solarposition.psa
+    psa_geocentric
+    psa_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.psa(
+            jd_ut, latitude, longitude, coefficients=coefficients, dtype=dtype
+        )
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"coefficients": coefficients, "dtype": dtype}
+        return workspace._evaluate(psa, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = psa_geocentric(jd_ut, coefficients=coefficients, dtype=dtype)
+    result = psa_topocentric(ephemeris, latitude, longitude)
+    return _finish(result, out)
@@ -0,0 +1,427 @@
+"""SG2 solar position kernel operating on NumPy arrays."""
+
+import numpy as np
+from solposx import refraction
+from solposx.site import _is_site, _location_terms, _parallax_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+# parameters for calculating delta_t, columns are: y, a_0, a_1, ..., a_5
+_DELTA_T_PARAMS = np.array(
+    [
+        [1975, 45.45, 1.067, -1 / 260, -1 / 718, 0, 0],  # [1980, 1986]
+        [
+            2000,
+            63.86,
+            0.3345,
+            -0.060374,
+            0.0017275,
+            6.518 * 10**-4,
+            2.374 * 10**-5,
+        ],  # [1986, 2005]
+        [2000, 63.48, 0.2040, 0.005576, 0, 0, 0],  # [2005, 2030]
+    ]
+)
+
+# Earth heliocentric longitude, columns are: f_L, rho_L, phi_L
+_HELIOCENTRIC_LONGITUDE_PARAMS = np.array(
+    [
+        [1 / 365.261278, 3.401508 * 10**-2, 1.600780],
+        [1 / 182.632412, 3.486440 * 10**-4, 1.662976],
+        [1 / 29.530634, 3.136227 * 10**-5, -1.195905],
+        [1 / 399.529850, 3.578979 * 10**-5, -1.042052],
+        [1 / 291.956812, 2.676185 * 10**-5, 2.012613],
+        [1 / 583.598201, 2.333925 * 10**-5, -2.867714],
+        [1 / 4652.629372, 1.221214 * 10**-5, 1.225038],
+        [1 / 1450.236684, 1.217941 * 10**-5, -0.828601],
+        [1 / 199.459709, 1.343914 * 10**-5, -3.108253],
+        [1 / 365.355291, 8.499475 * 10**-4, -2.353709],
+    ]
+)
+
+
+def _sg2_julian_dates(time):
+    """
+    Return the Julian dates in UT and TT of the SG2 algorithm.
+
+    Raises an error if any date is outside the years 1980 to 2030.
+    """
+    year = time.year
+    month = time.month
+    day = time.day  # this is day of month and not day of year
+    hour = time.hour
+
+    # year in decimal form
+    year_dec = year + (month - 0.5) / 12
+
+    if (np.min(year_dec) < 1980) | (np.max(year_dec) > 2030):
+        raise ValueError("The algorithm is valid only between 1980 and 2030")
+
+    # parameters of the period of each timestamp
+    period_1 = (year_dec >= 1980) & (year_dec <= 1986)
+    period_2 = (year_dec >= 1986) & (year_dec <= 2005)
+    y_t, *a_t = (
+        np.where(period_1, p_1, np.where(period_2, p_2, p_3))
+        for p_1, p_2, p_3 in _DELTA_T_PARAMS.T
+    )
+    delta_t = 0.0
+    for k in range(6):
+        delta_t += a_t[k] * (year - y_t) ** k
+
+    year_mod = np.where((month == 1) | (month == 2), year - 1, year)
+    month_mod = np.where((month == 1) | (month == 2), month + 12, month)
+
+    # SG2 C-code implementation (differs from journal paper!)
+    jd_ut = (
+        1721028.0
+        + day
+        + np.floor((153.0 * month_mod - 2.0) / 5.0)
+        + 365.0 * year_mod
+        + np.floor(year_mod / 4.0)
+        + hour / 24
+        - 0.5
+        - np.floor(year_mod / 100.0)
+        + np.floor(year_mod / 400.0)
+    )
+
+    jd_tt = jd_ut + delta_t / 86400
+
+    return jd_ut, jd_tt
+
+
+def sg2_geocentric(jd_ut, *, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the SG2 algorithm.
+
+    Location-independent stage of :py:func:`sg2`, see
+    :py:func:`sg2_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'``,
+        ``'right_ascension'``, and ``'apparent_sidereal_time'``, the apparent
+        sidereal time at Greenwich. [radians]
+
+    Raises
+    ------
+    ValueError
+        Raises an error if any date is outside the years 1980 to 2030.
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+
+    jd_ut, jd_tt = _sg2_julian_dates(time)
+
+    jd_ut_mod = jd_ut - 2444239.5
+    # re-based before the conversion to dtype
+    jd_tt_mod = _as_dtype(jd_tt - 2444239.5, dtype)
+
+    # Sum the periodic terms one by one, such that the temporary arrays have
+    # the shape of the timestamps [rad]
+    sums = 0.0
+    for f_L, rho_L, phi_L in _as_dtype(_HELIOCENTRIC_LONGITUDE_PARAMS, dtype):
+        sums += rho_L * np.cos(2 * np.pi * f_L * jd_tt_mod - phi_L)
+
+    a_L = 1 / 58.130101
+    b_L = 1.742145
+
+    L = (sums + a_L * jd_tt_mod + b_L) % (2 * np.pi)
+
+    # Geocentric parameters
+    D_t = -9.933735 * 10**-5  # [rad]
+
+    f_psi = 1 / 6791.164405
+    rho_psi = 8.329092 * 10**-5
+    phi_psi = -2.052757
+
+    # Sun geocentric longitude [rad]
+    D_psi = rho_psi * np.cos(2 * np.pi * f_psi * jd_tt_mod - phi_psi)
+
+    a_e = -6.216374 * 10**-9
+    b_e = 4.091383 * 10**-1
+    f_e = 1 / 6791.164405
+    rho_e = 4.456183 * 10**-5
+    phi_e = 2.660352
+
+    # true Earth obliquityn[rad]
+    epsilon = (
+        rho_e * np.cos(2 * np.pi * f_e * jd_tt_mod - phi_e) + a_e * jd_tt_mod + b_e
+    )
+
+    # Apparent Sun geocentric longitude [rad]
+    Theta = (L + np.pi + D_psi + D_t) % (2 * np.pi)
+
+    # Sun Geocentric declination [rad]
+    decl_g = np.arcsin(np.sin(Theta) * np.sin(epsilon))
+
+    # Sun Geocentric right ascension [rad]
+    ra = np.arctan2(np.sin(Theta) * np.cos(epsilon), np.cos(Theta))
+
+    # mean sidereal time [rad]
+    if dtype == np.float64:
+        mst = (6.300388099 * jd_ut_mod + 1.742079) % (2 * np.pi)
+    else:
+        # the rotation over whole days and over the fraction of day are
+        # evaluated separately to retain the time resolution
+        days = np.floor(jd_ut_mod)
+        mst = (
+            _as_dtype((6.300388099 * days + 1.742079) % (2 * np.pi), dtype)
+            + _as_dtype(6.300388099 * (jd_ut_mod - days), dtype)
+        ) % (2 * np.pi)
+
+    # apparent sidereal time at Greenwich [rad]
+    v = mst + D_psi * np.cos(epsilon)
+
+    return {
+        "declination": decl_g,
+        "right_ascension": ra,
+        "apparent_sidereal_time": v,
+    }
+
+
+def sg2_topocentric(
+    ephemeris,
+    latitude,
+    longitude=None,
+    elevation=0,
+    *,
+    pressure=101325,
+    temperature=12,
+):
+    """
+    Calculate the solar position from the SG2 geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`sg2`, see
+    :py:func:`sg2_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`sg2_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms, including
+        ``elevation``, ``pressure``, and ``temperature``. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    elevation : array-like, default : 0
+        Altitude of the location of interest. [m]
+    pressure : array-like, default : 101325
+        Annual average air pressure. [Pa]
+    temperature : array-like, default : 12
+        Annual average air temperature. [°C]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    decl_g = ephemeris["declination"]
+    ra = ephemeris["right_ascension"]
+    v = ephemeris["apparent_sidereal_time"]
+
+    # Geocentric parameters
+    xi = 4.263521 * 10**-5  # [rad]
+
+    if _is_site(latitude):
+        site = latitude
+        longitude = site.longitude
+        sin_latitude, cos_latitude = site.sin_latitude, site.cos_latitude
+        x, y = site.parallax_x, site.parallax_y
+        pressure, temperature = site.pressure, site.temperature
+    else:
+        latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+            latitude, longitude
+        )
+        x, y = _parallax_terms(latitude, elevation, sin_latitude, cos_latitude)
+    dtype = np.result_type(*ephemeris.values())
+    longitude, sin_latitude, cos_latitude, x, y, pressure, temperature = (
+        _as_dtype(term, dtype)
+        for term in (longitude, sin_latitude, cos_latitude, x, y, pressure, temperature)
+    )
+
+    # convert longitude to [rad]
+    longitude = np.deg2rad(longitude)
+
+    # omega_g is the geocentric hour angle
+    # no formula is given in the paper to calcualte this
+    # using the formulas from Reda and Andreas publication
+
+    # geocentric hour angle [rad]
+    omega_g = v + longitude - ra
+
+    # Parallax effects in the Sun right ascension [rad]
+    D_r_a = -x * np.sin(omega_g) / np.cos(decl_g) * xi
+
+    # Sun topocentric declination [rad]
+    declination = (
+        decl_g + (x * np.cos(omega_g) * np.sin(decl_g) - y * np.cos(decl_g)) * xi
+    )
+
+    # Sun topocentric hour angle [rad]
+    omega = v - ra + longitude - D_r_a
+
+    # Sun topocentric azimuth [rad]
+    solar_azimuth = (
+        np.arctan2(
+            np.sin(omega),
+            np.cos(omega) * sin_latitude - np.tan(declination) * cos_latitude,
+        )
+        + np.pi
+    )
+
+    # Sun topocentric elevation angle without refraction correction [rad]
+    solar_elevation = np.arcsin(
+        _clip_unit(
+            sin_latitude * np.sin(declination)
+            + cos_latitude * np.cos(declination) * np.cos(omega)
+        )
+    )
+
+    solar_elevation_deg = np.rad2deg(solar_elevation)
+
+    # Atmospheric refraction correction term
+    r = refraction.sg2(np.asanyarray(solar_elevation_deg), pressure, temperature)
+
+    return {
+        "elevation": solar_elevation_deg,
+        "apparent_elevation": solar_elevation_deg + r,
+        "zenith": 90 - solar_elevation_deg,
+        "apparent_zenith": 90 - solar_elevation_deg - r,
+        "azimuth": np.rad2deg(solar_azimuth),
+    }
+
+
+def sg2(
+    jd_ut,
+    latitude,
+    longitude=None,
+    elevation=0,
+    *,
+    pressure=101325,
+    temperature=12,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the SG2 algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.sg2`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms, including
+        ``elevation``, ``pressure``, and ``temperature``. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    elevation : array-like, default : 0
+        Altitude of the location of interest. [m]
+    pressure : array-like, default : 101325
+        Annual average air pressure. [Pa]
+    temperature : array-like, default : 12
+        Annual average air temperature. [°C]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``,
+        ``'apparent_elevation'``, ``'zenith'``, ``'apparent_zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raises an error if any date is outside the years 1980 to 2030.
+
+    See Also
+    --------
+    solposx.solarposition.sg2
+    sg2_geocentric
+    sg2_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.sg2(
+            jd_ut,
+            latitude,
+            longitude,
+            elevation,
+            pressure=pressure,
+            temperature=temperature,
+            dtype=dtype,
+        )
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"pressure": pressure, "temperature": temperature, "dtype": dtype}
+        return workspace._evaluate(
+            sg2, (jd_ut, latitude, longitude, elevation), kwargs, out
+        )
+    ephemeris = sg2_geocentric(jd_ut, dtype=dtype)
+    result = sg2_topocentric(
+        ephemeris,
+        latitude,
+        longitude,
+        elevation,
+        pressure=pressure,
+        temperature=temperature,
+    )
+    return _finish(result, out)
@@ -0,0 +1,282 @@
+"""USNO solar position kernel operating on NumPy arrays."""
+
+import numpy as np
+from pvlib.tools import sind, cosd, tand, asind
+from solposx.site import _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _calculate_deltat,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+
+def usno_geocentric(jd_ut, *, delta_t=67.0, gmst_option=1, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the USNO algorithm.
+
+    Location-independent stage of :py:func:`usno`, see
+    :py:func:`usno_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    delta_t : numeric, default : 67.0
+        Difference between terrestrial time and UT1. If ``delta_t`` is None,
+        uses :py:func:`pvlib.spa.calculate_deltat`. [seconds]
+    gmst_option : int, default : 1
+        Different ways of calculating the Greenwich mean sidereal time.
+        `gmst_option` needs to be either 1 or 2.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'`` and
+        ``'greenwich_hour_angle'``. [degrees]
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    JD = time.julian_date
+
+    if delta_t is None:
+        delta_t = _calculate_deltat(time)
+
+    # days since J2000.0, re-based before the conversion to dtype
+    D = _as_dtype(JD - 2451545.0, dtype)
+
+    # Mean anomaly of the Sun [deg]
+    g = 357.529 + 0.98560028 * D
+    # ensure g is between 0 and 360
+    g = g % 360
+
+    # Mean longitude of the Sun [deg]
+    q = 280.459 + 0.98564736 * D
+    # ensure q is between 0 and 360
+    q = q % 360
+
+    # Geocentric apparent ecliptic longitude of the Sun
+    # (adjusted for aberration) [deg]
+    L = q + 1.915 * sind(g) + 0.020 * sind(2 * g)
+    # ensure L is between 0 and 360
+    L = L % 360
+
+    # Mean obliquity of the ecliptic [deg]
+    e = 23.439 - 0.00000036 * D
+
+    # Sun's right ascension angle [hours]
+    RA = np.rad2deg(np.arctan2(cosd(e) * sind(L), cosd(L))) / 15
+    RA = RA % 24
+
+    # Sun's declination angle [deg]
+    d = asind(sind(e) * sind(L))
+
+    # JD_0 is the Julian date of the previous midnight (0h) UT1
+    JD_0 = time.days + 2440587.5
+
+    # Hours of UT1 elapsed since the previous midnight
+    H = _as_dtype((JD - JD_0) * 24, dtype)
+
+    DAY_UT = _as_dtype(JD_0 - 2451545.0, dtype)
+
+    JD_TT = JD + delta_t / 86400.0
+
+    D_TT = _as_dtype(JD_TT - 2451545.0, dtype)
+
+    T = D_TT / 36525  # centuries since the year 2000
+
+    # Greenwich mean sidereal time [hours]
+    if gmst_option == 1:
+        GMST = (
+            6.697375
+            + 0.065707485828 * DAY_UT
+            + 1.0027379 * H
+            + 0.0854103 * T
+            + 0.0000258 * T**2
+        )
+    elif gmst_option == 2:
+        GMST = 6.697375 + 0.065709824279 * DAY_UT + 1.0027379 * H + 0.0000258 * T**2
+    else:
+        raise ValueError(f"{gmst_option} is not a valid `gmst_option`")
+
+    GMST = GMST % 24
+
+    # Longitude of the ascending node of the Moon [deg]
+    omega = 125.04 - 0.052954 * D_TT
+
+    # Mean Longitude of the Sun [deg]
+    LS = 280.47 + 0.98565 * D_TT
+
+    # Nutation in longitude [hours]
+    longitude_nutation = -0.000319 * sind(omega) - 0.000024 * sind(2 * LS)
+
+    # obliquity of the ecliptic
+    epsilon = 23.4393 - 0.0000004 * D_TT
+
+    # equation of equinoxes [hours]
+    eqeq = longitude_nutation * cosd(epsilon)
+
+    # Greenwich apparent sidereal time [hours]
+    GAST = GMST + eqeq
+
+    return {
+        "declination": d,
+        "greenwich_hour_angle": (GAST - RA) * 15,
+    }
+
+
+def usno_topocentric(ephemeris, latitude, longitude=None):
+    """
+    Calculate the solar position from the USNO geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`usno`, see
+    :py:func:`usno_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`usno_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    d = ephemeris["declination"]
+    latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    # Local hour angle [deg], logitude is positive if it is east
+    LHA = ephemeris["greenwich_hour_angle"] + longitude
+
+    # solar elevation [deg]
+    elevation = asind(
+        _clip_unit(cosd(LHA) * cosd(d) * cos_latitude + sind(d) * sin_latitude)
+    )
+
+    # azimuth [deg]
+    azimuth = np.rad2deg(
+        np.arctan2(-sind(LHA), (tand(d) * cos_latitude - sin_latitude * cosd(LHA)))
+    )
+    azimuth = azimuth % 360
+
+    return {
+        "elevation": elevation,
+        "zenith": 90 - elevation,
+        "azimuth": azimuth,
+    }
+
+
+def usno(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    delta_t=67.0,
+    gmst_option=1,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the USNO algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.usno`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    delta_t : numeric, default : 67.0
+        Difference between terrestrial time and UT1. If ``delta_t`` is None,
+        uses :py:func:`pvlib.spa.calculate_deltat`. [seconds]
+    gmst_option : int, default : 1
+        Different ways of calculating the Greenwich mean sidereal time.
+        `gmst_option` needs to be either 1 or 2.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.usno
+    usno_geocentric
+    usno_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.usno(
+            jd_ut,
+            latitude,
+            longitude,
+            delta_t=delta_t,
+            gmst_option=gmst_option,
+            dtype=dtype,
+        )
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"delta_t": delta_t, "gmst_option": gmst_option, "dtype": dtype}
+        return workspace._evaluate(usno, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = usno_geocentric(
+        jd_ut, delta_t=delta_t, gmst_option=gmst_option, dtype=dtype
+    )
+    result = usno_topocentric(ephemeris, latitude, longitude)
+    return _finish(result, out)
@@ -0,0 +1,252 @@
+"""Walraven solar position kernel operating on NumPy arrays."""
+
+import numpy as np
+from solposx.site import _location_terms
+from solposx.kernels.backend import _numba_kernels
+from solposx.kernels.workspace import _finish
+from solposx.tools import (
+    _as_dtype,
+    _clip_unit,
+    _float_dtype,
+    _julian_date_to_time_bundle,
+)
+
+
+def _walraven_days(time):
+    """Return the days and whole years since 1980 of the Walraven algorithm."""
+    T = time.hour
+
+    delta = time.year - 1980
+
+    leap = (delta / 4.0).astype(np.int64)  # round towards zero
+
+    days = delta * 365 + leap + time.dayofyear - 1 + T / 24
+
+    days = np.where(delta == (leap * 4), days - 1, days)
+
+    days = np.where((delta < 0) & (delta != (leap * 4)), days - 1, days)
+
+    return days, delta
+
+
+def walraven_geocentric(jd_ut, *, dtype=np.float64):
+    """
+    Calculate the geocentric solar ephemeris of the Walraven algorithm.
+
+    Location-independent stage of :py:func:`walraven`, see
+    :py:func:`walraven_topocentric`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'declination'``,
+        ``'right_ascension'``, ``'sidereal_time'``, and ``'solar_time'``, the
+        hour of the UTC day as an angle. [radians]
+    """
+    dtype = _float_dtype(dtype)
+    time = _julian_date_to_time_bundle(jd_ut)
+    T = time.hour
+
+    time, delta = _walraven_days(time)
+
+    # days since 1980, re-based before the conversion to dtype
+    time = _as_dtype(time, dtype)
+    delta = _as_dtype(delta, dtype)
+
+    # [rad]
+    theta = 2 * np.pi * time / 365.25
+
+    # [rad]
+    g = -0.031271 - 4.53963 * 10**-7 * time + theta
+
+    # longitude of the sun [rad]
+    L = (
+        4.900968
+        + (3.67474 * 10**-7) * time
+        + (0.033434 - 2.3 * 10**-9 * time) * np.sin(g)
+        + 0.000349 * np.sin(2 * g)
+        + theta
+    )
+
+    # angle between the plane of the ecliptic and the plane of the
+    # celestial equator [rad]
+    epsilon = (
+        _as_dtype(np.deg2rad(23.4420), dtype)
+        - _as_dtype(np.deg2rad(3.56 * 10**-7), dtype) * time
+    )
+
+    SEL = np.sin(L)
+
+    A1 = SEL * np.cos(epsilon)
+
+    A2 = np.cos(L)
+
+    # right angle [rad]
+    RA = np.arctan2(A1, A2)
+    RA = np.where(RA < 0, RA + 2 * np.pi, RA)
+
+    # declination [rad]
+    DECL = np.arcsin(SEL * np.sin(epsilon))
+
+    # sidereal time [rad]
+    ST = 1.759335 + 2 * np.pi * (time / 365.25 - delta) + 3.694 * 10**-7 * time
+    ST = np.where(ST >= (2 * np.pi), ST - 2 * np.pi, ST)
+
+    return {
+        "declination": DECL,
+        "right_ascension": RA,
+        "sidereal_time": ST,
+        "solar_time": np.deg2rad(_as_dtype(T, dtype) * 15),
+    }
+
+
+def walraven_topocentric(ephemeris, latitude, longitude=None):
+    """
+    Calculate the solar position from the Walraven geocentric ephemeris.
+
+    Location-dependent stage of :py:func:`walraven`, see
+    :py:func:`walraven_geocentric`. The calculation uses the floating-point
+    precision of ``ephemeris``.
+
+    Parameters
+    ----------
+    ephemeris : dict
+        Geocentric ephemeris returned by :py:func:`walraven_geocentric`.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+    """
+    DECL = ephemeris["declination"]
+    RA = ephemeris["right_ascension"]
+    ST = ephemeris["sidereal_time"]
+    _, longitude, sin_phi, cos_phi = _location_terms(
+        latitude, longitude, np.result_type(*ephemeris.values())
+    )
+
+    longitude = -np.asanyarray(longitude)  # outdated convention used by Walraven
+
+    # local sidereal time [rad]
+    S = ST - np.deg2rad(longitude) + ephemeris["solar_time"]
+    S = np.where(S >= (2 * np.pi), S - 2 * np.pi, S)
+
+    # hour angle [rad]
+    H = RA - S
+
+    # elevation [rad]
+    E = np.arcsin(
+        _clip_unit(sin_phi * np.sin(DECL) + cos_phi * np.cos(DECL) * np.cos(H))
+    )
+
+    # azimuth [deg]
+    A = np.rad2deg(np.arcsin(_clip_unit(np.cos(DECL) * np.sin(H) / np.cos(E))))
+
+    # azimuth quadrant assignment - Spencer (1989) correct for all longitudes
+    cos_az = np.sin(DECL) - np.sin(E) * sin_phi
+    A = np.where((cos_az >= 0) & (np.sin(np.deg2rad(A)) < 0), 360 + A, A)
+    A = np.where(cos_az < 0, 180 - A, A)
+
+    return {
+        "elevation": np.rad2deg(E),
+        "zenith": 90 - np.rad2deg(E),
+        "azimuth": A,
+    }
+
+
+def walraven(
+    jd_ut,
+    latitude,
+    longitude=None,
+    *,
+    dtype=np.float64,
+    out=None,
+    workspace=None,
+    backend="numpy",
+):
+    """
+    Calculate solar position using the Walraven algorithm.
+
+    Array kernel of :py:func:`solposx.solarposition.walraven`.
+
+    Parameters
+    ----------
+    jd_ut : array-like, tuple of two array-like, or TimeBundle
+        Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, e.g., whole
+        days and fraction of day, retains the full time resolution.
+        A :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+        [days]
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. A :py:class:`~solposx.Site` or :py:class:`~solposx.Fleet`
+        provides the location and its precomputed terms. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. In single precision, the Julian dates are re-based
+        to J2000.0 and split into whole days and fraction of day before the
+        conversion, such that the time resolution is retained.
+    out : dict of numpy.ndarray, optional
+        Arrays to write the results into, keyed by output quantity, e.g.,
+        ``{'zenith': np.empty(n)}``. Only the quantities in ``out`` are
+        returned.
+    workspace : Workspace, optional
+        Memory bound of the temporary arrays of the calculation, see
+        :py:class:`~solposx.kernels.Workspace`. The calculation is split into
+        blocks of timestamps, whose results are written into ``out``, such
+        that no memory proportional to the batch is allocated.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. The
+        numba backend evaluates the algorithm in compiled, parallel loops
+        without temporary arrays. It calculates in double precision, where
+        ``dtype`` only sets the data type of the results, and does not use
+        ``workspace``. If numba is not installed, the calculation falls back
+        to NumPy with a warning.
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.walraven
+    walraven_geocentric
+    walraven_topocentric
+    """
+    compiled = _numba_kernels(backend)
+    if compiled is not None:
+        result = compiled.walraven(jd_ut, latitude, longitude, dtype=dtype)
+        return _finish(result, out)
+    if workspace is not None:
+        kwargs = {"dtype": dtype}
+        return workspace._evaluate(walraven, (jd_ut, latitude, longitude), kwargs, out)
+    ephemeris = walraven_geocentric(jd_ut, dtype=dtype)
+    result = walraven_topocentric(ephemeris, latitude, longitude)
+    return _finish(result, out)
@@ -0,0 +1,116 @@
+"""Bounded evaluation of the array kernels into caller-owned arrays."""
+
+import math
+
+import numpy as np
+from solposx.tools import _BYTES_PER_ELEMENT, _chunk, _shape
+
+
+class Workspace:
+    """
+    Memory bound of the temporary arrays of the array kernels.
+
+    The kernels in :py:mod:`solposx.kernels` evaluate the equations of the
+    algorithms as NumPy expressions, each of which allocates a temporary
+    array of the size of the batch. With a Workspace, a kernel is evaluated
+    in blocks of timestamps whose temporary arrays stay within
+    ``max_memory``, and the results of each block are written into the
+    ``out`` arrays of the caller. The temporary arrays of a block are small
+    enough to stay in the CPU cache, and the allocator reuses their memory
+    for the next block. Thus, repeated calls on large batches of the same
+    shape, e.g., in a control loop, neither allocate memory proportional to
+    the batch nor touch fresh pages. In ``benchmarks/workspace.py``, this
+    makes calls on 10^5 to 10^6 timestamps 5 to 25 % faster, whereas calls
+    on batches within one block are about 5 % slower.
+
+    The results are identical to those of a call without a Workspace. A
+    Workspace holds no arrays and can be shared between threads.
+
+    Parameters
+    ----------
+    max_memory : int, default : 4194304
+        Memory budget for the temporary arrays of a block. [bytes]
+
+    Examples
+    --------
+    >>> workspace = Workspace()
+    >>> site = Site(45, 10)
+    >>> offsets = np.arange(86400) / 86400  # the next day in steps of 1 s
+    >>> jd = np.empty(86400)
+    >>> out = {'zenith': np.empty(86400), 'azimuth': np.empty(86400)}
+    >>> while True:
+    ...     np.add(offsets, time.time() / 86400 + 2440587.5, out=jd)
+    ...     noaa(jd, site, out=out, workspace=workspace)
+    """
+
+    def __init__(self, max_memory=2**22):
+        self.max_memory = max_memory
+
+    def __repr__(self):
+        return f"Workspace(max_memory={self.max_memory})"
+
+    def _evaluate(self, kernel, args, kwargs, out=None):
+        """
+        Evaluate ``kernel`` block by block along the first axis of the
+        broadcast shape of its arguments.
+        """
+        jd_ut, *args = (_as_array(value) for value in args)
+        kwargs = {name: _as_array(value) for name, value in kwargs.items()}
+        # the parts of a two-part Julian date are split separately
+        parts = jd_ut if isinstance(jd_ut, tuple) else (jd_ut,)
+        values = (*parts, *args, *kwargs.values())
+        shape = np.broadcast_shapes(*(_shape(value) for value in values))
+        size = shape[0] if shape else 1
+        row_bytes = _BYTES_PER_ELEMENT * max(1, math.prod(shape) // max(1, size))
+        block = max(1, int(self.max_memory) // row_bytes)
+        if size <= block:
+            return _finish(kernel(jd_ut, *args, **kwargs), out)
+        outputs = out
+        for start in range(0, size, block):
+            key = slice(start, start + block)
+            jd_block = tuple(_chunk(part, key, shape) for part in parts)
+            result = kernel(
+                jd_block if isinstance(jd_ut, tuple) else jd_block[0],
+                *(_chunk(value, key, shape) for value in args),
+                **{name: _chunk(value, key, shape) for name, value in kwargs.items()},
+            )
+            if outputs is None:
+                outputs = {
+                    name: np.empty(shape, dtype=value.dtype)
+                    for name, value in result.items()
+                }
+            for name, array in outputs.items():
+                _check_output(name, result)
+                np.copyto(array[key], result[name])
+        return dict(outputs)
+
+
+def _as_array(value):
+    """Return lists as arrays and the parts of a two-part Julian date."""
+    if isinstance(value, list):
+        return np.asarray(value)
+    if isinstance(value, tuple):
+        return tuple(_as_array(part) for part in value)
+    return value
+
+
+def _check_output(name, result):
+    """Raise a ValueError if ``name`` is not an output of a kernel."""
+    if name not in result:
+        raise ValueError(
+            f"Unknown output: {name}. Available options are: {list(result)}."
+        )
+
+
+def _finish(result, out=None):
+    """
+    Return the results of a kernel, written into ``out`` if specified.
+
+    Only the quantities in ``out`` are returned.
+    """
+    if out is None:
+        return result
+    for name, array in out.items():
+        _check_output(name, result)
+        np.copyto(array, result[name])
+    return dict(out)
@@ -0,0 +1,340 @@
+"""Parallel calculation of the solar position in threads and processes."""
+
+import inspect
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from solposx import kernels, solarposition
+from solposx.site import Fleet
+from solposx.solarposition.geocentric import _get_stages
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _shape,
+    _solpos_output,
+    _to_time_bundle,
+)
+
+
+def compute(
+    algorithm,
+    times,
+    latitude,
+    longitude=None,
+    *,
+    n_threads=None,
+    chunksize=None,
+    output="dataframe",
+    **kwargs,
+):
+    """
+    Calculate the solar position in parallel using a pool of threads.
+
+    The calculations of the algorithms are NumPy operations, which release
+    the global interpreter lock. Thus, the timestamps, or the sites if there
+    are more sites than timestamps, are split into chunks that are
+    calculated concurrently in a thread pool. The results of the chunks are
+    written directly into the output arrays. Since the calculations are
+    element-wise, the results are identical to those of the corresponding
+    function in :py:mod:`solposx.solarposition`.
+
+    Parameters
+    ----------
+    algorithm : str
+        Solar position algorithm. Can be one of ``'iqbal'``,
+        ``'michalsky'``, ``'noaa'``, ``'psa'``, ``'sg2'``, ``'usno'``, or
+        ``'walraven'``.
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+        Timestamps - must be localized. Arrays of ``numpy.datetime64`` or
+        int64 nanoseconds since 1970-01-01 are interpreted as UTC.
+    latitude : float, array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. Broadcast against the timestamps as in the functions in
+        :py:mod:`solposx.solarposition`. [degrees]
+    longitude : float or array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    n_threads : int, optional
+        Number of threads. The default is the number of CPUs.
+    chunksize : int, optional
+        Number of timestamps, or sites, per chunk. By default, the
+        calculation is split into one chunk per thread.
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame).
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t`` or ``dtype``.
+
+    Returns
+    -------
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        Solar position as returned by the corresponding function in
+        :py:mod:`solposx.solarposition`.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, or if
+        ``n_threads`` or ``chunksize`` is less than 1.
+
+    Examples
+    --------
+    >>> times = pd.date_range('2020', '2021', freq='1min', tz='UTC')
+    >>> solpos = compute('sg2', times, 45, 10, n_threads=8)
+    """
+    _get_stages(algorithm)  # raises an error for unknown algorithms
+    kernel = getattr(kernels, algorithm)
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be at least 1, got {n_threads}.")
+
+    # further site parameters of the kernel after longitude, e.g., elevation
+    parameters = list(inspect.signature(kernel).parameters.values())[3:]
+    site_params = [latitude, longitude] + [
+        kwargs.pop(parameter.name, parameter.default)
+        for parameter in parameters
+        if parameter.kind is parameter.POSITIONAL_OR_KEYWORD
+    ]
+    time = _to_time_bundle(times)
+    time, site_params, index = _broadcast_sites(time, *site_params)
+
+    shape = np.broadcast_shapes(
+        *(_shape(value) for value in (time, *site_params, *kwargs.values()))
+    )
+    # split the longer axis of times and sites
+    axis = 1 if len(shape) == 2 and shape[1] > shape[0] else 0
+    if chunksize is None:
+        chunksize = max(1, math.ceil(shape[axis] / n_threads))
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        result = _evaluate_in_chunks(
+            kernel,
+            (time, *site_params),
+            kwargs,
+            chunksize,
+            axis=axis,
+            executor=executor,
+        )
+    return _solpos_output(result, index, output)
+
+
+# solar position functions accepting a Fleet
+_FLEET_ALGORITHMS = (
+    "iqbal",
+    "michalsky",
+    "noaa",
+    "psa",
+    "sg2",
+    "sg2_c",
+    "skyfield",
+    "spa",
+    "usno",
+    "walraven",
+)
+
+# state of a worker process of run_fleet, set by _init_worker
+_worker = {}
+
+
+class _SharedBlock:
+    """
+    Owner of a shared memory block, exposed as an array.
+
+    The arrays viewing the block refer to its owner, such that the block is
+    released once the last array viewing it is deleted.
+    """
+
+    def __init__(self, shared_memory, shape, dtype):
+        self._shared_memory = shared_memory
+        address = np.frombuffer(shared_memory.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "shape": shape,
+            "typestr": np.dtype(dtype).str,
+            "data": (address, False),
+            "version": 3,
+        }
+
+
+def _init_worker(name, shape, dtype, algorithm, time, fleet, columns, kwargs):
+    """Attach a worker process to the shared output block."""
+    _worker.update(
+        out=np.asarray(_SharedBlock(SharedMemory(name=name), shape, dtype)),
+        algorithm=getattr(solarposition, algorithm),
+        time=time,
+        fleet=fleet,
+        columns=columns,
+        kwargs=kwargs,
+    )
+
+
+def _run_chunk(sites):
+    """Calculate the solar position of a chunk of sites in a worker."""
+    out = _worker["out"]
+    result = _worker["algorithm"](
+        _worker["time"], _worker["fleet"][sites], output="dict", **_worker["kwargs"]
+    )
+    for i, column in enumerate(_worker["columns"]):
+        out[i, :, sites] = np.reshape(result[column], (out.shape[1], -1))
+
+
+def run_fleet(
+    algorithm,
+    times,
+    latitude,
+    longitude=None,
+    *,
+    columns=("zenith", "azimuth"),
+    n_workers=None,
+    chunksize=None,
+    mp_context=None,
+    **kwargs,
+):
+    """
+    Calculate the solar position of a fleet of sites in a pool of processes.
+
+    The sites are split into chunks, which are scheduled to the worker
+    processes as they become available. In contrast to
+    :py:func:`compute`, the Python parts of the algorithms, e.g., the pandas
+    accessors and the calculations of :py:func:`~solposx.solarposition.spa`
+    and :py:func:`~solposx.solarposition.skyfield`, also run in parallel. The
+    workers write the results directly into a
+    :py:class:`multiprocessing.shared_memory.SharedMemory` block, such that
+    the results are never sent back to the calling process.
+
+    Parameters
+    ----------
+    algorithm : str
+        Solar position algorithm. Can be one of ``'iqbal'``,
+        ``'michalsky'``, ``'noaa'``, ``'psa'``, ``'sg2'``, ``'sg2_c'``,
+        ``'skyfield'``, ``'spa'``, ``'usno'``, or ``'walraven'``.
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+        N timestamps - must be localized. Arrays of ``numpy.datetime64`` or
+        int64 nanoseconds since 1970-01-01 are interpreted as UTC.
+    latitude : array-like or Fleet
+        Latitude in decimal degrees of M sites. Positive north of equator,
+        negative to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees of the sites. Positive east of prime
+        meridian, negative to west. Omitted if ``latitude`` is a Fleet.
+        [degrees]
+    columns : sequence of str, default : ('zenith', 'azimuth')
+        Output quantities, i.e., column names of the solar position
+        function of ``algorithm``.
+    n_workers : int, optional
+        Number of worker processes. The default is the number of CPUs.
+    chunksize : int, optional
+        Number of sites per chunk. Smaller chunks balance the load between
+        the workers, larger chunks reduce the overhead of scheduling. By
+        default, each worker receives four chunks.
+    mp_context : multiprocessing context, optional
+        Context used to start the worker processes, e.g.,
+        ``multiprocessing.get_context('spawn')``. The default is the
+        ``'forkserver'`` context where available, because forking a process
+        that runs threads, e.g., of the numba backend, can deadlock.
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t``. ``elevation``,
+        ``pressure``, and ``temperature`` are per-site parameters of the
+        Fleet unless ``latitude`` is a Fleet.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (len(columns), N, M) viewing the shared memory
+        block. The block is released when the array and all views of it are
+        deleted.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if a
+        column is not calculated by the algorithm, or if ``n_workers`` or
+        ``chunksize`` is less than 1.
+
+    See Also
+    --------
+    compute
+
+    Examples
+    --------
+    >>> fleet = Fleet(np.random.uniform(-60, 60, 1_000), 10)
+    >>> times = pd.date_range('2020', '2021', freq='1h', tz='UTC')
+    >>> zenith, azimuth = run_fleet('spa', times, fleet, n_workers=8)
+    """
+    if algorithm not in _FLEET_ALGORITHMS:
+        raise ValueError(
+            f"Unknown algorithm: {algorithm}. "
+            f"Available options are: {list(_FLEET_ALGORITHMS)}."
+        )
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be at least 1, got {n_workers}.")
+    if not isinstance(latitude, Fleet):
+        site_params = {
+            name: kwargs.pop(name)
+            for name in ("elevation", "pressure", "temperature")
+            if name in kwargs
+        }
+        latitude = Fleet(latitude, longitude, **site_params)
+    fleet = latitude
+    if mp_context is None and "forkserver" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("forkserver")
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(fleet) / (4 * n_workers)))
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}.")
+    time = _to_time_bundle(times)
+    n_times = len(time.days)
+
+    # the output data type and the columns are validated with a single
+    # timestamp and site
+    probe = getattr(solarposition, algorithm)(
+        time._rows(slice(0, 1)), fleet[0:1], output="dict", **kwargs
+    )
+    for column in columns:
+        if column not in probe:
+            raise ValueError(
+                f"Unknown column: {column}. Available options for "
+                f"{algorithm} are: {list(probe)}."
+            )
+    dtype = np.result_type(*(probe[column] for column in columns))
+    shape = (len(columns), n_times, len(fleet))
+
+    shared_memory = SharedMemory(
+        create=True, size=max(1, math.prod(shape) * dtype.itemsize)
+    )
+    try:
+        initargs = (
+            shared_memory.name,
+            shape,
+            dtype,
+            algorithm,
+            time,
+            fleet,
+            tuple(columns),
+            kwargs,
+        )
+        chunks = [
+            slice(start, start + chunksize) for start in range(0, len(fleet), chunksize)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=initargs,
+        ) as executor:
+            # raises the first error of the workers, if any
+            for _ in executor.map(_run_chunk, chunks):
+                pass
+    finally:
+        # the block is removed once it is no longer mapped
+        shared_memory.unlink()
+    return np.asarray(_SharedBlock(shared_memory, shape, dtype))
@@ -0,0 +1,209 @@
+"""Solar position of latitude/longitude rasters in memory-bounded tiles."""
+
+import inspect
+import os
+
+import numpy as np
+from solposx.site import Fleet
+from solposx.solarposition.geocentric import _get_stages
+from solposx.tools import _to_time_bundle
+
+# upper bound of the peak memory of the topocentric stages per element of a
+# tile, i.e., per combination of timestamp and pixel, as in solposx.tools.
+# The stages allocate up to 224 bytes per element (sg2 in double precision).
+# [bytes]
+_BYTES_PER_ELEMENT = 384
+
+_SITE_PARAMETERS = ("elevation", "pressure", "temperature")
+
+
+def _tile_shape(n_times, shape, max_memory):
+    """Return the shape (times, rows, columns) of tiles within max_memory."""
+    elements = max(1, int(max_memory) // _BYTES_PER_ELEMENT)
+    columns = min(shape[1], elements)
+    rows = min(shape[0], max(1, elements // columns))
+    times = min(n_times, max(1, elements // (rows * columns)))
+    return times, rows, columns
+
+
+def _output_arrays(columns, shape, out, path, dtype):
+    """Return a dictionary of output arrays of the given shape."""
+    if out is not None:
+        for name, array in out.items():
+            if np.shape(array) != shape:
+                raise ValueError(
+                    f"The output array for '{name}' must have shape {shape}, "
+                    f"got {np.shape(array)}."
+                )
+        return dict(out)
+    if path is not None:
+        return {
+            name: np.lib.format.open_memmap(
+                os.path.join(path, f"{name}.npy"),
+                mode="w+",
+                dtype=dtype,
+                shape=shape,
+            )
+            for name in columns
+        }
+    return {name: np.empty(shape, dtype=dtype) for name in columns}
+
+
+def grid(
+    times,
+    latitude,
+    longitude,
+    algorithm="noaa",
+    *,
+    columns=("zenith", "azimuth"),
+    out=None,
+    path=None,
+    dtype=np.float64,
+    max_memory=2**28,
+    **kwargs,
+):
+    """
+    Calculate the solar position for a raster of locations.
+
+    The raster is processed in tiles of timestamps, rows, and columns, such
+    that the temporary arrays of the calculation stay within ``max_memory``
+    regardless of the size of the raster. The location-independent part of
+    the algorithm is calculated once for all timestamps (see
+    :py:func:`~solposx.solarposition.geocentric`), and the location-dependent
+    terms of each spatial tile are calculated once for all timestamps (see
+    :py:class:`~solposx.Fleet`). The results are written tile by tile into
+    the output arrays, which can be memory-mapped files.
+
+    Parameters
+    ----------
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+        N timestamps - must be localized. Arrays of ``numpy.datetime64`` or
+        int64 nanoseconds since 1970-01-01 are interpreted as UTC.
+    latitude : array-like
+        Latitude in decimal degrees of the rows of a regular raster, shape
+        (H,), or of each pixel, shape (H, W). Positive north of equator,
+        negative to south. [degrees]
+    longitude : array-like
+        Longitude in decimal degrees of the columns of a regular raster,
+        shape (W,), or of each pixel, shape (H, W). Positive east of prime
+        meridian, negative to west. [degrees]
+    algorithm : str, default : 'noaa'
+        Solar position algorithm. Can be one of ``'iqbal'``,
+        ``'michalsky'``, ``'noaa'``, ``'psa'``, ``'sg2'``, ``'usno'``, or
+        ``'walraven'``.
+    columns : sequence of str, default : ('zenith', 'azimuth')
+        Output quantities, i.e., column names of the corresponding function
+        in :py:mod:`solposx.solarposition`. Ignored if ``out`` is specified.
+    out : dict of array-like, optional
+        Arrays of shape (N, H, W) to write the results into, keyed by the
+        output quantity. Any array supporting slice assignment can be used,
+        e.g., a ``numpy.memmap``.
+    path : str or path-like, optional
+        Directory in which to create a memory-mapped ``<column>.npy`` file
+        for each output quantity. If neither ``out`` nor ``path`` is
+        specified, the results are returned as in-memory arrays.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation and data type of the
+        created output arrays, ``numpy.float32`` or ``numpy.float64``.
+    max_memory : int, default : 268435456
+        Memory budget for the temporary arrays of a tile. [bytes]
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t``. ``elevation``,
+        ``pressure``, and ``temperature`` can be scalars or arrays
+        broadcastable to the raster shape (H, W).
+
+    Returns
+    -------
+    dict
+        Dictionary of arrays of shape (N, H, W), keyed by output quantity.
+        The arrays are those of ``out`` or the memory-mapped files if
+        specified.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if
+        ``latitude`` and ``longitude`` do not form a two-dimensional raster,
+        if an array in ``out`` has the wrong shape, or if a column is not
+        calculated by the algorithm.
+
+    See Also
+    --------
+    solposx.solarposition.geocentric
+    solposx.solarposition.topocentric
+
+    Examples
+    --------
+    >>> lats = np.linspace(60, 30, 3000)
+    >>> lons = np.linspace(-10, 20, 3000)
+    >>> times = pd.date_range('2020-06-21', freq='15min', periods=96, tz='UTC')
+    >>> solpos = grid(times, lats, lons, path='/data/solpos')
+    >>> solpos['zenith'].shape
+    (96, 3000, 3000)
+    """
+    geocentric_stage, topocentric_stage = _get_stages(algorithm)
+
+    latitude = np.asarray(latitude)
+    longitude = np.asarray(longitude)
+    if latitude.ndim == 1 and longitude.ndim == 1:
+        # regular raster of latitude rows and longitude columns
+        latitude = latitude[:, np.newaxis]
+    shape = np.broadcast_shapes(latitude.shape, longitude.shape)
+    if len(shape) != 2:
+        raise ValueError(
+            "latitude and longitude must be one-dimensional axes or "
+            f"two-dimensional arrays of a raster, got shape {shape}."
+        )
+    site_params = {
+        name: np.broadcast_to(kwargs.pop(name), shape)
+        for name in _SITE_PARAMETERS
+        if name in kwargs
+    }
+    site_params["latitude"] = np.broadcast_to(latitude, shape)
+    site_params["longitude"] = np.broadcast_to(longitude, shape)
+
+    # split the parameters between the stages of the algorithm
+    geocentric_names = list(inspect.signature(geocentric_stage).parameters)[1:]
+    geocentric_kwargs = {
+        name: kwargs.pop(name) for name in geocentric_names if name in kwargs
+    }
+
+    time = _to_time_bundle(times)
+    ephemeris = geocentric_stage(time, dtype=dtype, **geocentric_kwargs)
+    n_times = len(time.days)
+
+    outputs = _output_arrays(columns, (n_times, *shape), out, path, dtype)
+    tile = _tile_shape(n_times, shape, max_memory)
+
+    for row in range(0, shape[0], tile[1]):
+        rows = slice(row, row + tile[1])
+        for column in range(0, shape[1], tile[2]):
+            cols = slice(column, column + tile[2])
+            fleet = Fleet(
+                **{
+                    name: np.reshape(value[rows, cols], -1)
+                    for name, value in site_params.items()
+                }
+            )
+            tile_shape = site_params["latitude"][rows, cols].shape
+            for start in range(0, n_times, tile[0]):
+                steps = slice(start, start + tile[0])
+                terms = {
+                    name: value[steps, np.newaxis] for name, value in ephemeris.items()
+                }
+                result = topocentric_stage(terms, fleet, **kwargs)
+                for name, array in outputs.items():
+                    if name not in result:
+                        raise ValueError(
+                            f"Unknown column: {name}. Available options for "
+                            f"{algorithm} are: {list(result)}."
+                        )
+                    value = result[name]
+                    array[steps, rows, cols] = np.reshape(
+                        value, (len(value), *tile_shape)
+                    )
+
+    for array in outputs.values():
+        if isinstance(array, np.memmap):
+            array.flush()
+    return outputs
@@ -1,9 +1,10 @@
 """Archer refraction correction method."""
 
 from pvlib.tools import cosd, acosd
+from solposx.tools import _refraction_output, _refraction_params
 
 
-def archer(elevation):
+def archer(elevation, *, output=None):
     r"""
     Atmospheric refraction correction based on the Archer algorithm.
 
@@ -16,6 +17,10 @@ def archer(elevation):
     ----------
     elevation : array-like
         True solar elevation angle (not accounting for refraction). [degrees]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -45,6 +50,7 @@ def archer(elevation):
     .. [2] R. Walraven, "Calculating the position of the sun," Solar Energy,
        vol. 20, no. 5, pp. 393-397, 1978, :doi:`10.1016/0038-092X(78)90155-X`.
     """  # noqa: E501
+    (elevation,) = _refraction_params(output, elevation)
 
     zenith = 90 - elevation
     C1 = cosd(zenith)
@@ -53,4 +59,4 @@ def archer(elevation):
     apparent_zenith = acosd(C)
     refraction_correction = zenith - apparent_zenith
 
-    return refraction_correction
+    return _refraction_output(refraction_correction, output)
@@ -1,9 +1,10 @@
 """Bennett refraction model."""
 
 from pvlib.tools import tand
+from solposx.tools import _refraction_output, _refraction_params
 
 
-def bennett(elevation, pressure=101325.0, temperature=12.0):
+def bennett(elevation, pressure=101325.0, temperature=12.0, *, output=None):
     r"""
     Atmospheric refraction correction based on the Bennett algorithm.
 
@@ -18,6 +19,10 @@ def bennett(elevation, pressure=101325.0, temperature=12.0):
         Annual average atmospheric pressure. [Pascal]
     temperature : numeric, default 12
         Annual average air temperature. [C]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -41,6 +46,9 @@ def bennett(elevation, pressure=101325.0, temperature=12.0):
        navigation," Journal of Navigation, vol. 35, issue 2, pp. 255-259,
        1982, :doi:`10.1017/S0373463300022037`.
     """  # noqa: E501
+    elevation, pressure, temperature = _refraction_params(
+        output, elevation, pressure, temperature
+    )
 
     pressure = pressure / 100  # convert to hPa
 
@@ -48,4 +56,4 @@ def bennett(elevation, pressure=101325.0, temperature=12.0):
 
     d = r * (0.28 * pressure / (temperature + 273.0))
 
-    return d
+    return _refraction_output(d, output)
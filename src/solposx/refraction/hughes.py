@@ -1,9 +1,10 @@
 """Hughes refraction model."""
 
 import numpy as np
+from solposx.tools import _refraction_output, _refraction_params, _set_where
 
 
-def hughes(elevation, pressure=101325.0, temperature=12.0):
+def hughes(elevation, pressure=101325.0, temperature=12.0, *, output=None):
     r"""
     Atmospheric refraction correction based on the Hughes algorithm.
 
@@ -23,6 +24,10 @@ def hughes(elevation, pressure=101325.0, temperature=12.0):
     temperature : numeric, default 12
         Annual average temperature. The default in this code deviates from
         [1]_, which used 10 C. [C]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -51,21 +56,26 @@ def hughes(elevation, pressure=101325.0, temperature=12.0):
     .. [2] J. C. Zimmerman, "Sun-pointing programs and their accuracy,"
        SANDIA Technical Report SAND-81-0761, 1981, :doi:`10.2172/6377969`.
     """  # noqa: E501
+    elevation, pressure, temperature = _refraction_params(
+        output, elevation, pressure, temperature
+    )
     TanEl = np.tan(np.radians(elevation))
 
     Refract = 58.1 / TanEl - 0.070 / (TanEl**3) + 8.6e-05 / (TanEl**5)
 
     low_elevation_mask = (elevation > -0.575) & (elevation <= 5)
-    Refract[low_elevation_mask] = (
+    Refract = _set_where(
+        Refract,
+        low_elevation_mask,
         elevation
         * (-518.2 + elevation * (103.4 + elevation * (-12.79 + elevation * 0.711)))
-        + 1735
-    )[low_elevation_mask]
+        + 1735,
+    )
 
     negative_elevation_mask = elevation <= -0.575
-    Refract[negative_elevation_mask] = (-20.774 / TanEl)[negative_elevation_mask]
+    Refract = _set_where(Refract, negative_elevation_mask, -20.774 / TanEl)
 
     # Correct for temperature and pressure and convert to degrees
-    Refract *= (283 / (273.0 + temperature)) * (pressure / 101325.0) / 3600.0
+    Refract = Refract * ((283 / (273.0 + temperature)) * (pressure / 101325.0) / 3600.0)
 
-    return Refract
+    return _refraction_output(Refract, output)
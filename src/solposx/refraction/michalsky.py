@@ -1,7 +1,9 @@
 """Michalsky refraction model."""
 
+from solposx.tools import _refraction_output, _refraction_params, _set_where
 
-def michalsky(elevation):
+
+def michalsky(elevation, *, output=None):
     r"""
     Atmospheric refraction correction based on the Michalsky algorithm.
 
@@ -12,6 +14,10 @@ def michalsky(elevation):
     ----------
     elevation : array-like
         True solar elevation angle (not accounting for refraction). [degrees]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -34,6 +40,7 @@ def michalsky(elevation):
        approximate solar position (1950–2050)," Solar Energy, vol. 40, no. 3,
        pp. 227–235, 1988, :doi:`10.1016/0038-092x(88)90045-x`.
     """  # noqa: E501
+    (elevation,) = _refraction_params(output, elevation)
     # note that 3.51561 = 1013.2 mb / 288.2 deg C
     refraction_correction = (
         3.51561
@@ -41,6 +48,6 @@ def michalsky(elevation):
         / (1 + 0.505 * elevation + 0.0845 * elevation**2)
     )
 
-    refraction_correction[elevation < -0.56] = 0.56
+    refraction_correction = _set_where(refraction_correction, elevation < -0.56, 0.56)
 
-    return refraction_correction
+    return _refraction_output(refraction_correction, output)
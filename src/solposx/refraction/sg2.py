@@ -1,9 +1,10 @@
 """SG2 refraction model."""
 
 import numpy as np
+from solposx.tools import _refraction_output, _refraction_params, _set_where
 
 
-def sg2(elevation, pressure=101325.0, temperature=12.0):
+def sg2(elevation, pressure=101325.0, temperature=12.0, *, output=None):
     r"""
     Atmospheric refraction correction based on the algorithm in SG2.
 
@@ -18,6 +19,10 @@ def sg2(elevation, pressure=101325.0, temperature=12.0):
         Annual average atmospheric pressure. [Pascal]
     temperature : numeric, default 12
         Annual average air temperature. [C]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -45,6 +50,9 @@ def sg2(elevation, pressure=101325.0, temperature=12.0):
        Solar Energy, vol. 86, no. 10, pp. 3072-3083, 2012,
        :doi:`10.1016/j.solener.2012.07.018`
     """  # noqa: E501
+    elevation, pressure, temperature = _refraction_params(
+        output, elevation, pressure, temperature
+    )
 
     pressure = pressure / 100  # convert Pa to hPa
     elevation_rad = np.deg2rad(elevation)
@@ -57,10 +65,12 @@ def sg2(elevation, pressure=101325.0, temperature=12.0):
 
     # Apply correction term of Cornwall et al. (2011)
     low_elevation_mask = elevation_rad <= -0.01
-    refraction[low_elevation_mask] = (-1.005516 * 10**-4 / (np.tan(elevation_rad)))[
-        low_elevation_mask
-    ]
+    refraction = _set_where(
+        refraction,
+        low_elevation_mask,
+        -1.005516 * 10**-4 / (np.tan(elevation_rad)),
+    )
 
     refraction = refraction * pressure / 1010 * 283 / (273 + temperature)
 
-    return np.rad2deg(refraction)
+    return _refraction_output(np.rad2deg(refraction), output)
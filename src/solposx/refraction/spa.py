@@ -1,9 +1,17 @@
 """SPA refraction model."""
 
 import numpy as np
+from solposx.tools import _refraction_output, _refraction_params
 
 
-def spa(elevation, pressure=101325.0, temperature=12.0, *, refraction_limit=-0.5667):
+def spa(
+    elevation,
+    pressure=101325.0,
+    temperature=12.0,
+    *,
+    refraction_limit=-0.5667,
+    output=None,
+):
     r"""
     Atmospheric refraction correction from the SPA algorithm.
 
@@ -23,6 +31,10 @@ def spa(elevation, pressure=101325.0, temperature=12.0, *, refraction_limit=-0.5
         Solar elevation angle below which refraction is not applied, as the sun
         is assumed to be below horizon. Note that the sun diameter is added to
         this. [degrees]
+    output : str, optional
+        Type of the returned refraction angle. By default, it has the type of
+        ``elevation``, e.g., a pandas.Series. ``'ndarray'`` converts the
+        inputs to NumPy arrays, avoiding the overhead of pandas.
 
     Returns
     -------
@@ -46,6 +58,9 @@ def spa(elevation, pressure=101325.0, temperature=12.0, *, refraction_limit=-0.5
        Radiation Applications (Revised)," NREL Report No. TP-560-34302, pp. 55,
        2008, :doi:`10.2172/15003974`.
     """  # noqa: E501
+    elevation, pressure, temperature = _refraction_params(
+        output, elevation, pressure, temperature
+    )
     pressure = pressure / 100  # convert from Pa to hPa/mbar
     # switch sets elevation when the sun is below the horizon
     above_horizon = elevation >= (-0.26667 + refraction_limit)
@@ -57,4 +72,4 @@ def spa(elevation, pressure=101325.0, temperature=12.0, *, refraction_limit=-0.5
         / (60 * np.tan(np.radians(elevation + 10.3 / (elevation + 5.11))))
     ) * above_horizon
 
-    return refraction_correction
+    return _refraction_output(refraction_correction, output)
@@ -0,0 +1,990 @@
+"""
+Solar position of single timestamps in plain Python.
+
+The functions calculate the solar position of one timestamp and one site
+using only the :py:mod:`math` module and floats. They avoid the overhead of
+pandas and of NumPy arrays, which dominates the run time of the array
+functions for a single timestamp, e.g., in the control loop of a tracker.
+
+The equations of the algorithms are also compiled by the numba backend of
+the kernels, see :ref:`numba-backend`.
+"""
+
+import math
+
+from pvlib import spa as _spa
+from solposx.kernels.psa import _psa_coefficients
+from solposx.kernels.sg2 import _DELTA_T_PARAMS, _HELIOCENTRIC_LONGITUDE_PARAMS
+from solposx.site import _EQUATORIAL_RADIUS, _FLATTENING
+
+_DELTA_T_PERIODS = tuple(tuple(row) for row in _DELTA_T_PARAMS.tolist())
+
+_TWO_PI = 2 * math.pi
+
+# periodic terms of the heliocentric longitude of SG2 with the angular
+# frequency 2 pi f precomputed, which gives identical results [rad/day]
+_HELIOCENTRIC_LONGITUDE_TERMS = tuple(
+    (_TWO_PI * f_L, rho_L, phi_L)
+    for f_L, rho_L, phi_L in _HELIOCENTRIC_LONGITUDE_PARAMS.tolist()
+)
+# angular frequency of the nutation and obliquity terms of SG2 [rad/day]
+_SG2_OMEGA_NUTATION = _TWO_PI * (1 / 6791.164405)
+
+
+def _split_seconds(unix_seconds):
+    """Return the whole days and fraction of day since 1970-01-01 00:00 UTC."""
+    # NumPy scalars are converted, because their arithmetic is slower
+    unix_seconds = float(unix_seconds)
+    days = math.floor(unix_seconds / 86400)
+    return days, (unix_seconds - days * 86400) / 86400
+
+
+def _calendar(days):
+    """
+    Return the year, month, day of the month, and day of the year of
+    ``days`` since 1970-01-01, see :py:func:`solposx.tools.TimeBundle`.
+    """
+    z = days + 719468  # days since 0000-03-01
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    # day of the year starting on March 1st
+    day_of_march_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100
+    )
+    month_index = (5 * day_of_march_year + 2) // 153  # March is 0
+    day = day_of_march_year - (153 * month_index + 2) // 5 + 1
+    year = year_of_era + era * 400
+    if month_index >= 10:
+        return year + 1, month_index - 9, day, day_of_march_year - 305
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return year, month_index + 3, day, day_of_march_year + 60 + leap
+
+
+def _latitude_terms(latitude):
+    """Return the sine and cosine of the latitude."""
+    return math.sin(math.radians(latitude)), math.cos(math.radians(latitude))
+
+
+def _sind(x):
+    return math.sin(math.radians(x))
+
+
+def _cosd(x):
+    return math.cos(math.radians(x))
+
+
+def _tand(x):
+    return math.tan(math.radians(x))
+
+
+def _clip_unit(x):
+    """Clip the argument of an inverse sine or cosine to [-1, 1]."""
+    if x > 1:
+        return 1.0
+    if x < -1:
+        return -1.0
+    return x
+
+
+def _asind(x):
+    return math.degrees(math.asin(_clip_unit(x)))
+
+
+def _acosd(x):
+    return math.degrees(math.acos(_clip_unit(x)))
+
+
+def _iqbal_geocentric(dayofyear, hour):
+    day_angle = 2 * math.pi * (dayofyear - 1) / 365  # [radians]
+
+    # declination [degrees]
+    declination = (
+        +0.006918
+        - 0.399912 * math.cos(day_angle)
+        + 0.070257 * math.sin(day_angle)
+        - 0.006758 * math.cos(2 * day_angle)
+        + 0.000907 * math.sin(2 * day_angle)
+        - 0.002697 * math.cos(3 * day_angle)
+        + 0.00148 * math.sin(3 * day_angle)
+    ) * (180 / math.pi)
+
+    # equation of time [minutes]
+    eot = (
+        (
+            0.0000075
+            + 0.001868 * math.cos(day_angle)
+            - 0.032077 * math.sin(day_angle)
+            - 0.014615 * math.cos(2 * day_angle)
+            - 0.040849 * math.sin(2 * day_angle)
+        )
+        * 1440
+        / 2
+        / math.pi
+    )
+
+    return declination, (hour - 12) * 15 + eot / 4
+
+
+def _iqbal_topocentric(
+    declination, greenwich_hour_angle, longitude, sin_latitude, cos_latitude
+):
+    # hour angle [degrees]
+    hour_angle = greenwich_hour_angle + longitude
+
+    zenith = _acosd(
+        _sind(declination) * sin_latitude
+        + _cosd(declination) * cos_latitude * _cosd(hour_angle)
+    )
+
+    azimuth = (
+        math.degrees(
+            math.atan2(
+                _sind(hour_angle) * _cosd(declination),
+                _cosd(hour_angle) * sin_latitude * _cosd(declination)
+                - cos_latitude * _sind(declination),
+            )
+        )
+        + 180
+    )
+
+    return 90 - zenith, zenith, azimuth
+
+
+def iqbal(unix_seconds, latitude, longitude):
+    """
+    Calculate the solar position of a single timestamp using the Iqbal
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.iqbal`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+
+    Examples
+    --------
+    >>> zenith, azimuth = iqbal(time.time(), 45, 10)
+    """
+    days, fraction = _split_seconds(unix_seconds)
+    _, _, _, dayofyear = _calendar(days)
+    ephemeris = _iqbal_geocentric(dayofyear, fraction * 24)
+    _, zenith, azimuth = _iqbal_topocentric(
+        *ephemeris, longitude, *_latitude_terms(latitude)
+    )
+    return zenith, azimuth
+
+
+def _michalsky_geocentric(jd, hour):
+    # days since J2000.0
+    n = jd - 2451545.0
+
+    # L - mean longitude [degrees]
+    L = (280.460 + 0.9856474 * n) % 360
+
+    # g - mean anomaly [degrees]
+    g = (357.528 + 0.9856003 * n) % 360
+
+    # lam - ecliptic longitude [degrees]
+    lam = (L + 1.915 * _sind(g) + 0.02 * _sind(2 * g)) % 360
+
+    # ep - obliquity of the ecliptic [degrees]
+    ep = 23.439 - 0.0000004 * n
+
+    # ra - right ascension [degrees]
+    ra = math.degrees(math.atan2(_cosd(ep) * _sind(lam), _cosd(lam))) % 360
+
+    # dec - declination angle [degrees]
+    dec = _asind(_sind(ep) * _sind(lam))
+
+    # gmst - Greenwich mean sidereal time [hr]
+    gmst = (6.697375 + 0.0657098242 * n + hour) % 24
+
+    return dec, ra, gmst
+
+
+def _michalsky_topocentric(
+    dec, ra, gmst, longitude, sin_latitude, cos_latitude, spencer_correction
+):
+    # lmst - local mean sideral time [hr]
+    lmst = (gmst + longitude / 15) % 24
+
+    # ha - hour angle between -12 and 12 [hr]
+    ha = lmst - ra / 15
+    ha = (ha + 12) % 24 - 12
+
+    sin_dec, cos_dec = _sind(dec), _cosd(dec)
+
+    # el - solar elevation angle [degrees]
+    el = _asind(sin_dec * sin_latitude + cos_dec * cos_latitude * _cosd(15 * ha))
+
+    # az - azimuth [degrees]
+    az = _asind(-cos_dec * _sind(15 * ha) / _cosd(el))
+
+    if spencer_correction:
+        # Spencer correction for the azimuth quadrant assignment
+        cos_az = sin_dec - _sind(el) * sin_latitude
+        if cos_az >= 0 and _sind(az) < 0:
+            az = 360 + az
+        if cos_az < 0:
+            az = 180 - az
+    else:
+        # critical elevation, undefined where the ratio exceeds one
+        if sin_latitude != 0 and abs(sin_dec) <= abs(sin_latitude):
+            elc = math.degrees(math.asin(sin_dec / sin_latitude))
+        else:
+            elc = math.nan
+        # correct azimuth using critical elevation
+        if el >= elc:
+            az = 180 - az
+        if el <= elc and ha > 0:
+            az = az + 360
+        az = az % 360
+
+    # refraction correction, where 3.51561 = 1013.2 mb / 288.2 deg C
+    if el < -0.56:
+        r = 0.56
+    else:
+        r = (
+            3.51561
+            * (0.1594 + 0.0196 * el + 0.00002 * el**2)
+            / (1 + 0.505 * el + 0.0845 * el**2)
+        )
+
+    return el, el + r, 90 - el, 90 - (el + r), az
+
+
+def michalsky(
+    unix_seconds,
+    latitude,
+    longitude,
+    spencer_correction=True,
+    julian_date="original",
+):
+    """
+    Calculate the solar position of a single timestamp using the Michalsky
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.michalsky`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    spencer_correction : bool, default True
+        Applies the correction suggested by Spencer (1989) to the azimuth
+        quadrant assignment.
+    julian_date : str, default 'original'
+        Julian date calculation. Can be one of ``'original'`` or
+        ``'pandas'``.
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle, not corrected for refraction. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raised if ``julian_date`` is not one of the available options.
+    """
+    days, fraction = _split_seconds(unix_seconds)
+    hour = fraction * 24
+    if julian_date == "original":
+        year, _, _, dayofyear = _calendar(days)
+        delta = year - 1949
+        leap = math.floor(delta / 4)
+        jd = 2432916.5 + delta * 365 + leap + dayofyear + hour / 24
+    elif julian_date == "pandas":
+        jd = (days + 2440587.5) + fraction
+    else:
+        raise ValueError("`julian_date` has to be either `original` or `pandas`.")
+    ephemeris = _michalsky_geocentric(jd, hour)
+    _, _, zenith, _, azimuth = _michalsky_topocentric(
+        *ephemeris,
+        longitude,
+        *_latitude_terms(latitude),
+        spencer_correction,
+    )
+    return zenith, azimuth
+
+
+def _noaa_geocentric(julian_date, fraction):
+    # Julian centuries since J2000.0
+    jc = (julian_date - 2451545) / 36525
+
+    # [degrees]
+    mean_long = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360
+
+    mean_anom = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+
+    eccent_earth_orbit = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    sun_eq_ctr = (
+        _sind(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + _sind(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+        + _sind(3 * mean_anom) * 0.000289
+    )
+
+    sun_true_long = mean_long + sun_eq_ctr
+
+    sun_app_long = sun_true_long - 0.00569 - 0.00478 * _sind(125.04 - 1934.136 * jc)
+
+    mean_obliq_ecliptic = (
+        23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    )
+
+    obliq_corr = mean_obliq_ecliptic + 0.00256 * _cosd(125.04 - 1934.136 * jc)
+
+    sun_declin = _asind(_sind(obliq_corr) * _sind(sun_app_long))
+
+    var_y = _tand(obliq_corr / 2) ** 2
+
+    eot = 4 * math.degrees(
+        +var_y * _sind(2 * mean_long)
+        - 2 * eccent_earth_orbit * _sind(mean_anom)
+        + 4 * eccent_earth_orbit * var_y * _sind(mean_anom) * _cosd(2 * mean_long)
+        - 0.5 * (var_y**2) * _sind(4 * mean_long)
+        - 1.25 * (eccent_earth_orbit**2) * _sind(2 * mean_anom)
+    )
+
+    return sun_declin, fraction * 1440 + eot
+
+
+def _noaa_topocentric(
+    sun_declin, true_solar_time, longitude, sin_latitude, cos_latitude
+):
+    true_solar_time = (true_solar_time + 4 * longitude) % 1440
+    hour_angle = true_solar_time / 4 - 180
+
+    sin_declin = _sind(sun_declin)
+    zenith = _acosd(
+        sin_latitude * sin_declin + cos_latitude * _cosd(sun_declin) * _cosd(hour_angle)
+    )
+
+    # undefined at the zenith, where NumPy divides by zero
+    denominator = cos_latitude * _sind(zenith)
+    if denominator != 0:
+        cos_azimuth = (sin_latitude * _cosd(zenith) - sin_declin) / denominator
+    else:
+        cos_azimuth = math.nan
+    if hour_angle > 0:
+        azimuth = _acosd(cos_azimuth) + 180 % 360
+    else:
+        azimuth = (540 - _acosd(cos_azimuth)) % 360
+
+    elevation = 90 - zenith
+
+    # Hughes refraction model at 101325 Pa and 10 degrees C, which NOAA sets
+    # to 0 above 85 degrees
+    if elevation > 85:
+        refraction_correction = 0.0
+    else:
+        tan_el = _tand(elevation)
+        if elevation <= -0.575:
+            refraction_correction = -20.774 / tan_el
+        elif elevation <= 5:
+            refraction_correction = (
+                elevation
+                * (
+                    -518.2
+                    + elevation * (103.4 + elevation * (-12.79 + elevation * 0.711))
+                )
+                + 1735
+            )
+        else:
+            refraction_correction = (
+                58.1 / tan_el - 0.070 / (tan_el**3) + 8.6e-05 / (tan_el**5)
+            )
+        refraction_correction *= (283 / (273.0 + 10)) * (101325 / 101325.0) / 3600.0
+
+    return (
+        elevation,
+        elevation + refraction_correction,
+        zenith,
+        zenith - refraction_correction,
+        azimuth,
+    )
+
+
+def noaa(unix_seconds, latitude, longitude):
+    """
+    Calculate the solar position of a single timestamp using the NOAA
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.noaa`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle, not corrected for refraction. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+    """
+    days, fraction = _split_seconds(unix_seconds)
+    ephemeris = _noaa_geocentric((days + 2440587.5) + fraction, fraction)
+    # Allow for latitude of -90 and 90
+    latitude = min(max(latitude, -90 + 1e-6), 90 - 1e-6)
+    _, _, zenith, _, azimuth = _noaa_topocentric(
+        *ephemeris, longitude, *_latitude_terms(latitude)
+    )
+    return zenith, azimuth
+
+
+def _psa_geocentric(n, hour, p):
+    # ecliptic longitude (lambda_e) and obliquity (epsilon):
+    omega = p[0] + p[1] * n  # Eq 3
+    L = p[2] + p[3] * n  # Eq 4
+    g = p[4] + p[5] * n  # Eq 5
+    lambda_e = (
+        L + p[6] * math.sin(g) + p[7] * math.sin(2 * g) + p[8] + p[9] * math.sin(omega)
+    )  # Eq 6
+    epsilon = p[10] + p[11] * n + p[12] * math.cos(omega)  # Eq 7
+
+    # celestial right ascension (ra) and declination (d):
+    ra = math.atan2(math.cos(epsilon) * math.sin(lambda_e), math.cos(lambda_e))
+    ra = ra % (2 * math.pi)  # Eq 8
+    d = math.asin(_clip_unit(math.sin(epsilon) * math.sin(lambda_e)))  # Eq 9
+
+    # Greenwich mean sidereal time [hours]
+    gmst = p[13] + p[14] * n + hour  # Eq 10
+
+    return d, ra, gmst
+
+
+def _psa_topocentric(d, ra, gmst, lambda_t, sin_phi, cos_phi):
+    # local coordinates:
+    lmst = (gmst * 15 + lambda_t) * math.pi / 180  # Eq 11
+    w = lmst - ra  # Eq 12
+    theta_z = math.acos(
+        _clip_unit(cos_phi * math.cos(w) * math.cos(d) + math.sin(d) * sin_phi)
+    )  # Eq 13
+    gamma = math.atan2(
+        -math.sin(w), (math.tan(d) * cos_phi - sin_phi * math.cos(w))
+    )  # Eq 14
+
+    EMR = 6371.01  # Earth Mean Radius in km
+    AU = 149597890  # Astronomical Unit in km
+    theta_z = theta_z + (EMR / AU) * math.sin(theta_z)  # Eq 15,16
+
+    return (
+        90 - math.degrees(theta_z),
+        math.degrees(theta_z),
+        math.degrees(gamma) % 360,
+    )
+
+
+def psa(unix_seconds, latitude, longitude, *, coefficients=2020):
+    """
+    Calculate the solar position of a single timestamp using the PSA
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.psa`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    coefficients : int or list, default 2020
+        Coefficients of the algorithm. Can be one of ``2001``, ``2020``, or
+        a list of 15 coefficients.
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raised if ``coefficients`` is not one of the available options.
+
+    Examples
+    --------
+    >>> zenith, azimuth = psa(time.time(), 45, 10)
+    """
+    p = _psa_coefficients(coefficients)
+    days, fraction = _split_seconds(unix_seconds)
+    # days since J2000.0
+    n = (days + 2440587.5 - 2451545.0) + fraction
+    ephemeris = _psa_geocentric(n, fraction * 24, p)
+    _, zenith, azimuth = _psa_topocentric(
+        *ephemeris, longitude, *_latitude_terms(latitude)
+    )
+    return zenith, azimuth
+
+
+def _sg2_geocentric(jd_ut, jd_tt, params):
+    jd_ut_mod = jd_ut - 2444239.5
+    jd_tt_mod = jd_tt - 2444239.5
+
+    # Earth heliocentric longitude [rad], params are the angular frequency,
+    # amplitude, and phase of the periodic terms
+    sums = 0.0
+    for omega_L, rho_L, phi_L in params:
+        sums += rho_L * math.cos(omega_L * jd_tt_mod - phi_L)
+
+    a_L = 1 / 58.130101
+    b_L = 1.742145
+
+    L = (sums + a_L * jd_tt_mod + b_L) % _TWO_PI
+
+    # Geocentric parameters
+    D_t = -9.933735e-5  # [rad]
+
+    rho_psi = 8.329092e-5
+    phi_psi = -2.052757
+
+    # Sun geocentric longitude [rad]
+    D_psi = rho_psi * math.cos(_SG2_OMEGA_NUTATION * jd_tt_mod - phi_psi)
+
+    a_e = -6.216374e-9
+    b_e = 4.091383e-1
+    rho_e = 4.456183e-5
+    phi_e = 2.660352
+
+    # true Earth obliquity [rad]
+    epsilon = (
+        rho_e * math.cos(_SG2_OMEGA_NUTATION * jd_tt_mod - phi_e)
+        + a_e * jd_tt_mod
+        + b_e
+    )
+
+    # Apparent Sun geocentric longitude [rad]
+    Theta = (L + math.pi + D_psi + D_t) % _TWO_PI
+
+    # Sun Geocentric declination [rad]
+    decl_g = math.asin(_clip_unit(math.sin(Theta) * math.sin(epsilon)))
+
+    # Sun Geocentric right ascension [rad]
+    ra = math.atan2(math.sin(Theta) * math.cos(epsilon), math.cos(Theta))
+
+    # mean sidereal time [rad]
+    mst = (6.300388099 * jd_ut_mod + 1.742079) % _TWO_PI
+
+    # apparent sidereal time at Greenwich [rad]
+    v = mst + D_psi * math.cos(epsilon)
+
+    return decl_g, ra, v
+
+
+def _sg2_topocentric(
+    decl_g, ra, v, longitude, sin_latitude, cos_latitude, x, y, pressure, temperature
+):
+    # Geocentric parameters
+    xi = 4.263521e-5  # [rad]
+
+    # convert longitude to [rad]
+    longitude = math.radians(longitude)
+
+    # geocentric hour angle [rad]
+    omega_g = v + longitude - ra
+
+    # Parallax effects in the Sun right ascension [rad]
+    D_r_a = -x * math.sin(omega_g) / math.cos(decl_g) * xi
+
+    # Sun topocentric declination [rad]
+    declination = (
+        decl_g + (x * math.cos(omega_g) * math.sin(decl_g) - y * math.cos(decl_g)) * xi
+    )
+
+    # Sun topocentric hour angle [rad]
+    omega = v - ra + longitude - D_r_a
+
+    # Sun topocentric azimuth [rad]
+    solar_azimuth = (
+        math.atan2(
+            math.sin(omega),
+            math.cos(omega) * sin_latitude - math.tan(declination) * cos_latitude,
+        )
+        + math.pi
+    )
+
+    # Sun topocentric elevation angle without refraction correction [deg]
+    elevation = _asind(
+        sin_latitude * math.sin(declination)
+        + cos_latitude * math.cos(declination) * math.cos(omega)
+    )
+
+    # Atmospheric refraction correction term of the SG2 model
+    elevation_rad = math.radians(elevation)
+    if elevation_rad <= -0.01:
+        # correction term of Cornwall et al. (2011)
+        r = -1.005516e-4 / math.tan(elevation_rad)
+    else:
+        r = 2.96706e-4 / math.tan(
+            elevation_rad + 0.0031376 / (elevation_rad + 0.089186)
+        )
+    r = math.degrees(r * (pressure / 100) / 1010 * 283 / (273 + temperature))
+
+    return (
+        elevation,
+        elevation + r,
+        90 - elevation,
+        90 - elevation - r,
+        math.degrees(solar_azimuth),
+    )
+
+
+def sg2(unix_seconds, latitude, longitude, elevation=0):
+    """
+    Calculate the solar position of a single timestamp using the SG2
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.sg2`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    elevation : float, default 0
+        Altitude of the location above sea level. [m]
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle, not corrected for refraction. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raised if the timestamp is not between 1980 and 2030.
+    """
+    days, fraction = _split_seconds(unix_seconds)
+    year, month, day, _ = _calendar(days)
+
+    # year in decimal form
+    year_dec = year + (month - 0.5) / 12
+    if year_dec < 1980 or year_dec > 2030:
+        raise ValueError("The algorithm is valid only between 1980 and 2030")
+    if year_dec <= 1986:
+        y_t, *a_t = _DELTA_T_PERIODS[0]
+    elif year_dec <= 2005:
+        y_t, *a_t = _DELTA_T_PERIODS[1]
+    else:
+        y_t, *a_t = _DELTA_T_PERIODS[2]
+    delta_t = 0.0
+    for k in range(6):
+        delta_t += a_t[k] * (year - y_t) ** k
+
+    if month <= 2:
+        year, month = year - 1, month + 12
+
+    # SG2 C-code implementation (differs from journal paper!)
+    jd_ut = (
+        1721028.0
+        + day
+        + (153 * month - 2) // 5
+        + 365.0 * year
+        + year // 4
+        + fraction
+        - 0.5
+        - year // 100
+        + year // 400
+    )
+    jd_tt = jd_ut + delta_t / 86400
+    ephemeris = _sg2_geocentric(jd_ut, jd_tt, _HELIOCENTRIC_LONGITUDE_TERMS)
+
+    sin_latitude, cos_latitude = _latitude_terms(latitude)
+    u = math.atan((1 - _FLATTENING) * math.tan(math.radians(latitude)))
+    x = math.cos(u) + elevation / _EQUATORIAL_RADIUS * cos_latitude
+    y = (1 - _FLATTENING) * math.sin(u) + elevation / _EQUATORIAL_RADIUS * sin_latitude
+
+    _, _, zenith, _, azimuth = _sg2_topocentric(
+        *ephemeris, longitude, sin_latitude, cos_latitude, x, y, 101325, 12
+    )
+    return zenith, azimuth
+
+
+def _usno_geocentric(JD, JD_0, delta_t, gmst_option):
+    # days since J2000.0
+    D = JD - 2451545.0
+
+    # Mean anomaly of the Sun [deg]
+    g = (357.529 + 0.98560028 * D) % 360
+
+    # Mean longitude of the Sun [deg]
+    q = (280.459 + 0.98564736 * D) % 360
+
+    # Geocentric apparent ecliptic longitude of the Sun
+    # (adjusted for aberration) [deg]
+    L = (q + 1.915 * _sind(g) + 0.020 * _sind(2 * g)) % 360
+
+    # Mean obliquity of the ecliptic [deg]
+    e = 23.439 - 0.00000036 * D
+
+    # Sun's right ascension angle [hours]
+    RA = (math.degrees(math.atan2(_cosd(e) * _sind(L), _cosd(L))) / 15) % 24
+
+    # Sun's declination angle [deg]
+    d = _asind(_sind(e) * _sind(L))
+
+    # Hours of UT1 elapsed since the previous midnight
+    H = (JD - JD_0) * 24
+    DAY_UT = JD_0 - 2451545.0
+    JD_TT = JD + delta_t / 86400.0
+    D_TT = JD_TT - 2451545.0
+    T = D_TT / 36525  # centuries since the year 2000
+
+    # Greenwich mean sidereal time [hours]
+    if gmst_option == 1:
+        GMST = (
+            6.697375
+            + 0.065707485828 * DAY_UT
+            + 1.0027379 * H
+            + 0.0854103 * T
+            + 0.0000258 * T**2
+        )
+    else:
+        GMST = 6.697375 + 0.065709824279 * DAY_UT + 1.0027379 * H + 0.0000258 * T**2
+    GMST = GMST % 24
+
+    # Longitude of the ascending node of the Moon [deg]
+    omega = 125.04 - 0.052954 * D_TT
+
+    # Mean Longitude of the Sun [deg]
+    LS = 280.47 + 0.98565 * D_TT
+
+    # Nutation in longitude [hours]
+    longitude_nutation = -0.000319 * _sind(omega) - 0.000024 * _sind(2 * LS)
+
+    # obliquity of the ecliptic
+    epsilon = 23.4393 - 0.0000004 * D_TT
+
+    # equation of equinoxes [hours]
+    eqeq = longitude_nutation * _cosd(epsilon)
+
+    # Greenwich apparent sidereal time [hours]
+    GAST = GMST + eqeq
+
+    return d, (GAST - RA) * 15
+
+
+def _usno_topocentric(d, greenwich_hour_angle, longitude, sin_latitude, cos_latitude):
+    # Local hour angle [deg], logitude is positive if it is east
+    LHA = greenwich_hour_angle + longitude
+
+    # solar elevation [deg]
+    elevation = _asind(_cosd(LHA) * _cosd(d) * cos_latitude + _sind(d) * sin_latitude)
+
+    # azimuth [deg]
+    azimuth = math.degrees(
+        math.atan2(-_sind(LHA), (_tand(d) * cos_latitude - sin_latitude * _cosd(LHA)))
+    )
+    azimuth = azimuth % 360
+
+    return elevation, 90 - elevation, azimuth
+
+
+def usno(unix_seconds, latitude, longitude, *, delta_t=67.0, gmst_option=1):
+    """
+    Calculate the solar position of a single timestamp using the USNO
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.usno`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    delta_t : float, default 67.0
+        Difference between terrestrial time and UT1. If ``delta_t`` is None,
+        uses :py:func:`pvlib.spa.calculate_deltat`. [seconds]
+    gmst_option : int, default 1
+        Equation of the Greenwich mean sidereal time, ``1`` or ``2``.
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+
+    Raises
+    ------
+    ValueError
+        Raised if ``gmst_option`` is not 1 or 2.
+    """
+    if gmst_option not in (1, 2):
+        raise ValueError(f"{gmst_option} is not a valid `gmst_option`")
+    days, fraction = _split_seconds(unix_seconds)
+    if delta_t is None:
+        year, month, _, _ = _calendar(days)
+        delta_t = float(_spa.calculate_deltat(year, month))
+    # JD_0 is the Julian date of the previous midnight (0h) UT1
+    JD_0 = days + 2440587.5
+    ephemeris = _usno_geocentric(JD_0 + fraction, JD_0, delta_t, gmst_option)
+    _, zenith, azimuth = _usno_topocentric(
+        *ephemeris, longitude, *_latitude_terms(latitude)
+    )
+    return zenith, azimuth
+
+
+def _walraven_geocentric(time, delta, T):
+    # [rad]
+    theta = 2 * math.pi * time / 365.25
+
+    # [rad]
+    g = -0.031271 - 4.53963e-7 * time + theta
+
+    # longitude of the sun [rad]
+    L = (
+        4.900968
+        + 3.67474e-7 * time
+        + (0.033434 - 2.3e-9 * time) * math.sin(g)
+        + 0.000349 * math.sin(2 * g)
+        + theta
+    )
+
+    # angle between the plane of the ecliptic and the plane of the
+    # celestial equator [rad]
+    epsilon = math.radians(23.4420) - math.radians(3.56e-7) * time
+
+    SEL = math.sin(L)
+    A1 = SEL * math.cos(epsilon)
+    A2 = math.cos(L)
+
+    # right angle [rad]
+    RA = math.atan2(A1, A2)
+    if RA < 0:
+        RA = RA + 2 * math.pi
+
+    # declination [rad]
+    DECL = math.asin(_clip_unit(SEL * math.sin(epsilon)))
+
+    # sidereal time [rad]
+    ST = 1.759335 + 2 * math.pi * (time / 365.25 - delta) + 3.694e-7 * time
+    if ST >= 2 * math.pi:
+        ST = ST - 2 * math.pi
+
+    return DECL, RA, ST, math.radians(T * 15)
+
+
+def _walraven_topocentric(DECL, RA, ST, solar_time, longitude, sin_phi, cos_phi):
+    longitude = -longitude  # outdated convention used by Walraven
+
+    # local sidereal time [rad]
+    S = ST - math.radians(longitude) + solar_time
+    if S >= 2 * math.pi:
+        S = S - 2 * math.pi
+
+    # hour angle [rad]
+    H = RA - S
+
+    # elevation [rad]
+    E = math.asin(
+        _clip_unit(sin_phi * math.sin(DECL) + cos_phi * math.cos(DECL) * math.cos(H))
+    )
+
+    # azimuth [deg]
+    A = _asind(math.cos(DECL) * math.sin(H) / math.cos(E))
+
+    # azimuth quadrant assignment - Spencer (1989) correct for all longitudes
+    cos_az = math.sin(DECL) - math.sin(E) * sin_phi
+    if cos_az >= 0 and _sind(A) < 0:
+        A = 360 + A
+    if cos_az < 0:
+        A = 180 - A
+
+    return math.degrees(E), 90 - math.degrees(E), A
+
+
+def walraven(unix_seconds, latitude, longitude):
+    """
+    Calculate the solar position of a single timestamp using the Walraven
+    algorithm.
+
+    Scalar equivalent of :py:func:`solposx.solarposition.walraven`.
+
+    Parameters
+    ----------
+    unix_seconds : float
+        Seconds since 1970-01-01 00:00 UTC. [s]
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+
+    Returns
+    -------
+    zenith : float
+        Solar zenith angle. [degrees]
+    azimuth : float
+        Solar azimuth angle. [degrees]
+    """
+    days, fraction = _split_seconds(unix_seconds)
+    year, _, _, dayofyear = _calendar(days)
+    T = fraction * 24
+
+    delta = year - 1980
+    leap = int(delta / 4.0)  # round towards zero
+    time = delta * 365 + leap + dayofyear - 1 + T / 24
+    if delta == leap * 4:
+        time = time - 1
+    if delta < 0 and delta != leap * 4:
+        time = time - 1
+
+    ephemeris = _walraven_geocentric(time, delta, T)
+    _, zenith, azimuth = _walraven_topocentric(
+        *ephemeris, longitude, *_latitude_terms(latitude)
+    )
+    return zenith, azimuth
@@ -0,0 +1,517 @@
+"""
+Local HTTP service of the solar position algorithms.
+
+Run with::
+
+    python -m solposx.serve [--host 127.0.0.1] [--port 8080]
+
+The service is implemented with :py:mod:`asyncio` and the standard library
+and requires no network access beyond the local socket. Endpoints:
+
+``POST /solarposition/<algorithm>``
+    JSON body with ``times``, a list of ISO 8601 strings with UTC offset or
+    of int64 nanoseconds since 1970-01-01 UTC, ``latitude``, ``longitude``,
+    and optionally ``elevation``, ``pressure``, ``temperature``, and
+    ``options``, a dictionary of keyword parameters of the function of the
+    algorithm in :py:mod:`solposx.solarposition`. Returns the columns of the
+    solar position as JSON, with ``null`` for missing values, e.g., of
+    ``daylight_only``, or as a NumPy ``.npz`` archive if the ``Accept``
+    header is ``application/x-npz`` or the query is ``?format=npz``.
+``GET /algorithms``
+    JSON list of the available algorithms.
+``GET /metrics``
+    Counters and latency quantiles in the Prometheus text format.
+"""
+
+import argparse
+import asyncio
+import collections
+import functools
+import inspect
+import io
+import json
+import logging
+import time
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+from solposx.parallel import _FLEET_ALGORITHMS
+from solposx.site import Site
+from solposx.tools import _pandas_to_utc
+
+# skyfield is excluded, because it downloads its ephemeris file
+ALGORITHMS = tuple(name for name in _FLEET_ALGORITHMS if name != "skyfield")
+
+_SITE_FIELDS = {
+    "elevation": 0.0,
+    "pressure": 101325.0,
+    "temperature": 12.0,
+}
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+_NPZ = "application/x-npz"
+
+# errors of invalid requests, which are answered with status 400
+_CLIENT_ERRORS = (ValueError, TypeError, KeyError)
+
+_logger = logging.getLogger(__name__)
+
+# parameters of the functions of the algorithms that are not options
+_ARGUMENTS = {"times", "latitude", "longitude", "output", *_SITE_FIELDS}
+
+
+class _HTTPError(Exception):
+    """Error response with an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_times(values):
+    """Return a list of timestamps of a request as a DatetimeIndex in UTC."""
+    values = np.asarray(values)
+    if values.ndim != 1:
+        raise ValueError("times must be a list of timestamps.")
+    if values.dtype.kind in "iu" or values.size == 0:
+        # int64 nanoseconds since 1970-01-01 are interpreted as UTC
+        return pd.DatetimeIndex(values.astype(np.int64), tz="UTC")
+    return _pandas_to_utc(pd.DatetimeIndex(values))
+
+
+def _check_options(algorithm, options):
+    """Raise a ValueError if options are not parameters of an algorithm."""
+    parameters = inspect.signature(getattr(solarposition, algorithm)).parameters
+    allowed = parameters.keys() - _ARGUMENTS
+    unknown = sorted(options.keys() - allowed)
+    if unknown:
+        raise ValueError(
+            f"{algorithm} got unexpected keyword options {unknown}, expected "
+            f"some of {sorted(allowed)}."
+        )
+
+
+def _json_column(value):
+    """Return a column as a list, with non-finite values as None (null)."""
+    if value.dtype.kind == "f":
+        value = np.where(np.isfinite(value), value, None)
+    return value.tolist()
+
+
+def _split(result, lengths):
+    """Split the columns of a result into consecutive parts of lengths."""
+    bounds = np.cumsum(lengths)[:-1]
+    parts = zip(*(np.split(value, bounds) for value in result.values()))
+    return [dict(zip(result, part)) for part in parts]
+
+
+class Service:
+    """
+    HTTP service of the solar position algorithms.
+
+    Concurrent requests of the same algorithm and options that arrive within
+    ``window`` seconds are merged into one batch, which is calculated in
+    ``executor``, off the event loop. The timestamps of the requests of a
+    site are concatenated into one vectorized call. The Site objects of the
+    most recently requested sites, with their precomputed terms, are kept in
+    a least-recently-used cache.
+
+    Parameters
+    ----------
+    window : float, default : 0.002
+        Time to collect requests after the first request of a batch. [s]
+    max_batch : int, default : 1024
+        Maximum number of requests per batch.
+    cache_size : int, default : 1024
+        Number of sites kept in the cache.
+    max_body : int, default : 16777216
+        Maximum size of a request body. Larger requests are answered with
+        status 413. [bytes]
+    executor : concurrent.futures.Executor, optional
+        Executor of the calculations. If not specified, the default executor
+        of the event loop is used.
+
+    See Also
+    --------
+    solposx.Coalescer
+
+    Examples
+    --------
+    >>> server = await Service().start('127.0.0.1', 8080)
+    >>> await server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        *,
+        window=0.002,
+        max_batch=1024,
+        cache_size=1024,
+        max_body=2**24,
+        executor=None,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_body = max_body
+        self._executor = executor
+        self._site = functools.lru_cache(maxsize=cache_size)(Site)
+        self._pending = {}
+        self._tasks = set()
+        self._counters = collections.Counter()
+        self._latencies = collections.deque(maxlen=100000)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Start serving on a host and port.
+
+        Parameters
+        ----------
+        host : str, default : '127.0.0.1'
+        port : int, default : 8080
+            Port number, 0 to select a free port.
+
+        Returns
+        -------
+        asyncio.Server
+        """
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def calculate(self, algorithm, times, site, options=None):
+        """
+        Calculate the solar position as part of the next batch.
+
+        Parameters
+        ----------
+        algorithm : str
+            One of :py:data:`ALGORITHMS`.
+        times : pandas.DatetimeIndex
+            Localized timestamps.
+        site : Site
+            Location of the calculation.
+        options : dict, optional
+            Parameters of the algorithm, e.g., ``delta_t``.
+
+        Returns
+        -------
+        dict
+            Dictionary of arrays of the solar position, keyed by the column
+            names of the function of ``algorithm``.
+        """
+        options = dict(options or {})
+        key = (algorithm, json.dumps(options, sort_keys=True))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((times, site, future))
+        if len(batch) == 1:
+            loop.call_later(self.window, self._flush, key, batch)
+        if len(batch) >= self.max_batch:
+            self._flush(key, batch)
+        return await future
+
+    def metrics(self):
+        """Return the counters and latencies in the Prometheus text format."""
+        cache = self._site.cache_info()
+        lines = [
+            "# TYPE solposx_requests_total counter",
+            *(
+                f'solposx_requests_total{{algorithm="{name}"}} {count}'
+                for (kind, name), count in sorted(self._counters.items())
+                if kind == "requests"
+            ),
+            "# TYPE solposx_batches_total counter",
+            f"solposx_batches_total {self._counters['batches', '']}",
+            "# TYPE solposx_calls_total counter",
+            f"solposx_calls_total {self._counters['calls', '']}",
+            "# TYPE solposx_timestamps_total counter",
+            f"solposx_timestamps_total {self._counters['timestamps', '']}",
+            "# TYPE solposx_errors_total counter",
+            f"solposx_errors_total {self._counters['errors', '']}",
+            "# TYPE solposx_site_cache_hits_total counter",
+            f"solposx_site_cache_hits_total {cache.hits}",
+            "# TYPE solposx_site_cache_misses_total counter",
+            f"solposx_site_cache_misses_total {cache.misses}",
+            "# TYPE solposx_site_cache_size gauge",
+            f"solposx_site_cache_size {cache.currsize}",
+            "# TYPE solposx_request_latency_seconds summary",
+        ]
+        if self._latencies:
+            quantiles = (0.5, 0.9, 0.99)
+            values = np.quantile(np.array(self._latencies), quantiles)
+            lines += [
+                f'solposx_request_latency_seconds{{quantile="{q}"}} {value:.6g}'
+                for q, value in zip(quantiles, values)
+            ]
+        lines += [
+            (
+                "solposx_request_latency_seconds_count "
+                f"{self._counters['latency_count', '']}"
+            ),
+            (
+                "solposx_request_latency_seconds_sum "
+                f"{self._counters['latency_sum', '']:.6g}"
+            ),
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _flush(self, key, batch):
+        """Start the calculation of a batch, unless it was started before."""
+        if self._pending.get(key) is not batch:
+            return
+        del self._pending[key]
+        task = asyncio.get_running_loop().create_task(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch):
+        """
+        Calculate a batch in the executor and set the results.
+
+        If the calculation fails unexpectedly, its exception is set on all
+        futures of the batch, and if the task is cancelled, the futures are
+        cancelled. Futures that were cancelled before are skipped.
+        """
+        loop = asyncio.get_running_loop()
+        results = None
+        try:
+            results, calls, timestamps = await loop.run_in_executor(
+                self._executor, self._evaluate, key, batch
+            )
+            self._counters["batches", ""] += 1
+            self._counters["calls", ""] += calls
+            self._counters["timestamps", ""] += timestamps
+        except Exception as exc:
+            _logger.exception("Calculation of a batch of %s failed", key[0])
+            results = [exc] * len(batch)
+        finally:
+            for i, (_, _, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if results is None:
+                    # the task was cancelled while waiting for the executor
+                    future.cancel()
+                elif isinstance(results[i], Exception):
+                    future.set_exception(results[i])
+                else:
+                    future.set_result(results[i])
+
+    @staticmethod
+    def _evaluate(key, batch):
+        """
+        Return the results of a batch, with one call per site, and the
+        numbers of calls and timestamps.
+        """
+        algorithm, options = key[0], json.loads(key[1])
+        function = getattr(solarposition, algorithm)
+        by_site = collections.defaultdict(list)
+        for i, (_, site, _) in enumerate(batch):
+            by_site[site].append(i)
+        results = [None] * len(batch)
+        calls = len(by_site)
+        for site, indices in by_site.items():
+            lengths = [len(batch[i][0]) for i in indices]
+            times = batch[indices[0]][0].append([batch[i][0] for i in indices[1:]])
+            try:
+                result = function(times, site, output="dict", **options)
+            except _CLIENT_ERRORS as exc:
+                if len(indices) == 1:
+                    parts = [exc]
+                else:
+                    # calculate the requests one by one, such that an invalid
+                    # request does not fail the other requests of the site
+                    parts = [Service._evaluate(key, [batch[i]])[0][0] for i in indices]
+                    calls += len(indices)
+            else:
+                parts = _split(result, lengths)
+            for i, part in zip(indices, parts):
+                results[i] = part
+        timestamps = sum(len(times) for times, _, _ in batch)
+        return results, calls, timestamps
+
+    async def _handle(self, reader, writer):
+        """Serve the HTTP/1.1 requests of a connection."""
+        try:
+            while True:
+                version, keep_alive = "HTTP/1.1", False
+                try:
+                    request = await self._read_request(reader)
+                except ValueError:
+                    # malformed request line, header, or content length
+                    response = self._error(400, "Malformed HTTP request.")
+                else:
+                    if request is None:
+                        break
+                    method, target, version, headers, length = request
+                    if length > self.max_body:
+                        response = self._error(
+                            413, f"The request body exceeds {self.max_body} bytes."
+                        )
+                    else:
+                        body = await reader.readexactly(length)
+                        response = await self._respond(method, target, headers, body)
+                        keep_alive = (
+                            version == "HTTP/1.1"
+                            and headers.get("connection", "").lower() != "close"
+                        )
+                status, content_type, payload = response
+                head = (
+                    f"{version} {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n"
+                )
+                writer.write(head.encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # the connection was closed
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        """
+        Return the method, target, version, headers, and content length of
+        the next request of a connection, or None if it was closed.
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, version = request_line.decode("latin-1").split()
+        headers = {}
+        while (line := await reader.readline()).strip():
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"Invalid content length: {length}")
+        return method, target, version, headers, length
+
+    async def _respond(self, method, target, headers, body):
+        """Return the status, content type, and payload of a request."""
+        url = urllib.parse.urlsplit(target)
+        try:
+            if url.path == "/metrics":
+                self._check_method(method, "GET")
+                content_type = "text/plain; version=0.0.4"
+                return 200, content_type, self.metrics().encode()
+            if url.path == "/algorithms":
+                self._check_method(method, "GET")
+                return 200, "application/json", json.dumps(ALGORITHMS).encode()
+            if url.path.startswith("/solarposition/"):
+                algorithm = url.path.removeprefix("/solarposition/")
+                if algorithm not in ALGORITHMS:
+                    raise _HTTPError(404, f"Unknown algorithm: {algorithm}.")
+                self._check_method(method, "POST")
+                query = urllib.parse.parse_qs(url.query)
+                npz = query.get("format") == ["npz"] or headers.get("accept") == _NPZ
+                return await self._solarposition(algorithm, body, npz)
+            raise _HTTPError(404, f"Not found: {url.path}")
+        except _HTTPError as exc:
+            return self._error(exc.status, str(exc))
+        except _CLIENT_ERRORS as exc:
+            return self._error(400, f"{type(exc).__name__}: {exc}")
+        except Exception as exc:
+            _logger.exception("Request of %s failed", url.path)
+            return self._error(500, f"{type(exc).__name__}: {exc}")
+
+    def _error(self, status, message):
+        """Return the status, content type, and payload of an error."""
+        self._counters["errors", ""] += 1
+        return status, "application/json", json.dumps({"error": message}).encode()
+
+    @staticmethod
+    def _check_method(method, allowed):
+        if method != allowed:
+            raise _HTTPError(405, f"Method {method} not allowed, use {allowed}.")
+
+    async def _solarposition(self, algorithm, body, npz):
+        """Return the response of a solar position request."""
+        started = time.perf_counter()
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise TypeError("The request body must be a JSON object.")
+        times = _parse_times(request["times"])
+        site = self._site(
+            float(request["latitude"]),
+            float(request["longitude"]),
+            *(float(request.get(name, value)) for name, value in _SITE_FIELDS.items()),
+        )
+        options = request.get("options", {})
+        if not isinstance(options, dict):
+            raise TypeError("options must be a JSON object.")
+        if not options.keys().isdisjoint(_SITE_FIELDS):
+            raise ValueError(
+                f"{list(_SITE_FIELDS)} must be specified next to the latitude, "
+                "not in options."
+            )
+        _check_options(algorithm, options)
+        result = await self.calculate(algorithm, times, site, options)
+        self._counters["requests", algorithm] += 1
+        if npz:
+            buffer = io.BytesIO()
+            np.savez(buffer, time=times.as_unit("ns").asi8, **result)
+            payload, content_type = buffer.getvalue(), _NPZ
+        else:
+            iso = np.datetime_as_string(times.as_unit("ns").values, timezone="UTC")
+            columns = {"time": iso.tolist()}
+            columns.update(
+                {name: _json_column(value) for name, value in result.items()}
+            )
+            payload = json.dumps(columns, allow_nan=False).encode()
+            content_type = "application/json"
+        latency = time.perf_counter() - started
+        self._latencies.append(latency)
+        self._counters["latency_count", ""] += 1
+        self._counters["latency_sum", ""] += latency
+        return 200, content_type, payload
+
+
+async def _serve(args):
+    service = Service(
+        window=args.window,
+        max_batch=args.max_batch,
+        cache_size=args.cache_size,
+        max_body=args.max_body,
+    )
+    server = await service.start(args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Serving solar positions on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    """Run the service from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m solposx.serve",
+        description="Local HTTP service of the solposx algorithms.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--window", type=float, default=0.002)
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--max-body", type=int, default=2**24)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,234 @@
+"""Locations with precomputed location-dependent terms."""
+
+import numpy as np
+from pvlib.tools import sind, cosd
+
+# reference ellipsoid of the SG2 algorithm
+_EQUATORIAL_RADIUS = 6378140.0  # [m]
+_FLATTENING = 1 / 298.257282697
+
+_FIELDS = ("latitude", "longitude", "elevation", "pressure", "temperature")
+_TERMS = ("sin_latitude", "cos_latitude", "parallax_x", "parallax_y")
+
+
+def _latitude_terms(latitude):
+    """Return the sine and cosine of the latitude."""
+    return sind(latitude), cosd(latitude)
+
+
+def _parallax_terms(latitude, elevation, sin_latitude, cos_latitude):
+    """Return the geocentric parallax terms of the SG2 algorithm."""
+    u = np.arctan((1 - _FLATTENING) * np.tan(np.deg2rad(latitude)))
+    x = np.cos(u) + elevation / _EQUATORIAL_RADIUS * cos_latitude
+    y = (1 - _FLATTENING) * np.sin(u) + elevation / _EQUATORIAL_RADIUS * sin_latitude
+    return x, y
+
+
+def _precompute_terms(site):
+    """Set the location-dependent terms of a Site or Fleet."""
+    site.sin_latitude, site.cos_latitude = _latitude_terms(site.latitude)
+    site.parallax_x, site.parallax_y = _parallax_terms(
+        site.latitude, site.elevation, site.sin_latitude, site.cos_latitude
+    )
+
+
+class Site:
+    """
+    Location with precomputed location-dependent terms.
+
+    The trigonometric functions of the latitude and the geocentric parallax
+    terms are calculated once, when the Site is created. A Site can be passed
+    in place of ``latitude`` to the functions in
+    :py:mod:`solposx.solarposition` and the kernels in
+    :py:mod:`solposx.kernels`, in which case ``longitude`` is omitted and
+    ``elevation``, ``pressure``, and ``temperature`` are taken from the Site.
+
+    Parameters
+    ----------
+    latitude : float
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : float
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    elevation : float, default : 0
+        Altitude of the location of interest. [m]
+    pressure : float, default : 101325
+        Annual average air pressure. [Pa]
+    temperature : float, default : 12
+        Annual average air temperature. [°C]
+
+    Attributes
+    ----------
+    sin_latitude, cos_latitude : float
+        Sine and cosine of the latitude. [-]
+    parallax_x, parallax_y : float
+        Geocentric parallax terms of the SG2 algorithm. [-]
+
+    See Also
+    --------
+    Fleet
+
+    Examples
+    --------
+    >>> site = Site(45, 10, elevation=200)
+    >>> solpos = noaa(times, site)
+    """
+
+    __slots__ = _FIELDS + _TERMS
+
+    shape = ()
+    ndim = 0
+
+    def __init__(
+        self, latitude, longitude, elevation=0, pressure=101325, temperature=12
+    ):
+        self.latitude = float(latitude)
+        self.longitude = float(longitude)
+        self.elevation = float(elevation)
+        self.pressure = float(pressure)
+        self.temperature = float(temperature)
+        _precompute_terms(self)
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class Fleet:
+    """
+    Collection of locations with precomputed location-dependent terms.
+
+    A structure of arrays of M sites, whose trigonometric functions of the
+    latitude and geocentric parallax terms are calculated once, when the
+    Fleet is created. A Fleet can be passed in place of ``latitude`` to the
+    functions in :py:mod:`solposx.solarposition` and the kernels in
+    :py:mod:`solposx.kernels`, in which case ``longitude`` is omitted and the
+    solar position is calculated for all combinations of times and sites.
+
+    Parameters
+    ----------
+    latitude : array-like
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. [degrees]
+    elevation : array-like, default : 0
+        Altitude of the locations of interest. [m]
+    pressure : array-like, default : 101325
+        Annual average air pressure. [Pa]
+    temperature : array-like, default : 12
+        Annual average air temperature. [°C]
+
+    Attributes
+    ----------
+    sin_latitude, cos_latitude : np.ndarray
+        Sine and cosine of the latitude. [-]
+    parallax_x, parallax_y : np.ndarray
+        Geocentric parallax terms of the SG2 algorithm. [-]
+
+    Raises
+    ------
+    ValueError
+        Raised if the parameters cannot be broadcast to one dimension.
+
+    See Also
+    --------
+    Site
+    """
+
+    __slots__ = _FIELDS + _TERMS
+
+    ndim = 1
+
+    def __init__(
+        self, latitude, longitude, elevation=0, pressure=101325, temperature=12
+    ):
+        fields = np.broadcast_arrays(
+            *(
+                np.asarray(value, dtype=np.float64)
+                for value in (latitude, longitude, elevation, pressure, temperature)
+            )
+        )
+        if fields[0].ndim != 1:
+            raise ValueError("The parameters of a Fleet must be one-dimensional.")
+        for name, value in zip(_FIELDS, fields):
+            setattr(self, name, np.array(value))
+        _precompute_terms(self)
+
+    @classmethod
+    def from_sites(cls, sites):
+        """
+        Create a Fleet from a sequence of Site objects.
+
+        Parameters
+        ----------
+        sites : sequence of Site
+
+        Returns
+        -------
+        Fleet
+        """
+        return cls(*([getattr(site, name) for site in sites] for name in _FIELDS))
+
+    @property
+    def shape(self):
+        return self.latitude.shape
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def __getitem__(self, key):
+        fields = (getattr(self, name)[key] for name in _FIELDS)
+        if np.ndim(key) == 0 and not isinstance(key, slice):
+            return Site(*fields)
+        return type(self)(*fields)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(<{len(self)} sites>)"
+
+
+def _is_site(latitude):
+    """Return True if ``latitude`` is a Site or Fleet."""
+    return isinstance(latitude, (Site, Fleet))
+
+
+def _location_terms(latitude, longitude, dtype=np.float64):
+    """
+    Return latitude, longitude, and the sine and cosine of the latitude.
+
+    The terms are taken from ``latitude`` if it is a Site or Fleet, otherwise
+    they are calculated. The terms are converted to ``dtype`` unless it is
+    float64.
+    """
+    if _is_site(latitude):
+        site = latitude
+        terms = site.latitude, site.longitude, site.sin_latitude, site.cos_latitude
+    elif longitude is None:
+        raise TypeError(
+            "longitude must be specified unless latitude is a Site or Fleet."
+        )
+    else:
+        terms = (latitude, longitude, *_latitude_terms(latitude))
+    if dtype == np.float64:
+        return terms
+    return tuple(
+        (
+            term.astype(dtype, copy=False)
+            if isinstance(term, np.ndarray)
+            else np.asarray(term, dtype=dtype)
+        )
+        for term in terms
+    )
+
+
+def _site_parameters(latitude, longitude, elevation=0, pressure=101325, temperature=12):
+    """Return the location parameters, taken from a Site or Fleet if given."""
+    if _is_site(latitude):
+        return tuple(getattr(latitude, name) for name in _FIELDS)
+    if longitude is None:
+        raise TypeError(
+            "longitude must be specified unless latitude is a Site or Fleet."
+        )
+    return latitude, longitude, elevation, pressure, temperature
@@ -1,3 +1,10 @@
+from solposx.solarposition.geocentric import Ephemeris  # noqa: F401
+from solposx.solarposition.geocentric import geocentric  # noqa: F401
+from solposx.solarposition.geocentric import topocentric  # noqa: F401
+from solposx.solarposition.ephemeris_table import EphemerisTable  # noqa: F401
+from solposx.solarposition.ephemeris_table import (  # noqa: F401
+    precompute_ephemeris,
+)
 from solposx.solarposition.iqbal import iqbal  # noqa: F401
 from solposx.solarposition.michalsky import michalsky  # noqa: F401
 from solposx.solarposition.nasa_horizons import nasa_horizons  # noqa: F401
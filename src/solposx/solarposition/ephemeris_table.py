@@ -0,0 +1,337 @@
+"""Memory-mapped tables of precomputed geocentric solar ephemerides."""
+
+import argparse
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+import solposx
+from solposx.solarposition.geocentric import Ephemeris, _get_stages
+from solposx.tools import TimeBundle, _pandas_to_utc, _to_time_bundle
+
+# file signature, format version, and length of the JSON header
+_MAGIC = b"SOLPOSXEPH"
+_VERSION = 1
+_PREFIX = struct.Struct("<10sHI")
+# alignment of the table data in the file [bytes]
+_ALIGNMENT = 64
+# number of timestamps calculated at a time when precomputing a table
+_CHUNK = 2**20
+
+# period of the terms that wrap around, e.g., the sidereal time, in the units
+# of the terms, see the ``<algorithm>_geocentric`` functions in
+# :py:mod:`solposx.kernels`
+_PERIODS = {
+    "iqbal": {"greenwich_hour_angle": 360.0},
+    "michalsky": {"right_ascension": 360.0, "greenwich_mean_sidereal_time": 24.0},
+    "noaa": {"true_solar_time": 1440.0},
+    "psa": {"right_ascension": 2 * np.pi, "greenwich_mean_sidereal_time": 24.0},
+    "sg2": {"right_ascension": 2 * np.pi, "apparent_sidereal_time": 2 * np.pi},
+    "usno": {"greenwich_hour_angle": 360.0},
+    "walraven": {
+        "right_ascension": 2 * np.pi,
+        "sidereal_time": 2 * np.pi,
+        "solar_time": 2 * np.pi,
+    },
+}
+
+
+def _utc_nanoseconds(time):
+    """Return a timestamp in int64 nanoseconds since 1970-01-01 UTC."""
+    return _pandas_to_utc(pd.Timestamp(time)).as_unit("ns").value
+
+
+def precompute_ephemeris(path, algorithm, start, end, freq="1min", **kwargs):
+    """
+    Precompute the geocentric ephemeris of an algorithm into a table file.
+
+    The location-independent terms of the algorithm, e.g., the declination,
+    the right ascension, and the sidereal time, see
+    :py:func:`~solposx.solarposition.geocentric`, are calculated for
+    equidistant timestamps from ``start`` to ``end`` and written into a
+    versioned binary file. The file is read by :py:class:`EphemerisTable`.
+    The timestamps are calculated in chunks, such that the memory use does
+    not depend on the length of the table.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Path of the table file, which is overwritten if it exists.
+    algorithm : str
+        Solar position algorithm. Can be one of ``'iqbal'``,
+        ``'michalsky'``, ``'noaa'``, ``'psa'``, ``'sg2'``, ``'usno'``, or
+        ``'walraven'``.
+    start, end : pandas.Timestamp, datetime, or str
+        First and last timestamp of the table - must be localized. ``end`` is
+        included if it is a multiple of ``freq`` after ``start``.
+    freq : str or pandas.Timedelta, default : '1min'
+        Time step of the table.
+    **kwargs
+        Location-independent parameters of the algorithm, see
+        :py:func:`~solposx.solarposition.geocentric`, except ``dtype``. The
+        terms are calculated in double precision.
+
+    Returns
+    -------
+    EphemerisTable
+        The table, memory-mapped from ``path``.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if
+        ``freq`` is not positive, if the table has less than two
+        timestamps, or if the algorithm does not support the time range. The
+        file is written only if all timestamps are calculated.
+
+    See Also
+    --------
+    EphemerisTable
+
+    Examples
+    --------
+    >>> table = precompute_ephemeris('sg2.eph', 'sg2', '1980-01-01 00:00Z',
+    ...                              '2030-01-01 00:00Z', freq='1min')
+    """
+    geocentric_stage, _ = _get_stages(algorithm)
+    first = _utc_nanoseconds(start)
+    step = pd.Timedelta(freq).as_unit("ns").value
+    if step <= 0:
+        raise ValueError(f"freq must be positive, got {freq}.")
+    count = (_utc_nanoseconds(end) - first) // step + 1
+    if count < 2:
+        raise ValueError("The table must have at least two timestamps.")
+    # fail early if the algorithm does not support the first or last timestamp
+    last = first + step * (count - 1)
+    terms = geocentric_stage(TimeBundle(np.array([first, last])), **kwargs)
+    header = {
+        "algorithm": algorithm,
+        "kwargs": kwargs,
+        "start": first,
+        "step": step,
+        "count": int(count),
+        "terms": list(terms),
+        "periods": _PERIODS[algorithm],
+        "dtype": "<f8",
+        "solposx_version": solposx.__version__,
+    }
+    header = json.dumps(header).encode()
+    offset = _PREFIX.size + len(header)
+    padding = -offset % _ALIGNMENT
+    # the table is written into a temporary file, which replaces ``path``
+    # only once all timestamps are calculated
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        file.write(_PREFIX.pack(_MAGIC, _VERSION, len(header) + padding))
+        file.write(header + b" " * padding)
+    try:
+        data = np.memmap(
+            file.name,
+            dtype="<f8",
+            mode="r+",
+            offset=offset + padding,
+            shape=(count, len(terms)),
+        )
+        for begin in range(0, count, _CHUNK):
+            ticks = first + step * np.arange(begin, min(begin + _CHUNK, count))
+            terms = geocentric_stage(TimeBundle(ticks), **kwargs)
+            for column, value in enumerate(terms.values()):
+                data[begin : begin + len(ticks), column] = value
+        data.flush()
+        del data
+        os.replace(file.name, path)
+    except BaseException:
+        os.remove(file.name)
+        raise
+    return EphemerisTable(path)
+
+
+class EphemerisTable:
+    """
+    Memory-mapped table of a precomputed geocentric solar ephemeris.
+
+    The geocentric ephemeris of an algorithm is the same for all locations
+    and all calculations of the same timestamps, e.g., the reruns of a
+    reanalysis. A table written by :py:func:`precompute_ephemeris` is mapped
+    into memory, such that opening it is immediate, and only the pages of
+    the requested timestamps are read from disk. The terms of the ephemeris
+    are linearly interpolated between the timestamps of the table, taking
+    the wrap-around of angles into account, and are projected to locations
+    using :py:func:`~solposx.solarposition.topocentric`.
+
+    At the timestamps of the table, the solar position is identical to the
+    function of the algorithm in :py:mod:`solposx.solarposition`. Between
+    them, the interpolation error of the elevation of a 1-minute table is
+    below 1e-6 degrees. The terms of some algorithms, e.g., ``'iqbal'``, are
+    discontinuous at UTC midnight, so timestamps between two timestamps of
+    the table on different UTC days are not interpolated, but calculated
+    directly, and are identical to the function of the algorithm.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Path of a table file written by :py:func:`precompute_ephemeris`.
+
+    Attributes
+    ----------
+    algorithm : str
+        Name of the solar position algorithm.
+    kwargs : dict
+        Location-independent parameters of the algorithm.
+    start, end : pandas.Timestamp
+        First and last timestamp of the table in UTC.
+    freq : pandas.Timedelta
+        Time step of the table.
+    terms : list of str
+        Names of the terms of the ephemeris.
+
+    Raises
+    ------
+    ValueError
+        Raised if the file is not a table file or if its format version is
+        not supported.
+
+    See Also
+    --------
+    precompute_ephemeris
+
+    Examples
+    --------
+    >>> table = EphemerisTable('sg2.eph')
+    >>> ephemeris = table.geocentric(times)
+    >>> solpos = topocentric(ephemeris, latitudes, longitudes)
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            prefix = file.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size or prefix[: len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"{path} is not an ephemeris table file.")
+            _, version, length = _PREFIX.unpack(prefix)
+            if version != _VERSION:
+                raise ValueError(
+                    f"The format version {version} of {path} is not supported, "
+                    f"expected version {_VERSION}."
+                )
+            header = json.loads(file.read(length))
+        self.algorithm = header["algorithm"]
+        self.kwargs = header["kwargs"]
+        self.terms = header["terms"]
+        self._periods = header["periods"]
+        self._start = header["start"]
+        self._step = header["step"]
+        self._data = np.memmap(
+            path,
+            dtype=header["dtype"],
+            mode="r",
+            offset=_PREFIX.size + length,
+            shape=(header["count"], len(self.terms)),
+        )
+
+    @property
+    def start(self):
+        return pd.Timestamp(self._start, tz="UTC")
+
+    @property
+    def end(self):
+        return self.start + (len(self) - 1) * self.freq
+
+    @property
+    def freq(self):
+        return pd.Timedelta(self._step, unit="ns")
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(algorithm={self.algorithm!r}, "
+            f"start='{self.start}', end='{self.end}', freq='{self.freq}')"
+        )
+
+    def geocentric(self, times):
+        """
+        Interpolate the geocentric ephemeris at timestamps.
+
+        Timestamps between two timestamps of the table on different UTC days
+        are calculated directly using the algorithm.
+
+        Parameters
+        ----------
+        times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+            Timestamps - must be localized and within the table. Arrays of
+            ``numpy.datetime64`` or int64 nanoseconds since 1970-01-01 are
+            interpreted as UTC.
+
+        Returns
+        -------
+        Ephemeris
+            Geocentric solar ephemeris, which can be projected to locations
+            using :py:func:`~solposx.solarposition.topocentric`.
+
+        Raises
+        ------
+        ValueError
+            Raised if a timestamp is outside the table.
+        """
+        time = _to_time_bundle(times)
+        day = 86400 * 10**9
+        start_days, start_ticks = divmod(self._start, day)
+        # position of the timestamps in steps of the table
+        position = (time.days - start_days) + (time.fraction - start_ticks / day)
+        position = position * (day / self._step)
+        # timestamps of the table are not interpolated
+        nearest = np.rint(position)
+        position = np.where(np.abs(position - nearest) < 1e-6, nearest, position)
+        if np.any(position < 0) or np.any(position > len(self) - 1):
+            raise ValueError(
+                f"The timestamps must be between {self.start} and {self.end}, "
+                "the range of the table."
+            )
+        index = np.minimum(position.astype(np.int64), len(self) - 2)
+        weight = position - index
+        lower = self._data[index]
+        upper = self._data[index + 1]
+        terms = {}
+        for column, name in enumerate(self.terms):
+            difference = upper[..., column] - lower[..., column]
+            period = self._periods.get(name)
+            if period is not None:
+                # the shortest difference of angles wrapping around
+                difference = (difference + period / 2) % period - period / 2
+            terms[name] = lower[..., column] + weight * difference
+        # terms may be discontinuous at UTC midnight, so the timestamps
+        # between rows of different days are calculated directly
+        ticks = self._start + index * self._step
+        crossing = (weight > 0) & ((ticks + self._step) // day > ticks // day)
+        if np.any(crossing):
+            geocentric_stage, _ = _get_stages(self.algorithm)
+            direct = geocentric_stage(time._rows(crossing), **self.kwargs)
+            for name in self.terms:
+                terms[name][crossing] = direct[name]
+        return Ephemeris(self.algorithm, time, terms)
+
+
+def main(argv=None):
+    """Precompute a table file from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m solposx.solarposition.ephemeris_table",
+        description="Precompute the geocentric solar ephemeris into a table.",
+    )
+    parser.add_argument("path", help="path of the table file")
+    parser.add_argument("--algorithm", default="sg2")
+    parser.add_argument("--start", default="1980-01-01 00:00Z")
+    parser.add_argument("--end", default="2030-01-01 00:00Z")
+    parser.add_argument("--freq", default="1min")
+    args = parser.parse_args(argv)
+    table = precompute_ephemeris(
+        args.path, args.algorithm, args.start, args.end, freq=args.freq
+    )
+    print(f"Wrote {table} to {args.path}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,178 @@
+import numpy as np
+from solposx import kernels
+from solposx.tools import _broadcast_sites, _solpos_output, _to_time_bundle
+
+# location-independent and location-dependent stages of each algorithm
+_STAGES = {
+    "iqbal": (kernels.iqbal_geocentric, kernels.iqbal_topocentric),
+    "michalsky": (kernels.michalsky_geocentric, kernels.michalsky_topocentric),
+    "noaa": (kernels.noaa_geocentric, kernels.noaa_topocentric),
+    "psa": (kernels.psa_geocentric, kernels.psa_topocentric),
+    "sg2": (kernels.sg2_geocentric, kernels.sg2_topocentric),
+    "usno": (kernels.usno_geocentric, kernels.usno_topocentric),
+    "walraven": (kernels.walraven_geocentric, kernels.walraven_topocentric),
+}
+
+
+class Ephemeris:
+    """
+    Geocentric solar ephemeris of a solar position algorithm.
+
+    The location-independent part of a solar position algorithm, returned by
+    :py:func:`~solposx.solarposition.geocentric`. It can be projected to any
+    number of locations using :py:func:`~solposx.solarposition.topocentric`.
+
+    Parameters
+    ----------
+    algorithm : str
+        Name of the solar position algorithm.
+    time : TimeBundle
+        Time decomposition of the timestamps.
+    terms : dict
+        Dictionary of arrays with the location-independent quantities of the
+        algorithm, e.g., the declination. The keys and units depend on the
+        algorithm, see the ``<algorithm>_geocentric`` functions in
+        :py:mod:`solposx.kernels`.
+
+    Attributes
+    ----------
+    index : pandas.Index
+        Timestamps used as the index of the returned DataFrames.
+    """
+
+    def __init__(self, algorithm, time, terms):
+        self.algorithm = algorithm
+        self.time = time
+        self.terms = terms
+
+    @property
+    def index(self):
+        return self.time.index
+
+    def __len__(self):
+        return len(self.time.days)
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(algorithm={self.algorithm!r}, "
+            f"terms={list(self.terms)}, length={len(self)})"
+        )
+
+
+def _get_stages(algorithm):
+    try:
+        return _STAGES[algorithm]
+    except KeyError:
+        raise ValueError(
+            f"Unknown algorithm: {algorithm}. Available options are: {list(_STAGES)}."
+        ) from None
+
+
+def geocentric(times, algorithm, **kwargs):
+    """
+    Calculate the location-independent part of a solar position algorithm.
+
+    Most of the computational effort of a solar position algorithm, e.g.,
+    the Julian date, the ecliptic coordinates, the declination, and the
+    sidereal time, only depends on time. This function calculates these
+    quantities once, such that the resulting ephemeris can be projected to
+    many locations using :py:func:`topocentric` at the cost of a few
+    trigonometric operations per location.
+
+    Parameters
+    ----------
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+        Timestamps - must be localized. Arrays of ``numpy.datetime64`` or
+        int64 nanoseconds since 1970-01-01 are interpreted as UTC.
+    algorithm : str
+        Solar position algorithm. Can be one of ``'iqbal'``,
+        ``'michalsky'``, ``'noaa'``, ``'psa'``, ``'sg2'``, ``'usno'``, or
+        ``'walraven'``.
+    **kwargs
+        Location-independent parameters of the algorithm, i.e., ``delta_t``
+        for ``'noaa'`` and ``'usno'``, ``gmst_option`` for ``'usno'``,
+        ``julian_date`` for ``'michalsky'``, ``coefficients`` for
+        ``'psa'``, and ``dtype`` for all algorithms.
+
+    Returns
+    -------
+    Ephemeris
+        Geocentric solar ephemeris.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options.
+
+    See Also
+    --------
+    topocentric
+
+    Examples
+    --------
+    >>> ephemeris = geocentric(times, 'noaa')
+    >>> solpos = topocentric(ephemeris, latitudes, longitudes)
+    """
+    geocentric_stage, _ = _get_stages(algorithm)
+    time = _to_time_bundle(times)
+    return Ephemeris(algorithm, time, geocentric_stage(time, **kwargs))
+
+
+def topocentric(ephemeris, latitude, longitude=None, *, output="dataframe", **kwargs):
+    """
+    Calculate the solar position at a location from a geocentric ephemeris.
+
+    Location-dependent part of the solar position algorithm used to
+    calculate ``ephemeris``. The result is identical to that of the
+    corresponding function in :py:mod:`solposx.solarposition`.
+
+    Parameters
+    ----------
+    ephemeris : Ephemeris
+        Geocentric solar ephemeris calculated using :py:func:`geocentric`.
+    latitude : float, array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
+    **kwargs
+        Location-dependent parameters of the algorithm, i.e.,
+        ``spencer_correction`` for ``'michalsky'``, and ``elevation``,
+        ``pressure``, and ``temperature`` for ``'sg2'``.
+
+    Returns
+    -------
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        Solar position, depending on ``output``. A DataFrame has the same
+        index and columns as the corresponding function in
+        :py:mod:`solposx.solarposition`. A dictionary and a record array
+        have the same columns, and an ndarray has one column per column of
+        the DataFrame.
+
+    See Also
+    --------
+    geocentric
+    """
+    _, topocentric_stage = _get_stages(ephemeris.algorithm)
+    site_params = [latitude, longitude]
+    if "elevation" in kwargs:
+        site_params.append(kwargs.pop("elevation"))
+    time, site_params, index = _broadcast_sites(ephemeris.time, *site_params)
+    terms = ephemeris.terms
+    if np.ndim(time.days) == 2:
+        # project the ephemeris to all combinations of times and sites
+        terms = {name: value[:, np.newaxis] for name, value in terms.items()}
+    if len(site_params) == 3:
+        kwargs["elevation"] = site_params.pop()
+    result = topocentric_stage(terms, *site_params, **kwargs)
+    return _solpos_output(result, index, output)
@@ -1,10 +1,27 @@
-import pandas as pd
 import numpy as np
-from pvlib.tools import acosd, sind, cosd
-from solposx.tools import _pandas_to_utc, _fractional_hour
+from solposx import kernels
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
 
 
-def iqbal(times, latitude, longitude):
+def iqbal(
+    times,
+    latitude,
+    longitude=None,
+    *,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
+):
     """
     Calculate solar position using the Iqbal algorithm.
 
@@ -12,21 +29,67 @@ def iqbal(times, latitude, longitude):
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - zenith : actual sun zenith (not accounting for refraction).
@@ -39,64 +102,16 @@ def iqbal(times, latitude, longitude):
     .. [2] J. W. Spencer, "Fourier series representation of the position of the
        Sun," Search, vol. 2, no. 5, pp. 172, 1971.
     """
-    times_utc = _pandas_to_utc(times)
+    time = _to_time_bundle(times)
+    time, (latitude, longitude), index = _broadcast_sites(time, latitude, longitude)
 
-    dayofyear = times_utc.dayofyear
-    day_angle = 2 * np.pi * (dayofyear - 1) / 365  # [radians]
-
-    declination = (
-        +0.006918
-        - 0.399912 * np.cos(day_angle)
-        + 0.070257 * np.sin(day_angle)
-        - 0.006758 * np.cos(2 * day_angle)
-        + 0.000907 * np.sin(2 * day_angle)
-        - 0.002697 * np.cos(3 * day_angle)
-        + 0.00148 * np.sin(3 * day_angle)
-    ) * (
-        180 / np.pi
-    )  # [degrees]
-
-    # equation of time [minutes]
-    eot = (
-        (
-            0.0000075
-            + 0.001868 * np.cos(day_angle)
-            - 0.032077 * np.sin(day_angle)
-            - 0.014615 * np.cos(2 * day_angle)
-            - 0.040849 * np.sin(2 * day_angle)
-        )
-        * 1440
-        / 2
-        / np.pi
-    )
-
-    # hour angle [degrees]
-    hour_angle = (_fractional_hour(times_utc) - 12) * 15 + longitude + eot / 4
-
-    zenith = acosd(
-        sind(declination) * sind(latitude)
-        + cosd(declination) * cosd(latitude) * cosd(hour_angle)
-    )
-
-    # The azimuth function provided in [1] does not always select the right
-    # quadrant. Therefore, this implementation uses the arctan2 method.
-    azimuth = (
-        np.rad2deg(
-            np.arctan2(
-                sind(hour_angle) * cosd(declination),
-                cosd(hour_angle) * sind(latitude) * cosd(declination)
-                - cosd(latitude) * sind(declination),
-            )
-        )
-        + 180
-    )
-
-    result = pd.DataFrame(
-        {
-            "elevation": 90 - zenith,
-            "zenith": zenith,
-            "azimuth": azimuth,
-        },
-        index=times,
+    result = _evaluate_in_chunks(
+        kernels.iqbal,
+        (time, latitude, longitude),
+        {"dtype": dtype, "backend": backend},
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
+    return _solpos_output(result, index, output)
@@ -1,12 +1,28 @@
-from pvlib.tools import sind, cosd, asind
 import numpy as np
-import pandas as pd
-from solposx import refraction
-from solposx.tools import _pandas_to_utc, _fractional_hour
+from solposx import kernels
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
 
 
 def michalsky(
-    times, latitude, longitude, spencer_correction=True, julian_date="original"
+    times,
+    latitude,
+    longitude=None,
+    spencer_correction=True,
+    julian_date="original",
+    *,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
 ):
     """
     Calculate solar position using the Michalsky algorithm.
@@ -16,16 +32,22 @@ def michalsky(
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
     spencer_correction : bool, default True
         Applies the correction suggested by Spencer [2]_ so the algorithm
         works for all latitudes.
@@ -34,11 +56,51 @@ def michalsky(
 
         * ``'original'``: calculation based on Michalsky's paper [1]_.
         * ``'pandas'``: calculation using a pandas built-in function
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - apparent_elevation : sun elevation, accounting for
@@ -85,98 +147,21 @@ def michalsky(
     .. [4] J. J. Michalsky, "Errata," Solar Energy, vol. 43, no. 5,
        pp. 323, 1989, :doi:`10.1016/0038-092x(89)90122-9`.
     """
-    times_utc = _pandas_to_utc(times)
+    time = _to_time_bundle(times)
+    time, (latitude, longitude), index = _broadcast_sites(time, latitude, longitude)
 
-    hour = _fractional_hour(times_utc)
-
-    if julian_date == "original":
-        year = times_utc.year
-        day = times_utc.dayofyear
-        delta = year - 1949
-        leap = np.floor(delta / 4)
-        jd = 2432916.5 + delta * 365 + leap + day + hour / 24
-    elif julian_date == "pandas":
-        jd = times_utc.to_julian_date()
-    else:
-        raise ValueError("`julian_date` has to be either `original` or `pandas`.")
-
-    n = jd - 2451545.0
-
-    # L - mean longitude [degrees]
-    L = 280.460 + 0.9856474 * n
-    # L has to be between 0 and 360 deg
-    L = L % 360
-
-    # g - mean anomaly [degrees]
-    g = 357.528 + 0.9856003 * n
-    # g has to be between 0 and 360 deg
-    g = g % 360
-
-    # l - ecliptic longitude [degrees]
-    l = L + 1.915 * sind(g) + 0.02 * sind(2 * g)
-    # l has to be between 0 and 360 deg
-    l = l % 360
-
-    # ep - obliquity of the ecliptic [degrees]
-    ep = 23.439 - 0.0000004 * n
-
-    # ra - right ascension [degrees]
-    ra = np.rad2deg(np.arctan2(cosd(ep) * sind(l), cosd(l)))
-    # ra has to be between 0 and 360 deg
-    ra = ra % 360
-
-    # dec - declination angle [degrees]
-    dec = asind(sind(ep) * sind(l))
-
-    # gmst - Greenwich mean sidereal time [hr]
-    gmst = 6.697375 + 0.0657098242 * n + hour
-    # gmst has to be between 0 and 24 h
-    gmst = gmst % 24
-
-    # lmst - local mean sideral time [hr]
-    lmst = gmst + longitude / 15  # to convert deg to h, divide with 15
-    # lmst has to be between 0 and 24 h
-    lmst = lmst % 24
-
-    # ha - hour angle [hr]
-    ha = lmst - ra / 15
-    # ha has to be between -12 and 12 h
-    ha = (ha + 12) % 24 - 12
-
-    # el - solar elevation angle [degrees]
-    el = asind(
-        sind(dec) * sind(latitude) + cosd(dec) * cosd(latitude) * cosd(15 * ha)
-    )  # to convert h to deg, multiply with 15
-
-    # az - azimuth [degrees]
-    az = asind(-cosd(dec) * sind(15 * ha) / cosd(el))
-
-    if spencer_correction:
-        # Spencer correction for the azimuth quadrant assignment
-        cos_az = sind(dec) - sind(el) * sind(latitude)
-        az = np.where((cos_az >= 0) & (sind(az) < 0), 360 + az, az)
-        az = np.where(cos_az < 0, 180 - az, az)
-    else:
-        # Original Michalsky implementation does not work for all latitudes
-        # calcualte critical elevation
-        elc = asind(sind(dec) / sind(latitude))
-        # correct azimuth using critical elevation
-        az = np.where(el >= elc, 180 - az, az)
-        az = np.where((el <= elc) & (ha > 0), az + 360, az)
-        az = az % 360
-
-    # refraction correction
-    el = np.array(el)  # convert from Index to array
-    r = refraction.michalsky(el)
-
-    result = pd.DataFrame(
+    result = _evaluate_in_chunks(
+        kernels.michalsky,
+        (time, latitude, longitude),
         {
-            "elevation": el,
-            "apparent_elevation": el + r,
-            "zenith": 90 - el,
-            "apparent_zenith": 90 - (el + r),
-            "azimuth": az,
+            "spencer_correction": spencer_correction,
+            "julian_date": julian_date,
+            "dtype": dtype,
+            "backend": backend,
         },
-        index=times,
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
+    return _solpos_output(result, index, output)
@@ -1,12 +1,14 @@
 import requests
 import pandas as pd
 import io
+from solposx.tools import _solpos_output
 
 URL = 'https://ssd.jpl.nasa.gov/api/horizons.api'
 
 
 def nasa_horizons(latitude, longitude, start, end, elevation=0., *,
-                  time_step='1h', refraction_correction=False, url=URL):
+                  time_step='1h', refraction_correction=False, url=URL,
+                  output='dataframe'):
     """
     Retrieve solar positions from NASA's Horizons web service.
 
@@ -47,10 +49,16 @@ def nasa_horizons(latitude, longitude, start, end, elevation=0., *,
     url : str, optional
         API endpoint. The default is
         ``'https://ssd.jpl.nasa.gov/api/horizons.api'``.
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, the time index is
+        discarded.
 
     Returns
     -------
-    pandas.DataFrame
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
         DataFrame with the following columns in degrees (note that all columns
         except azimuth are prefixed with `'apparent_'` if
         ``refraction_correction=True``.)
@@ -153,4 +161,7 @@ def nasa_horizons(latitude, longitude, start, end, elevation=0., *,
         del data['Unnamed: 1']
     except KeyError:
         pass
+    if output != 'dataframe':
+        return _solpos_output({name: data[name].to_numpy() for name in data},
+                              data.index, output)
     return data
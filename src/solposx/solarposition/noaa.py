@@ -1,12 +1,28 @@
-import pandas as pd
-from pvlib.tools import sind, cosd, asind, acosd, tand
 import numpy as np
-from pvlib import spa
-from solposx import refraction
-from solposx.tools import _pandas_to_utc, _fractional_hour
-
-
-def noaa(times, latitude, longitude, *, delta_t=67.0):
+from solposx import kernels
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
+
+
+def noaa(
+    times,
+    latitude,
+    longitude=None,
+    *,
+    delta_t=67.0,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
+):
     """
     Calculate solar position using the NOAA algorithm.
 
@@ -21,27 +37,73 @@ def noaa(times, latitude, longitude, *, delta_t=67.0):
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
     delta_t : numeric, default 67.0
         Difference between terrestrial time and UT1.
         If ``delta_t`` is None, uses :py:func:`pvlib.spa.calculate_deltat`
         using ``times.year`` and ``times.month`` from pandas.DatetimeIndex.
         For most simulations the default ``delta_t`` is sufficient.
         The USNO has historical and forecasted ``delta_t`` [3]_. [seconds]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - apparent_elevation : sun elevation, accounting for
@@ -65,103 +127,16 @@ def noaa(times, latitude, longitude, *, delta_t=67.0):
     .. [3] USNO delta T:
        https://maia.usno.navy.mil/products/deltaT
     """
-    times_utc = _pandas_to_utc(times)
-    julian_date = times_utc.to_julian_date()
-    jc = (julian_date - 2451545) / 36525
-
-    # Allow for latitude of -90 and 90 on Ubunty and MacOS
-    if latitude == 90:
-        latitude += -1e-6
-    elif latitude == -90:
-        latitude += 1e-6
-
-    if delta_t is None:
-        delta_t = spa.calculate_deltat(times_utc.year, times_utc.month)
-
-    # [degrees]
-    mean_long = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360
-
-    mean_anom = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
-
-    eccent_earth_orbit = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
-
-    sun_eq_ctr = (
-        sind(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
-        + sind(2 * mean_anom) * (0.019993 - 0.000101 * jc)
-        + sind(3 * mean_anom) * 0.000289
-    )
-
-    sun_true_long = mean_long + sun_eq_ctr
-
-    sun_app_long = sun_true_long - 0.00569 - 0.00478 * sind(125.04 - 1934.136 * jc)
-
-    mean_obliq_ecliptic = (
-        23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
-    )
-
-    obliq_corr = mean_obliq_ecliptic + 0.00256 * cosd(125.04 - 1934.136 * jc)
-
-    sun_declin = asind(sind(obliq_corr) * sind(sun_app_long))
-
-    var_y = tand(obliq_corr / 2) ** 2
-
-    eot = 4 * np.degrees(
-        +var_y * sind(2 * mean_long)
-        - 2 * eccent_earth_orbit * sind(mean_anom)
-        + 4 * eccent_earth_orbit * var_y * sind(mean_anom) * cosd(2 * mean_long)
-        - 0.5 * (var_y**2) * sind(4 * mean_long)
-        - 1.25 * (eccent_earth_orbit**2) * sind(2 * mean_anom)
-    )
-
-    minutes = _fractional_hour(times_utc) * 60
-
-    true_solar_time = (minutes + eot + 4 * longitude) % 1440
-
-    hour_angle = np.where(
-        true_solar_time / 4 < 0,
-        true_solar_time / 4 + 180,
-        true_solar_time / 4 - 180,
-    )
-
-    zenith = acosd(
-        sind(latitude) * sind(sun_declin)
-        + cosd(latitude) * cosd(sun_declin) * cosd(hour_angle)
-    )
-
-    azimuth = np.where(
-        hour_angle > 0,
-        (
-            acosd(
-                ((sind(latitude) * cosd(zenith)) - sind(sun_declin))
-                / (cosd(latitude) * sind(zenith))
-            )
-            + 180 % 360
-        ),
-        (
-            540
-            - acosd(
-                ((sind(latitude) * cosd(zenith)) - sind(sun_declin))
-                / (cosd(latitude) * sind(zenith))
-            )
-        )
-        % 360,
-    )
-
-    elevation = 90 - zenith
-    refraction_correction = refraction.hughes(
-        elevation=np.array(elevation), pressure=101325, temperature=10
-    )
-    # Minor deviation of the refraction correction used by NOAA
-    refraction_correction[elevation > 85] = 0
-
-    result = pd.DataFrame(
-        {
-            "elevation": elevation,
-            "apparent_elevation": elevation + refraction_correction,
-            "zenith": zenith,
-            "apparent_zenith": zenith - refraction_correction,
-            "azimuth": azimuth,
-        },
-        index=times,
+    time = _to_time_bundle(times)
+    time, (latitude, longitude), index = _broadcast_sites(time, latitude, longitude)
+
+    result = _evaluate_in_chunks(
+        kernels.noaa,
+        (time, latitude, longitude),
+        {"delta_t": delta_t, "dtype": dtype, "backend": backend},
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
+    return _solpos_output(result, index, output)
@@ -1,10 +1,31 @@
-import pandas as pd
 import numpy as np
-from solposx.tools import _pandas_to_utc, _fractional_hour
-from solposx import refraction
-
-
-def sg2(times, latitude, longitude, elevation=0, *, pressure=101325, temperature=12):
+from solposx import kernels
+from solposx.site import Fleet, _site_parameters
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
+
+
+def sg2(
+    times,
+    latitude,
+    longitude=None,
+    elevation=0,
+    *,
+    pressure=101325,
+    temperature=12,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
+):
     """
     Calculate solar position using the SG2 algorithm.
 
@@ -13,27 +34,74 @@ def sg2(times, latitude, longitude, elevation=0, *, pressure=101325, temperature
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
-    elevation : float, default : 0
-        Altitude of the location of interest. [m]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    elevation : float or array-like, default : 0
+        Altitude of the location of interest. Broadcast like ``latitude``.
+        [m]
     pressure : float, default : 101325
         Annual average air pressure. [Pa]
     temperature : float, default : 12
         Annual average air temperature. [°C]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - apparent_elevation : sun elevation, accounting for
@@ -59,210 +127,38 @@ def sg2(times, latitude, longitude, elevation=0, *, pressure=101325, temperature
        Solar Energy, vol. 86, no. 10, pp. 3072-3083, 2012,
        :doi:`10.1016/j.solener.2012.07.018`
     """
-    # convert coordinates to [rad]
-    latitude = np.deg2rad(latitude)
-    longitude = np.deg2rad(longitude)
-
-    # convert time to UTC
-    times_utc = _pandas_to_utc(times)
-
-    year = times_utc.year
-    month = times_utc.month
-    day = times_utc.day  # this is day of month and not day of year
-    hour = _fractional_hour(times_utc)
-
-    # year in decimal form
-    year_dec = year + (month - 0.5) / 12
-
-    # parameters for calculating delta_t
-    params_t = pd.DataFrame(
-        np.array(
-            [
-                [1975, 45.45, 1.067, -1 / 260, -1 / 718, 0, 0],  # [1980, 1986]
-                [
-                    2000,
-                    63.86,
-                    0.3345,
-                    -0.060374,
-                    0.0017275,
-                    6.518 * 10**-4,
-                    2.374 * 10**-5,
-                ],  # [1986, 2005]
-                [2000, 63.48, 0.2040, 0.005576, 0, 0, 0],  # [2005, 2030]
-            ]
-        ),
-        columns=["y", "a_0", "a_1", "a_2", "a_3", "a_4", "a_5"],
-    )
-
-    if (year_dec.min() < 1980) | (year_dec.max() > 2030):
-        raise ValueError("The algorithm is valid only between 1980 and 2030")
-
-    row = np.where(
-        (year_dec >= 1980) & (year_dec <= 1986),
-        0,
-        np.where(
-            (year_dec >= 1986) & (year_dec <= 2005),
-            1,
-            np.where((year_dec >= 2005) & (year_dec <= 2030), 2, np.nan),
-        ),
-    ).astype(int)
-
-    delta_t = 0.0
-    for k in range(0, 6):
-        delta_t += params_t[f"a_{k}"][row] * (year - params_t["y"][row]) ** k
-
-    year_mod = np.where((month == 1) | (month == 2), year - 1, year)
-    month_mod = np.where((month == 1) | (month == 2), month + 12, month)
-
-    # SG2 C-code implementation (differs from journal paper!)
-    jd_ut = (
-        1721028.0
-        + day
-        + np.floor((153.0 * month_mod - 2.0) / 5.0)
-        + 365.0 * year_mod
-        + np.floor(year_mod / 4.0)
-        + hour / 24
-        - 0.5
-        - np.floor(year_mod / 100.0)
-        + np.floor(year_mod / 400.0)
-    )
-
-    jd_tt = jd_ut + delta_t.values / 86400
-
-    jd_ut_mod = jd_ut - 2444239.5
-    jd_tt_mod = jd_tt - 2444239.5
-
-    # Earth heliocentric longitude
-    params = pd.DataFrame(
-        np.array(
-            [
-                [1 / 365.261278, 3.401508 * 10**-2, 1.600780],
-                [1 / 182.632412, 3.486440 * 10**-4, 1.662976],
-                [1 / 29.530634, 3.136227 * 10**-5, -1.195905],
-                [1 / 399.529850, 3.578979 * 10**-5, -1.042052],
-                [1 / 291.956812, 2.676185 * 10**-5, 2.012613],
-                [1 / 583.598201, 2.333925 * 10**-5, -2.867714],
-                [1 / 4652.629372, 1.221214 * 10**-5, 1.225038],
-                [1 / 1450.236684, 1.217941 * 10**-5, -0.828601],
-                [1 / 199.459709, 1.343914 * 10**-5, -3.108253],
-                [1 / 365.355291, 8.499475 * 10**-4, -2.353709],
-            ]
-        ),
-        columns=["f_L", "rho_L", "phi_L"],
-    )
-
-    # I reshape the jd and dataframe in order to do the sum operation
-    jd_tt_mod_reshaped = jd_tt_mod.to_numpy().reshape(len(jd_tt_mod), 1)
-    f_L = params["f_L"].to_numpy().reshape(1, 10)
-    rho_L = params["rho_L"].to_numpy().reshape(1, 10)
-    phi_L = params["phi_L"].to_numpy().reshape(1, 10)
-
-    # Compute the sum term
-    sums = rho_L * np.cos(2 * np.pi * f_L * jd_tt_mod_reshaped - phi_L)
-
-    # Sum along axis 1 (the parameter axis) [rad]
-    a_L = 1 / 58.130101
-    b_L = 1.742145
-
-    L = (sums.sum(axis=1) + a_L * jd_tt_mod + b_L) % (2 * np.pi)
-
-    # Geocentric parameters
-    D_t = -9.933735 * 10**-5  # [rad]
-    xi = 4.263521 * 10**-5  # [rad]
-
-    f_psi = 1 / 6791.164405
-    rho_psi = 8.329092 * 10**-5
-    phi_psi = -2.052757
-
-    # Sun geocentric longitude [rad]
-    D_psi = rho_psi * np.cos(2 * np.pi * f_psi * jd_tt_mod - phi_psi)
-
-    a_e = -6.216374 * 10**-9
-    b_e = 4.091383 * 10**-1
-    f_e = 1 / 6791.164405
-    rho_e = 4.456183 * 10**-5
-    phi_e = 2.660352
-
-    # true Earth obliquityn[rad]
-    epsilon = (
-        rho_e * np.cos(2 * np.pi * f_e * jd_tt_mod - phi_e) + a_e * jd_tt_mod + b_e
+    time = _to_time_bundle(times)
+    time, (latitude, longitude, elevation), index = _broadcast_sites(
+        time, latitude, longitude, elevation
     )
 
-    # Apparent Sun geocentric longitude [rad]
-    Theta = (L + np.pi + D_psi + D_t) % (2 * np.pi)
-
-    # Sun Geocentric declination [rad]
-    decl_g = np.arcsin(np.sin(Theta) * np.sin(epsilon))
-
-    # Sun Geocentric right ascension [rad]
-    ra = np.arctan2(np.sin(Theta) * np.cos(epsilon), np.cos(Theta))
-
-    # mean sidereal time [rad]
-    mst = (6.300388099 * jd_ut_mod + 1.742079) % (2 * np.pi)
-
-    a = 6378140.0  # m
-    # b = 6357014.436696  # m
-    f = 1 / 298.257282697
-
-    u = np.arctan((1 - f) * np.tan(latitude))
-    x = np.cos(u) + elevation / a * np.cos(latitude)
-    y = (1 - f) * np.sin(u) + elevation / a * np.sin(latitude)
-
-    # omega_g is the geocentric hour angle
-    # no formula is given in the paper to calcualte this
-    # using the formulas from Reda and Andreas publication
-
-    # apparent sidereal time at Greenwich [rad]
-    v = mst + D_psi * np.cos(epsilon)
-
-    # geocentric hour angle [rad]
-    omega_g = v + longitude - ra
-
-    # Parallax effects in the Sun right ascension [rad]
-    D_r_a = -x * np.sin(omega_g) / np.cos(decl_g) * xi
-
-    # Sun topocentric declination [rad]
-    declination = (
-        decl_g + (x * np.cos(omega_g) * np.sin(decl_g) - y * np.cos(decl_g)) * xi
-    )
-
-    # Sun topocentric hour angle [rad]
-    omega = mst + D_psi * np.cos(epsilon) - ra + longitude - D_r_a
-
-    # Sun topocentric azimuth [rad]
-    solar_azimuth = (
-        np.arctan2(
-            np.sin(omega),
-            np.cos(omega) * np.sin(latitude) - np.tan(declination) * np.cos(latitude),
-        )
-        + np.pi
-    )
-
-    # Sun topocentric elevation angle without refraction correction [rad]
-    solar_elevation = np.arcsin(
-        np.sin(latitude) * np.sin(declination)
-        + np.cos(latitude) * np.cos(declination) * np.cos(omega)
-    )
-
-    solar_elevation_deg = np.rad2deg(solar_elevation)
-
-    # Atmospheric refraction correction term
-    r = refraction.sg2(np.array(solar_elevation_deg), pressure, temperature)
-
-    result = pd.DataFrame(
+    result = _evaluate_in_chunks(
+        kernels.sg2,
+        (time, latitude, longitude, elevation),
         {
-            "elevation": solar_elevation_deg,
-            "apparent_elevation": solar_elevation_deg + r,
-            "zenith": 90 - solar_elevation_deg,
-            "apparent_zenith": 90 - solar_elevation_deg - r,
-            "azimuth": np.rad2deg(solar_azimuth),
+            "pressure": pressure,
+            "temperature": temperature,
+            "dtype": dtype,
+            "backend": backend,
         },
-        index=times,
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
-
-
-def sg2_c(times, latitude, longitude, elevation=0, *, pressure=101325, temperature=12):
+    return _solpos_output(result, index, output)
+
+
+def sg2_c(
+    times,
+    latitude,
+    longitude=None,
+    elevation=0,
+    *,
+    pressure=101325,
+    temperature=12,
+    output="dataframe",
+):
     """
     Calculate solar position using the SG2 Python package.
 
@@ -275,25 +171,38 @@ def sg2_c(times, latitude, longitude, elevation=0, *, pressure=101325, temperatu
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
-        Must be localized.
-    latitude : float
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
+        Must be localized. Arrays of ``numpy.datetime64`` or int64
+        nanoseconds since 1970-01-01 are interpreted as UTC.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
-    elevation : float, default : 0
-        Altitude of the location of interest. [m]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    elevation : float or array-like, default : 0
+        Altitude of the location of interest. Broadcast like ``latitude``.
+        [m]
     pressure : float, default : 101325
         Annual average air pressure. [Pa]
     temperature : float, default : 12
         Annual average air temperature. [°C]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - apparent_elevation : sun elevation, accounting for
@@ -324,18 +233,57 @@ def sg2_c(times, latitude, longitude, elevation=0, *, pressure=101325, temperatu
             "The sg2_c function requires the sg2 Python package."
         ) from None
 
+    # the parameters of a Fleet form the site axis
+    site_axis = isinstance(latitude, Fleet)
+    latitude, longitude, elevation, pressure, temperature = _site_parameters(
+        latitude, longitude, elevation, pressure, temperature
+    )
+    time = _to_time_bundle(times)
+    column, (latitude, longitude, elevation), index = _broadcast_sites(
+        time, latitude, longitude, elevation, site_axis=site_axis
+    )
+
     # list of geopoints as 2D array of (N,3) where each row is repectively
     # longitude in degrees, latitude in degrees and altitude in meters.
-    geopoints = np.vstack([longitude, latitude, elevation]).T
+    if np.ndim(column.days) == 2:
+        n_sites = index.levshape[1]
+        geopoints = np.column_stack(
+            [np.broadcast_to(p, (n_sites,)) for p in (longitude, latitude, elevation)]
+        )
+    else:
+        geopoints = np.column_stack(
+            np.broadcast_arrays(*np.atleast_1d(longitude, latitude, elevation))
+        )
 
     fields = ["topoc.alpha_S", "topoc.gamma_S0", "geoc.epsilon"]
 
-    ret = sg2_package.sun_position(
-        geopoints,
-        times.values,
-        fields,
-    )
-    elevation_rad = ret.topoc.gamma_S0[0]
+    if np.ndim(column.days) == 2:
+        ret = sg2_package.sun_position(
+            geopoints,
+            time.utc_index.values,
+            fields,
+        )
+        # results are arrays of (sites, times)
+        elevation_rad = ret.topoc.gamma_S0.T
+        azimuth_rad = ret.topoc.alpha_S.T
+    else:
+        # one site per timestamp, the timestamps of each distinct site are
+        # calculated in one call and scattered back to their rows
+        geopoints, site = np.unique(geopoints, axis=0, return_inverse=True)
+        site = np.broadcast_to(site.ravel(), time.days.shape)
+        order = np.argsort(site, kind="stable")
+        bounds = np.searchsorted(site[order], np.arange(len(geopoints) + 1))
+        elevation_rad = np.empty(time.days.shape)
+        azimuth_rad = np.empty(time.days.shape)
+        for i, geopoint in enumerate(geopoints):
+            rows = order[bounds[i] : bounds[i + 1]]
+            ret = sg2_package.sun_position(
+                geopoint[np.newaxis],
+                time.utc_index.values[rows],
+                fields,
+            )
+            elevation_rad[rows] = ret.topoc.gamma_S0[0]
+            azimuth_rad[rows] = ret.topoc.alpha_S[0]
     elevation_deg = np.rad2deg(elevation_rad)
 
     apparent_elevation_rad = sg2_package.topocentric_correction_refraction_SAE(
@@ -344,15 +292,16 @@ def sg2_c(times, latitude, longitude, elevation=0, *, pressure=101325, temperatu
         temperature,
     )
 
-    out = pd.DataFrame(
+    out = _solpos_output(
         {
             "elevation": elevation_deg,
             "apparent_elevation": np.rad2deg(apparent_elevation_rad),
             "zenith": 90 - elevation_deg,
             "apparent_zenith": 90 - np.rad2deg(apparent_elevation_rad),
-            "azimuth": np.degrees(ret.topoc.alpha_S[0]),
+            "azimuth": np.degrees(azimuth_rad),
         },
-        index=times,
+        index,
+        output,
     )
 
     return out
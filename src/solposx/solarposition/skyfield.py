@@ -1,9 +1,11 @@
 """Calculate solar position using Skyfield."""
 
-import pandas as pd
+import numpy as np
+from solposx.site import Fleet, _site_parameters
+from solposx.tools import _broadcast_sites, _solpos_output, _to_time_bundle
 
 
-def skyfield(times, latitude, longitude, *, de="de440.bsp"):
+def skyfield(times, latitude, longitude=None, *, de="de440.bsp", output="dataframe"):
     """
     Calculate solar position using the Skyfield Python package.
 
@@ -14,23 +16,36 @@ def skyfield(times, latitude, longitude, *, de="de440.bsp"):
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
     de : str or Skyfield SpiceKernel, optional, default : 'de440.bsp'
         Ephemeris of choice.
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - zenith : actual sun zenith (not accounting for refraction).
@@ -52,6 +67,14 @@ def skyfield(times, latitude, longitude, *, de="de440.bsp"):
             "The skyfield function requires the skyfield Python package."
         ) from None
 
+    # the parameters of a Fleet form the site axis
+    site_axis = isinstance(latitude, Fleet)
+    latitude, longitude, *_ = _site_parameters(latitude, longitude)
+    time = _to_time_bundle(times)
+    column, (latitude, longitude), index = _broadcast_sites(
+        time, latitude, longitude, site_axis=site_axis
+    )
+
     if isinstance(de, str):
         de = load(de)
 
@@ -60,17 +83,32 @@ def skyfield(times, latitude, longitude, *, de="de440.bsp"):
     earth = de["Earth"]
     sun = de["Sun"]
 
-    dts = TS.from_datetimes(times.to_pydatetime())
-    location = earth + wgs84.latlon(latitude, longitude)
-    alt, az, _ = location.at(dts).observe(sun).apparent().altaz()
+    dts = TS.from_datetimes(time.utc_index.to_pydatetime())
+
+    def altaz(latitude, longitude):
+        location = earth + wgs84.latlon(latitude, longitude)
+        alt, az, _ = location.at(dts).observe(sun).apparent().altaz()
+        return alt.degrees, az.degrees
+
+    if np.ndim(column.days) == 2:
+        # observe the sun from one site at a time
+        n_sites = index.levshape[1]
+        sites = zip(
+            np.broadcast_to(latitude, (n_sites,)),
+            np.broadcast_to(longitude, (n_sites,)),
+        )
+        alt, az = (np.column_stack(a) for a in zip(*[altaz(*s) for s in sites]))
+    else:
+        alt, az = altaz(latitude, longitude)
 
-    result = pd.DataFrame(
+    result = _solpos_output(
         {
-            "elevation": alt.degrees,
-            "zenith": 90 - alt.degrees,
-            "azimuth": az.degrees,
+            "elevation": alt,
+            "zenith": 90 - alt,
+            "azimuth": az,
         },
-        index=times,
+        index,
+        output,
     )
 
     return result
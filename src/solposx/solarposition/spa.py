@@ -1,18 +1,22 @@
 """SPA NREL implementation in Python, wraps pvlib."""
 
+import numpy as np
 import pvlib
+from solposx.site import Fleet, _site_parameters
+from solposx.tools import _broadcast_sites, _solpos_output, _to_time_bundle
 
 
 def spa(
     time,
     latitude,
-    longitude,
+    longitude=None,
     elevation=0.0,
     *,
     air_pressure=101325.0,
     temperature=12.0,
     delta_t=67.0,
     atmos_refract=None,
+    output="dataframe",
     **kwargs,
 ):
     """
@@ -27,18 +31,25 @@ def spa(
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
-    elevation : float, default : 0
-        Altitude of the location of interest. [m]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    elevation : float or array-like, default : 0
+        Altitude of the location of interest. Broadcast like ``latitude``.
+        [m]
     air_pressure : float, default : 101325
         Annual average air pressure. [Pa]
     temperature : float, default : 12
@@ -53,6 +64,11 @@ def spa(
     atmos_refract : float, optional
         The approximate atmospheric refraction (in degrees)
         at sunrise and sunset.
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Extra Parameters
     ----------------
@@ -65,8 +81,10 @@ def spa(
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction). [°]
         - apparent_elevation : sun elevation, accounting for
@@ -92,8 +110,26 @@ def spa(
     """  # slightly modified docstring compared to pvlib original
     # if you want to view the source code for pvlib.solarposition.spa_python, it is
     # located in pvlib/solarposition.py and belongs to the repo pvlib/pvlib-python
+    # the parameters of a Fleet form the site axis
+    site_axis = isinstance(latitude, Fleet)
+    latitude, longitude, elevation, air_pressure, temperature = _site_parameters(
+        latitude, longitude, elevation, air_pressure, temperature
+    )
+    time = _to_time_bundle(time)
+    column, (latitude, longitude, elevation), index = _broadcast_sites(
+        time, latitude, longitude, elevation, site_axis=site_axis
+    )
+    times_utc = time.utc_index
+    if np.ndim(column.days) == 2:
+        # flatten all combinations of times and sites
+        shape = (len(time.days), index.levshape[1])
+        latitude, longitude, elevation, air_pressure, temperature = (
+            np.broadcast_to(param, shape).reshape(-1)
+            for param in (latitude, longitude, elevation, air_pressure, temperature)
+        )
+        times_utc = times_utc.repeat(shape[1])
     solpos = pvlib.solarposition.spa_python(
-        time=time,
+        time=times_utc,
         latitude=latitude,
         longitude=longitude,
         altitude=elevation,
@@ -113,6 +149,8 @@ def spa(
         "equation_of_time",
     ]
 
-    solpos = solpos[reordered_columns]
-
-    return solpos
+    return _solpos_output(
+        {name: solpos[name].to_numpy() for name in reordered_columns},
+        index,
+        output,
+    )
@@ -1,11 +1,29 @@
-import pandas as pd
-from pvlib.tools import sind, cosd, tand, asind
 import numpy as np
-from pvlib import spa
-from solposx.tools import _pandas_to_utc
-
-
-def usno(times, latitude, longitude, *, delta_t=67.0, gmst_option=1):
+from solposx import kernels
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
+
+
+def usno(
+    times,
+    latitude,
+    longitude=None,
+    *,
+    delta_t=67.0,
+    gmst_option=1,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
+):
     """
     Calculate solar position using the USNO algorithm.
 
@@ -13,16 +31,22 @@ def usno(times, latitude, longitude, *, delta_t=67.0, gmst_option=1):
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
     delta_t : numeric, default : 67.0
         Difference between terrestrial time and UT1.
         If ``delta_t`` is None, uses :py:func:`pvlib.spa.calculate_deltat`
@@ -32,11 +56,51 @@ def usno(times, latitude, longitude, *, delta_t=67.0, gmst_option=1):
     gmst_option : int, default : 1
         Different ways of calculating the Greenwich mean sidereal time.
         `gmst_option` needs to be either 1 or 2. See [1]_.
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - zenith : actual sun zenith (not accounting for refraction).
@@ -49,111 +113,21 @@ def usno(times, latitude, longitude, *, delta_t=67.0, gmst_option=1):
     .. [2] USNO delta T:
        https://maia.usno.navy.mil/products/deltaT
     """
-    times_utc = _pandas_to_utc(times)
-
-    if delta_t is None:
-        delta_t = spa.calculate_deltat(times_utc.year, times_utc.month)
-
-    JD = times_utc.to_julian_date()
-
-    D = JD - 2451545.0
-
-    # Mean anomaly of the Sun [deg]
-    g = 357.529 + 0.98560028 * D
-    # ensure g is between 0 and 360
-    g = g % 360
-
-    # Mean longitude of the Sun [deg]
-    q = 280.459 + 0.98564736 * D
-    # ensure q is between 0 and 360
-    q = q % 360
-
-    # Geocentric apparent ecliptic longitude of the Sun
-    # (adjusted for aberration) [deg]
-    L = q + 1.915 * sind(g) + 0.020 * sind(2 * g)
-    # ensure L is between 0 and 360
-    L = L % 360
-
-    # Mean obliquity of the ecliptic [deg]
-    e = 23.439 - 0.00000036 * D
-
-    # Sun's right ascension angle [hours]
-    RA = np.rad2deg(np.arctan2(cosd(e) * sind(L), cosd(L))) / 15
-    RA = RA % 24
-
-    # Sun's declination angle [deg]
-    d = asind(sind(e) * sind(L))
-
-    # JD_0 is the Julian date of the previous midnight (0h) UT1
-    midnight = pd.DatetimeIndex(
-        [t.replace(hour=0, minute=0, second=0) for t in times_utc]
-    )
-
-    JD_0 = midnight.to_julian_date()
-
-    # Hours of UT1 elapsed since the previous midnight
-    H = (JD - JD_0) * 24
-
-    DAY_UT = JD_0 - 2451545.0
-
-    JD_TT = JD + delta_t / 86400.0
-
-    D_TT = JD_TT - 2451545.0
-
-    T = D_TT / 36525  # centuries since the year 2000
-
-    # Greenwich mean sidereal time [hours]
-    if gmst_option == 1:
-        GMST = (
-            6.697375
-            + 0.065707485828 * DAY_UT
-            + 1.0027379 * H
-            + 0.0854103 * T
-            + 0.0000258 * T**2
-        )
-    elif gmst_option == 2:
-        GMST = 6.697375 + 0.065709824279 * DAY_UT + 1.0027379 * H + 0.0000258 * T**2
-    else:
-        raise ValueError(f"{gmst_option} is not a valid `gmst_option`")
-
-    GMST = GMST % 24
-
-    # Longitude of the ascending node of the Moon [deg]
-    omega = 125.04 - 0.052954 * D_TT
-
-    # Mean Longitude of the Sun [deg]
-    LS = 280.47 + 0.98565 * D_TT
-
-    # Nutation in longitude [hours]
-    longitude_nutation = -0.000319 * sind(omega) - 0.000024 * sind(2 * LS)
-
-    # obliquity of the ecliptic
-    epsilon = 23.4393 - 0.0000004 * D_TT
-
-    # equation of equinoxes [hours]
-    eqeq = longitude_nutation * cosd(epsilon)
-
-    # Greenwich apparent sidereal time [hours]
-    GAST = GMST + eqeq
-
-    # Local hour angle [deg], logitude is positive if it is east
-    LHA = (GAST - RA) * 15 + longitude
-
-    # solar elevation [deg]
-    elevation = asind(cosd(LHA) * cosd(d) * cosd(latitude) + sind(d) * sind(latitude))
-
-    # azimuth [deg]
-    azimuth = np.rad2deg(
-        np.arctan2(-sind(LHA), (tand(d) * cosd(latitude) - sind(latitude) * cosd(LHA)))
-    )
-    azimuth = azimuth % 360
+    time = _to_time_bundle(times)
+    time, (latitude, longitude), index = _broadcast_sites(time, latitude, longitude)
 
-    result = pd.DataFrame(
+    result = _evaluate_in_chunks(
+        kernels.usno,
+        (time, latitude, longitude),
         {
-            "elevation": elevation,
-            "zenith": 90 - elevation,
-            "azimuth": azimuth,
+            "delta_t": delta_t,
+            "gmst_option": gmst_option,
+            "dtype": dtype,
+            "backend": backend,
         },
-        index=times,
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
+    return _solpos_output(result, index, output)
@@ -1,9 +1,27 @@
-import pandas as pd
 import numpy as np
-from solposx.tools import _pandas_to_utc, _fractional_hour
-
-
-def walraven(times, latitude, longitude):
+from solposx import kernels
+from solposx.tools import (
+    _broadcast_sites,
+    _evaluate_in_chunks,
+    _solpos_output,
+    _to_time_bundle,
+)
+
+
+def walraven(
+    times,
+    latitude,
+    longitude=None,
+    *,
+    dtype=np.float64,
+    backend="numpy",
+    chunksize=None,
+    max_memory=None,
+    dedupe=False,
+    daylight_only=False,
+    daylight_threshold=-1.0,
+    output="dataframe",
+):
     """
     Calculate solar position using the Walraven algorithm.
 
@@ -13,21 +31,67 @@ def walraven(times, latitude, longitude):
 
     Parameters
     ----------
-    times : pandas.DatetimeIndex
+    times : pandas.DatetimeIndex, numpy.ndarray, or TimeBundle
         Timestamps - must be localized. Prior to 1970 and far in
         the future UTC and UT1 may deviate significantly. For such use
-        cases,  UT1 times should be provided.
-    latitude : float
+        cases,  UT1 times should be provided. Arrays of ``numpy.datetime64``
+        or int64 nanoseconds since 1970-01-01 are interpreted as UTC. A
+        :py:class:`~solposx.tools.TimeBundle` reuses cached time fields.
+    latitude : float, array-like, Site, or Fleet
         Latitude in decimal degrees. Positive north of equator, negative
-        to south. [degrees]
-    longitude : float
+        to south. An array of shape (N,) or (N, 1) specifies one site per
+        timestamp. An array of shape (1, M) returns the solar position for
+        all combinations of times and sites. A :py:class:`~solposx.Site` or
+        :py:class:`~solposx.Fleet` provides all location parameters. [degrees]
+    longitude : float or array-like, optional
         Longitude in decimal degrees. Positive east of prime meridian,
-        negative to west. [degrees]
+        negative to west. Broadcast like ``latitude``. Omitted if
+        ``latitude`` is a Site or Fleet. [degrees]
+    dtype : data-type, default : numpy.float64
+        Floating-point precision of the calculation, ``numpy.float32`` or
+        ``numpy.float64``. See :ref:`single-precision` for the accuracy of
+        single precision.
+    backend : str, default : 'numpy'
+        Implementation of the calculation, ``'numpy'`` or ``'numba'``. See
+        :ref:`numba-backend`. If numba is not installed, the calculation
+        falls back to NumPy with a warning.
+    chunksize : int, optional
+        Number of timestamps calculated at a time. The temporary arrays of
+        the calculation are then bounded by the chunk size rather than the
+        number of timestamps. The results are identical to calculating all
+        timestamps at once.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk, from which the
+        number of timestamps per chunk is derived. If ``chunksize`` is also
+        specified, the smaller chunk is used. [bytes]
+    dedupe : bool, default : False
+        Calculate the unique timestamps and sites only and copy the results
+        to the duplicates, e.g., for joined datasets with several rows per
+        pair of timestamp and site. The results are identical.
+    daylight_only : bool, default : False
+        Calculate the timestamps and sites with the sun above
+        ``daylight_threshold`` only and set the other rows to NaN, e.g., to
+        skip the nights of a PV time series. The rows are screened with a
+        low-precision elevation and a safety margin, such that no row with
+        the sun above the threshold is skipped in the years 1700 to 2300.
+        If a timestamp is outside these years, all rows are calculated. The
+        calculated rows are identical.
+    daylight_threshold : float, default : -1.0
+        Solar elevation, not accounting for refraction, below which rows are
+        skipped if ``daylight_only`` is True. The default includes sunrise
+        and sunset accounting for refraction. [degrees]
+    output : str, default : 'dataframe'
+        Type of the returned solar position. Can be one of ``'dataframe'``,
+        ``'dict'`` (dictionary of arrays), ``'recarray'`` (NumPy record
+        array), or ``'ndarray'`` (two-dimensional array with the columns of
+        the DataFrame). Except for ``'dataframe'``, no index is constructed.
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame with the following columns (all values in degrees):
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+        DataFrame indexed by the times, or by a MultiIndex of times and sites
+        if there are several sites, with the following columns (all values
+        in degrees):
 
         - elevation : actual sun elevation (not accounting for refraction).
         - zenith : actual sun zenith (not accounting for refraction).
@@ -43,87 +107,16 @@ def walraven(times, latitude, longitude):
        Approximate Solar Position (1950–2050)," Solar Energy, vol. 42, no. 4,
        pp. 353, 1989, :doi:`10.1016/0038-092x(89)90039-x`.
     """
-    times_utc = _pandas_to_utc(times)
-
-    longitude = -longitude  # outdated convention used by Walraven
-
-    year = times_utc.year
-    day = times_utc.dayofyear
-    T = _fractional_hour(times_utc)
-
-    delta = year - 1980
-
-    leap = np.int64(delta / 4.0)  # round towards zero
-
-    time = delta * 365 + leap + day - 1 + T / 24
-
-    time = np.where(delta == (leap * 4), time - 1, time)
-
-    time = np.where((delta < 0) & (delta != (leap * 4)), time - 1, time)
-
-    # [rad]
-    theta = 2 * np.pi * time / 365.25
-
-    # [rad]
-    g = -0.031271 - 4.53963 * 10**-7 * time + theta
-
-    # longitude of the sun [rad]
-    L = (
-        4.900968
-        + (3.67474 * 10**-7) * time
-        + (0.033434 - 2.3 * 10**-9 * time) * np.sin(g)
-        + 0.000349 * np.sin(2 * g)
-        + theta
-    )
-
-    # angle between the plane of the ecliptic and the plane of the
-    # celestial equator [rad]
-    epsilon = np.deg2rad(23.4420) - np.deg2rad(3.56 * 10**-7) * time
-
-    SEL = np.sin(L)
-
-    A1 = SEL * np.cos(epsilon)
-
-    A2 = np.cos(L)
-
-    # right angle [rad]
-    RA = np.arctan2(A1, A2)
-    RA = np.where(RA < 0, RA + 2 * np.pi, RA)
-
-    # declination [rad]
-    DECL = np.arcsin(SEL * np.sin(epsilon))
-
-    # sidereal time [rad]
-    ST = 1.759335 + 2 * np.pi * (time / 365.25 - delta) + 3.694 * 10**-7 * time
-    ST = np.where(ST >= (2 * np.pi), ST - 2 * np.pi, ST)
-
-    # local sidereal time [rad]
-    S = ST - np.deg2rad(longitude) + np.deg2rad(T * 15)
-    S = np.where(S >= (2 * np.pi), S - 2 * np.pi, S)
-
-    # hour angle [rad]
-    H = RA - S
-
-    # latitude in [rad]
-    PHI = np.deg2rad(latitude)
-
-    # elevation [rad]
-    E = np.arcsin(np.sin(PHI) * np.sin(DECL) + np.cos(PHI) * np.cos(DECL) * np.cos(H))
-
-    # azimuth [deg]
-    A = np.rad2deg(np.arcsin(np.cos(DECL) * np.sin(H) / np.cos(E)))
-
-    # azimuth quadrant assignment - Spencer (1989) correct for all longitudes
-    cos_az = np.sin(DECL) - np.sin(E) * np.sin(PHI)
-    A = np.where((cos_az >= 0) & (np.sin(np.deg2rad(A)) < 0), 360 + A, A)
-    A = np.where(cos_az < 0, 180 - A, A)
-
-    result = pd.DataFrame(
-        {
-            "elevation": np.rad2deg(E),
-            "zenith": 90 - np.rad2deg(E),
-            "azimuth": A,
-        },
-        index=times,
+    time = _to_time_bundle(times)
+    time, (latitude, longitude), index = _broadcast_sites(time, latitude, longitude)
+
+    result = _evaluate_in_chunks(
+        kernels.walraven,
+        (time, latitude, longitude),
+        {"dtype": dtype, "backend": backend},
+        chunksize,
+        max_memory,
+        dedupe=dedupe,
+        daylight=daylight_threshold if daylight_only else None,
     )
-    return result
+    return _solpos_output(result, index, output)
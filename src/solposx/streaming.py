@@ -0,0 +1,148 @@
+"""Solar position of unbounded time ranges in lazily calculated blocks."""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+from solposx import solarposition
+from solposx.parallel import _FLEET_ALGORITHMS
+from solposx.tools import _pandas_to_utc
+
+
+def _chunk_index(chunk):
+    """Return a chunk of timestamps as a DatetimeIndex."""
+    index = pd.DatetimeIndex(chunk)
+    if index.tz is None and not isinstance(chunk, (pd.Index, pd.Series)):
+        # numpy.datetime64 and int64 nanoseconds are interpreted as UTC
+        index = index.tz_localize("UTC")
+    return index
+
+
+def _range_blocks(function, start, offset, end, site, block, kwargs):
+    """Yield the results of consecutive blocks of a regular time range."""
+    while True:
+        times = pd.date_range(start, periods=block, freq=offset)
+        if end is not None:
+            times = times[times <= end]
+            if len(times) == 0:
+                return
+        yield function(times, site, **kwargs)
+        if len(times) < block:
+            return
+        start = times[-1] + offset
+
+
+def _chunk_blocks(function, chunks, site, block, kwargs):
+    """Yield the results of the blocks of an iterable of timestamp chunks."""
+    for chunk in chunks:
+        index = _chunk_index(chunk)
+        for i in range(0, len(index), block):
+            yield function(index[i : i + block], site, **kwargs)
+
+
+def stream(
+    algorithm,
+    start,
+    freq,
+    site,
+    *,
+    end=None,
+    block=86400,
+    output="dataframe",
+    **kwargs,
+):
+    """
+    Calculate the solar position of a time range block by block.
+
+    Returns a generator, which calculates the solar position of ``block``
+    timestamps at a time when the next block is requested. Only one block of
+    timestamps and results is held in memory, such that the time range can
+    be unbounded, e.g., for feeding an archive of 1-second timestamps to a
+    downstream consumer.
+
+    Instead of a regular time range, ``start`` can be an iterable of
+    timestamp chunks, e.g., batches read from a Parquet file, which are
+    requested one at a time and calculated in blocks of at most ``block``
+    timestamps.
+
+    Parameters
+    ----------
+    algorithm : str
+        Solar position algorithm, i.e., name of a function in
+        :py:mod:`solposx.solarposition` that accepts a Site or Fleet.
+    start : str, datetime-like, or iterable of array-like
+        First timestamp of the time range - must be localized. The blocks
+        are in the time zone of ``start``. Or an iterable of timestamp
+        chunks, each a pandas.DatetimeIndex, a pandas.Series, or an array of
+        ``numpy.datetime64`` or int64 nanoseconds since 1970-01-01, which are
+        interpreted as UTC.
+    freq : str, pandas.DateOffset, or None
+        Frequency of the time range, e.g., ``'1s'``. Must be None if
+        ``start`` is an iterable of timestamp chunks.
+    site : Site or Fleet
+        Location(s) of the calculation.
+    end : str or datetime-like, optional
+        Last timestamp of the time range (inclusive) - must be localized.
+        If not specified, the time range is unbounded. Ignored for timestamp
+        chunks.
+    block : int, default : 86400
+        Number of timestamps per block. The last block of a bounded time
+        range and of each chunk can be shorter.
+    output : str, default : 'dataframe'
+        Output format of each block, see the ``output`` parameter of the
+        function of ``algorithm``.
+    **kwargs
+        Parameters of the algorithm, e.g., ``delta_t`` or ``backend``.
+
+    Returns
+    -------
+    generator
+        Generator of the solar position of each block in the format of
+        ``output``.
+
+    Raises
+    ------
+    ValueError
+        Raised if ``algorithm`` is not one of the available options, if
+        ``block`` is less than 1, or if ``freq`` is None for a start
+        timestamp or not None for timestamp chunks.
+    TypeError
+        Raised if ``start`` or ``end`` is timezone naive.
+
+    See Also
+    --------
+    solposx.parallel.compute
+
+    Examples
+    --------
+    >>> blocks = stream('noaa', '2020-01-01 00:00+00:00', '1s', Site(45, 10))
+    >>> for solpos in itertools.islice(blocks, 365):
+    ...     consume(solpos)
+
+    >>> batches = pq.ParquetFile('times.parquet').iter_batches(columns=['time'])
+    >>> chunks = (batch.column('time').to_pandas() for batch in batches)
+    >>> for solpos in stream('psa', chunks, None, Site(45, 10)):
+    ...     consume(solpos)
+    """
+    if algorithm not in _FLEET_ALGORITHMS:
+        raise ValueError(
+            f"Unknown algorithm: {algorithm}. "
+            f"Available options are: {list(_FLEET_ALGORITHMS)}."
+        )
+    if block < 1:
+        raise ValueError(f"block must be at least 1, got {block}.")
+    function = getattr(solarposition, algorithm)
+    kwargs = dict(kwargs, output=output)
+    if isinstance(start, (str, datetime.datetime, np.datetime64)):
+        if freq is None:
+            raise ValueError("freq must be specified for a start timestamp.")
+        start = pd.Timestamp(start)
+        _pandas_to_utc(start)
+        if end is not None:
+            end = pd.Timestamp(end)
+            _pandas_to_utc(end)
+        offset = pd.tseries.frequencies.to_offset(freq)
+        return _range_blocks(function, start, offset, end, site, block, kwargs)
+    if freq is not None:
+        raise ValueError("freq must be None for an iterable of timestamp chunks.")
+    return _chunk_blocks(function, start, site, block, kwargs)
@@ -1,7 +1,35 @@
 """Collection of utility functions."""
 
+import collections
+import math
+import threading
+from functools import cached_property
+
 import pvlib
 import numpy as np
+import pandas as pd
+from solposx.site import _FIELDS, Fleet, _is_site, _location_terms
+
+# upper bound of the peak memory of the kernels per element, i.e., per
+# combination of timestamp and site, including the temporary arrays, the time
+# fields, and the results of a chunk [bytes]
+_BYTES_PER_ELEMENT = 384
+
+# number of consecutive days of an entry of a DayCache
+_DAY_BLOCK = 1024
+
+# margin between the elevation threshold of daylight_only and the low-precision
+# elevation screening the elements. The low-precision elevation deviates from
+# the elevation of the algorithms by up to 0.3 degrees for noaa, psa, sg2,
+# spa, and usno, and by up to 1.5 degrees for the less accurate iqbal,
+# michalsky, and walraven in years 1700 to 2300 [degrees]
+_DAYLIGHT_MARGIN = 2.0
+# days since 1970-01-01 of the years 1700 to 2300, for which the margin is
+# validated. Outside these years, all elements are evaluated [days]
+_DAYLIGHT_DAYS = (
+    np.datetime64("1700-01-01", "D").astype(np.int64),
+    np.datetime64("2300-01-01", "D").astype(np.int64),
+)
 
 
 def _pandas_to_utc(pd_object):
@@ -51,6 +79,1050 @@ def _fractional_hour(times):
     return hour
 
 
+def _split_ticks(ticks, unit):
+    """
+    Split integer timestamps into whole days and fraction of day.
+
+    Parameters
+    ----------
+    ticks : np.ndarray of int64
+        Timestamps as integer counts of ``unit`` since 1970-01-01 00:00.
+        Not-a-time values are mapped to a fraction of NaN.
+    unit : str
+        Unit of ``ticks``, e.g., ``'s'`` or ``'ns'``.
+
+    Returns
+    -------
+    days : np.ndarray of int64
+        Whole days since 1970-01-01 00:00. [days]
+    fraction : np.ndarray of float64
+        Fraction of the day elapsed since midnight. [-]
+    """
+    ticks_per_day = np.timedelta64(1, "D") // np.timedelta64(1, unit)
+    days, ticks_of_day = np.divmod(ticks, ticks_per_day)
+    fraction = ticks_of_day / ticks_per_day
+    not_a_time = ticks == np.iinfo(np.int64).min
+    if np.any(not_a_time):
+        days = np.where(not_a_time, 0, days)
+        fraction = np.where(not_a_time, np.nan, fraction)
+    return days, fraction
+
+
+def _split_julian_date(jd):
+    """
+    Split Julian dates into whole days and fraction of day.
+
+    Parameters
+    ----------
+    jd : array-like or tuple of two array-like
+        Julian dates. A two-part Julian date ``(jd1, jd2)``, where the
+        Julian date is ``jd1 + jd2``, retains full precision. [days]
+
+    Returns
+    -------
+    days : np.ndarray of int64
+        Whole days since 1970-01-01 00:00. [days]
+    fraction : np.ndarray of float64
+        Fraction of the day elapsed since midnight. [-]
+    """
+    if isinstance(jd, tuple):
+        jd1, jd2 = (np.asanyarray(part, dtype=np.float64) for part in jd)
+    else:
+        jd1, jd2 = np.asanyarray(jd, dtype=np.float64), 0.0
+    unix_days = jd1 - 2440587.5
+    days = np.floor(unix_days + jd2)
+    return days.astype(np.int64), (unix_days - days) + jd2
+
+
+def _calendar_from_days(days):
+    """
+    Calculate proleptic Gregorian calendar fields using integer arithmetic.
+
+    Parameters
+    ----------
+    days : array-like of int
+        Whole days since 1970-01-01. [days]
+
+    Returns
+    -------
+    year, month, day, dayofyear : np.ndarray of int64
+        Calendar fields. ``day`` is the day of the month.
+
+    Notes
+    -----
+    The algorithm shifts the start of the year to March 1st, such that the
+    leap day is the last day of the year, see [1]_.
+
+    References
+    ----------
+    .. [1] H. Hinnant, "chrono-Compatible Low-Level Date Algorithms,"
+       https://howardhinnant.github.io/date_algorithms.html
+    """
+    z = np.asanyarray(days, dtype=np.int64) + 719468  # days since 0000-03-01
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    # day of the year starting on March 1st
+    day_of_march_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100
+    )
+    month_index = (5 * day_of_march_year + 2) // 153  # March is 0
+    day = day_of_march_year - (153 * month_index + 2) // 5 + 1
+    before_march = month_index >= 10
+    month = np.where(before_march, month_index - 9, month_index + 3)
+    year = year_of_era + era * 400 + before_march
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    dayofyear = np.where(
+        before_march, day_of_march_year - 305, day_of_march_year + 60 + leap
+    )
+    return year, month, day, dayofyear
+
+
+_CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
+)
+
+
+class DayCache:
+    """
+    Bounded LRU cache of day-level terms of the solar position algorithms.
+
+    Some terms depend on the UTC date only, e.g., the calendar fields, the
+    declination and equation of time of the Iqbal algorithm, and ``delta_t``
+    calculated from the year and month. Rather than evaluating them for each
+    timestamp, they are calculated for blocks of 1024 consecutive days,
+    cached, and looked up for the timestamps. Since the terms are calculated
+    element-wise, the results are identical.
+
+    The functions in :py:mod:`solposx.solarposition` and
+    :py:mod:`solposx.kernels` use the shared instance
+    ``solposx.tools.day_cache``, such that repeated calls, e.g., of a
+    long-running service, reuse the cached days. Its ``maxsize`` can be
+    changed at any time, and 0 disables the cache. The cache is thread-safe.
+
+    Parameters
+    ----------
+    maxsize : int, default : 64
+        Maximum number of cached blocks of 1024 days over all terms. Calls
+        with timestamps in more blocks calculate the terms per timestamp
+        without the cache.
+
+    Examples
+    --------
+    >>> times = pd.date_range('2020-01-01', '2021-01-01', freq='1min', tz='UTC')
+    >>> solpos = iqbal(times, 45, 10)
+    >>> solpos = iqbal(times, 50, 10)
+    >>> solposx.tools.day_cache.cache_info()
+    CacheInfo(hits=2, misses=2, maxsize=64, currsize=2)
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self):
+        return f"DayCache(maxsize={self.maxsize})"
+
+    def lookup(self, name, days, function):
+        """
+        Return day-level terms for the days of timestamps.
+
+        Parameters
+        ----------
+        name : hashable
+            Name of the terms, including any parameters of ``function``.
+        days : np.ndarray of int64
+            Whole days since 1970-01-01 00:00 UTC of the timestamps. [days]
+        function : callable
+            Function calculating a tuple of arrays of the terms from an
+            array of days.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            Terms of the shape of ``days``.
+        """
+        days = np.asarray(days)
+        if days.size == 0:
+            return function(days)
+        first = days.min() // _DAY_BLOCK
+        span = days.max() // _DAY_BLOCK - first + 1
+        if span <= 2:
+            # the blocks of the first and last day
+            present = np.arange(span)
+        else:
+            # only the blocks containing timestamps, e.g., of sparse years
+            block_of_day = days // _DAY_BLOCK - first
+            present = np.flatnonzero(np.bincount(block_of_day.ravel(), minlength=span))
+        if len(present) > self.maxsize:
+            return function(days)
+        blocks = [self._block(name, first + block, function) for block in present]
+        if len(blocks) == 1:
+            table = blocks[0]
+        else:
+            table = [np.concatenate(terms) for terms in zip(*blocks)]
+        if len(present) == span:
+            index = days - first * _DAY_BLOCK
+        else:
+            # position of the block of each day in the table
+            position = np.zeros(span, dtype=np.intp)
+            position[present] = np.arange(len(present))
+            index = position[block_of_day] * _DAY_BLOCK + days % _DAY_BLOCK
+        # mode 'clip' does not buffer the results, the indices are valid
+        return tuple(np.take(term, index, mode="clip") for term in table)
+
+    def _block(self, name, block, function):
+        """Return the terms of a block of days, calculating them if needed."""
+        key = (name, int(block))
+        with self._lock:
+            terms = self._blocks.get(key)
+            if terms is not None:
+                self._blocks.move_to_end(key)
+                self._hits += 1
+                return terms
+            self._misses += 1
+        days = np.arange(block * _DAY_BLOCK, (block + 1) * _DAY_BLOCK)
+        terms = function(days)
+        with self._lock:
+            self._blocks[key] = terms
+            while len(self._blocks) > self.maxsize:
+                self._blocks.popitem(last=False)
+        return terms
+
+    def cache_info(self):
+        """
+        Return the cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Named tuple of the numbers of ``hits`` and ``misses`` of blocks
+            of days, the ``maxsize``, and the current number of cached
+            blocks ``currsize``.
+        """
+        with self._lock:
+            return _CacheInfo(self._hits, self._misses, self.maxsize, len(self._blocks))
+
+    def cache_clear(self):
+        """Remove all cached terms and reset the statistics."""
+        with self._lock:
+            self._blocks.clear()
+            self._hits = self._misses = 0
+
+
+# day-level terms shared by all calculations
+day_cache = DayCache()
+
+
+def _deltat_of_days(days):
+    """Return delta_t of the UTC year and month of days since 1970-01-01."""
+    year, month = _calendar_from_days(days)[:2]
+    return (pvlib.spa.calculate_deltat(year, month),)
+
+
+def _calculate_deltat(time):
+    """
+    Return :py:func:`pvlib.spa.calculate_deltat` of the UTC year and month of
+    a TimeBundle, using the day cache.
+    """
+    return day_cache.lookup("delta_t", time.days, _deltat_of_days)[0]
+
+
+class TimeBundle:
+    """
+    Time decomposition shared by solar position calculations.
+
+    The UTC conversion, Julian dates, calendar fields, and fractional hour
+    of the timestamps are calculated once, when first needed, and cached. A
+    TimeBundle can be passed in place of ``times`` to the functions in
+    :py:mod:`solposx.solarposition` and in place of ``jd_ut`` to the kernels in
+    :py:mod:`solposx.kernels`. This avoids repeating the time calculations when
+    computing the solar position for many locations with identical timestamps.
+
+    Parameters
+    ----------
+    times : pandas.DatetimeIndex or numpy.ndarray
+        Timestamps - must be localized. Arrays of ``numpy.datetime64`` or
+        of int64 nanoseconds since 1970-01-01 are interpreted as UTC. Their
+        calendar fields are derived using integer arithmetic without
+        converting to pandas objects.
+
+    Attributes
+    ----------
+    index : pandas.Index
+        Timestamps used as the index of the returned DataFrames.
+    utc_index : pandas.DatetimeIndex
+        Timestamps converted to UTC.
+    days : np.ndarray of int64
+        Whole days since 1970-01-01 00:00 UTC. [days]
+    fraction : np.ndarray of float64
+        Fraction of the UTC day elapsed since midnight. [-]
+    julian_date : np.ndarray of float64
+        Julian date in UT. [days]
+    year, month, day, dayofyear : np.ndarray of int64
+        UTC calendar fields. ``day`` is the day of the month.
+    hour : np.ndarray of float64
+        Fractional hour of the UTC day. [hours]
+
+    Raises
+    ------
+    TypeError
+        Raised if ``times`` is a time-zone naive pandas object or an array of
+        an unsupported dtype.
+
+    Examples
+    --------
+    >>> times = pd.date_range('2020-01-01', '2021-01-01', freq='1h', tz='UTC')
+    >>> time = TimeBundle(times)
+    >>> solpos = [noaa(time, lat, lon) for lat, lon in [(40, 10), (50, 10)]]
+    """
+
+    def __init__(self, times):
+        if isinstance(times, np.ndarray):
+            if np.issubdtype(times.dtype, np.datetime64):
+                unit, _ = np.datetime_data(times.dtype)
+                if unit in ("Y", "M", "W"):  # not a whole fraction of a day
+                    times, unit = times.astype("datetime64[D]"), "D"
+            elif np.issubdtype(times.dtype, np.integer):
+                unit = "ns"
+                times = times.astype(np.int64, copy=False).view("datetime64[ns]")
+            else:
+                raise TypeError(
+                    "Arrays of timestamps must be of dtype numpy.datetime64 "
+                    f"or int64 nanoseconds, not {times.dtype}."
+                )
+            self._datetime64 = times
+            self.days, self.fraction = _split_ticks(times.view(np.int64), unit)
+        else:
+            self.index = times
+            self.utc_index = _pandas_to_utc(times)
+            self.days, self.fraction = _split_ticks(
+                self.utc_index.asi8, self.utc_index.unit
+            )
+
+    @classmethod
+    def from_julian_date(cls, jd):
+        """
+        Create a TimeBundle from Julian dates.
+
+        Parameters
+        ----------
+        jd : array-like or tuple of two array-like
+            Julian dates in UT. A two-part Julian date ``(jd1, jd2)``, where
+            the Julian date is ``jd1 + jd2``, retains full precision. [days]
+
+        Returns
+        -------
+        TimeBundle
+        """
+        bundle = cls.__new__(cls)
+        bundle.days, bundle.fraction = _split_julian_date(jd)
+        return bundle
+
+    @classmethod
+    def from_mixed_timezones(cls, times, utc_offset=None, tz=None):
+        """
+        Create a TimeBundle from timestamps in several time zones.
+
+        A pandas.DatetimeIndex can only hold a single time zone. This
+        constructor accepts a column of timestamps where each row has its own
+        time zone, e.g., from an event table merging sites across time zones.
+        The conversion to UTC is vectorized, such that the solar position of
+        all rows is calculated in a single call.
+
+        Parameters
+        ----------
+        times : pandas.Series, pandas.Index, or array-like
+            If neither ``utc_offset`` nor ``tz`` is specified, ``times`` are
+            instants. Time-zone aware timestamps, which may each have a
+            different time zone, are converted to UTC, and naive timestamps
+            are interpreted as UTC. Otherwise, ``times`` are naive local
+            wall-clock times.
+        utc_offset : array-like of float or numpy.timedelta64, optional
+            Offset of the local time of each row from UTC, e.g., 2 for
+            UTC+02:00. Numeric values are in hours. [h]
+        tz : str or array-like of str, optional
+            Time zone name of each row, e.g., ``'Europe/Copenhagen'``.
+            Ambiguous and nonexistent local times raise an error.
+
+        Returns
+        -------
+        TimeBundle
+            The index is the index of ``times`` if it is a pandas.Series and
+            ``times`` itself if it is a pandas.Index, such that the results
+            are aligned with the original rows. Otherwise, the index is
+            :py:attr:`utc_index`.
+
+        Raises
+        ------
+        ValueError
+            Raised if both ``utc_offset`` and ``tz`` are specified.
+        TypeError
+            Raised if ``utc_offset`` or ``tz`` is specified and ``times`` are
+            time-zone aware.
+        """
+        if utc_offset is not None and tz is not None:
+            raise ValueError("Specify either `utc_offset` or `tz`, not both.")
+        if utc_offset is None and tz is None:
+            times_utc = pd.DatetimeIndex(pd.to_datetime(times, utc=True))
+            bundle = cls(times_utc)
+        else:
+            local = pd.DatetimeIndex(pd.to_datetime(times)).as_unit("ns")
+            if local.tz is not None:
+                raise TypeError(
+                    "Local times must be time-zone naive if `utc_offset` or "
+                    "`tz` is specified."
+                )
+            if tz is None:
+                utc_offset = np.asarray(utc_offset)
+                if not np.issubdtype(utc_offset.dtype, np.timedelta64):
+                    utc_offset = np.round(utc_offset * 3600e9).astype(np.int64)
+                utc_ticks = local.asi8 - utc_offset.astype("timedelta64[ns]").view(
+                    np.int64
+                )
+            else:
+                zones = np.broadcast_to(np.asarray(tz, dtype=object), local.shape)
+                utc_ticks = np.empty(local.shape, dtype=np.int64)
+                # localize all rows sharing a time zone at once
+                for zone in pd.unique(zones):
+                    rows = zones == zone
+                    utc_ticks[rows] = local[rows].tz_localize(zone).asi8
+            bundle = cls(utc_ticks)
+        if isinstance(times, pd.Series):
+            bundle.index = times.index
+        elif isinstance(times, pd.Index):
+            bundle.index = times
+        return bundle
+
+    @cached_property
+    def _datetime64(self):
+        nanoseconds = np.round(self.fraction * 86400e9).astype(np.int64)
+        return (self.days * (86400 * 10**9) + nanoseconds).view("datetime64[ns]")
+
+    @cached_property
+    def utc_index(self):
+        return pd.DatetimeIndex(self._datetime64).tz_localize("UTC")
+
+    @cached_property
+    def index(self):
+        # timestamps specified as arrays or Julian dates are in UTC
+        return self.utc_index
+
+    @cached_property
+    def julian_date(self):
+        return (self.days + 2440587.5) + self.fraction
+
+    @cached_property
+    def _calendar(self):
+        return day_cache.lookup("calendar", self.days, _calendar_from_days)
+
+    @property
+    def year(self):
+        return self._calendar[0]
+
+    @property
+    def month(self):
+        return self._calendar[1]
+
+    @property
+    def day(self):
+        return self._calendar[2]
+
+    @property
+    def dayofyear(self):
+        return self._calendar[3]
+
+    @cached_property
+    def hour(self):
+        return self.fraction * 24
+
+    def _column(self):
+        """Return the time fields as column vectors, reusing cached fields."""
+        column = type(self).__new__(type(self))
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                value = value[:, np.newaxis]
+            elif name == "_calendar":
+                value = tuple(field[:, np.newaxis] for field in value)
+            setattr(column, name, value)
+        return column
+
+    def _rows(self, key):
+        """Return the time fields of the rows selected by ``key``."""
+        rows = type(self).__new__(type(self))
+        for name, value in vars(self).items():
+            if isinstance(value, (np.ndarray, pd.Index)):
+                value = value[key]
+            elif name == "_calendar":
+                value = tuple(field[key] for field in value)
+            setattr(rows, name, value)
+        return rows
+
+
+def _to_time_bundle(times):
+    """Return ``times`` if it is a TimeBundle, otherwise create one."""
+    if isinstance(times, TimeBundle):
+        return times
+    return TimeBundle(times)
+
+
+def _broadcast_sites(time, *site_params, site_axis=False):
+    """
+    Broadcast site parameters, e.g., latitude and longitude, against times.
+
+    Times are along the first axis. One-dimensional site parameters of length
+    N, and site parameters of shape (N, 1), are paired with the times row by
+    row. Site parameters of shape (1, M) or (N, M), and a Fleet of M sites,
+    form a second, site axis, such that the solar position is calculated for
+    all combinations of times and sites.
+
+    Parameters
+    ----------
+    time : TimeBundle
+        Time decomposition of N timestamps.
+    *site_params : numeric, array-like, Site, or Fleet
+        Site parameters of shape (), (N,), (N, 1), (1, M), or (N, M). A Site
+        is a scalar and a Fleet of M sites is a site axis.
+    site_axis : bool, default : False
+        If True, one-dimensional site parameters form the site axis, e.g.,
+        the parameters taken from a Fleet.
+
+    Returns
+    -------
+    time : TimeBundle
+        ``time`` with fields of shape (N, 1) if there is a site axis.
+    site_params : list
+        Site parameters, flattened if paired with the times row by row or if
+        of shape (1, M).
+    index : pandas.Index
+        Index of the flattened results. A MultiIndex of times and sites if
+        there is a site axis.
+
+    Raises
+    ------
+    ValueError
+        Raised if the site parameters have more than two dimensions or if
+        their first axis does not match the times.
+    """
+    site_params = [
+        np.asarray(param) if np.ndim(param) > 0 and not _is_site(param) else param
+        for param in site_params
+    ]
+    if site_axis:
+        site_params = [
+            np.reshape(param, (1, -1)) if np.ndim(param) == 1 else param
+            for param in site_params
+        ]
+    # one-dimensional arrays are paired with the times row by row
+    shape = np.broadcast_shapes(
+        *(
+            np.shape(param) + (1,)
+            if np.ndim(param) == 1 and not _is_site(param)
+            else np.shape(param)
+            for param in site_params
+        )
+    )
+    if len(shape) > 2:
+        raise ValueError(
+            "Site parameters must be scalars or arrays of at most two "
+            f"dimensions (times, sites), got shape {shape}."
+        )
+    if len(shape) == 0:
+        return time, site_params, time.index
+    n_times = len(time.days)
+    if len(shape) == 2 and shape[0] not in (1, n_times):
+        raise ValueError(
+            f"Site parameters paired with {n_times} timestamps must be of "
+            f"length {n_times}, got shape {shape}. Use a Fleet or arrays of "
+            "shape (1, M) for M sites."
+        )
+    if len(shape) == 2 and shape[1] == 1 and not site_axis:
+        # one site per timestamp
+        params = [
+            np.reshape(param, -1) if np.ndim(param) == 2 else param
+            for param in site_params
+        ]
+        return time, params, time.index
+    params = []
+    for param in site_params:
+        if np.ndim(param) == 1 and not _is_site(param):
+            param = np.reshape(param, (-1, 1))
+        elif np.ndim(param) == 2 and np.shape(param)[0] == 1:
+            param = np.reshape(param, -1)
+        params.append(param)
+    sites = pd.RangeIndex(shape[-1], name="site")
+    index = pd.MultiIndex.from_product([time.index, sites])
+    return time._column(), params, index
+
+
+def _shape(value):
+    """Return the shape of an array, TimeBundle, Site, or Fleet."""
+    if isinstance(value, TimeBundle):
+        return value.days.shape
+    if isinstance(value, np.ndarray) or _is_site(value):
+        return value.shape
+    return ()
+
+
+def _chunk(value, key, shape, axis=0):
+    """
+    Return the part of ``value`` selected by ``key`` along ``axis`` of the
+    broadcast ``shape``, or ``value`` if it is constant along the axis.
+    """
+    value_shape = _shape(value)
+    value_axis = axis - (len(shape) - len(value_shape))
+    if value_axis < 0 or value_shape[value_axis] == 1:
+        # constant along the axis, i.e., broadcast
+        return value
+    if isinstance(value, TimeBundle):
+        # the timestamps are along the first axis
+        return value._rows(key)
+    if isinstance(value, np.ndarray):
+        return value[(slice(None),) * value_axis + (key,)]
+    return value[key]
+
+
+def _key_columns(value, shape, axis):
+    """
+    Return the bit patterns of ``value`` along ``axis`` of the broadcast
+    ``shape`` as the columns of a uint64 array, or None if it is constant
+    along the axis.
+    """
+    value_shape = _shape(value)
+    value_axis = axis - (len(shape) - len(value_shape))
+    if value_axis < 0 or value_shape[value_axis] == 1:
+        return None
+    if isinstance(value, TimeBundle):
+        fields = (value.days, value.fraction)
+    elif isinstance(value, Fleet):
+        fields = tuple(getattr(value, name) for name in _FIELDS)
+    else:
+        fields = (value,)
+    columns = []
+    for field in fields:
+        field = np.moveaxis(field, value_axis, 0)
+        dtype = np.int64 if np.issubdtype(field.dtype, np.integer) else np.float64
+        field = np.ascontiguousarray(field, dtype=dtype)
+        field = field.reshape(len(field), math.prod(field.shape[1:]))
+        columns.append(field.view(np.uint64))
+    return np.concatenate(columns, axis=1)
+
+
+def _unique_rows(values, shape, axis):
+    """
+    Return the indices of the first occurrences of the unique rows of
+    ``values`` along ``axis`` and the indices reconstructing all rows from
+    them, or None if all values are constant along the axis.
+    """
+    columns = [_key_columns(value, shape, axis) for value in values]
+    columns = [column for column in columns if column is not None]
+    if not columns:
+        return None
+    key = np.concatenate(columns, axis=1)
+    # combine the hash-based codes of the columns into codes of the rows,
+    # which is faster than sorting the rows
+    inverse = np.zeros(len(key), dtype=np.int64)
+    for column in key.T:
+        codes, uniques = pd.factorize(column)
+        inverse, rows = pd.factorize(inverse * len(uniques) + codes)
+    first = np.empty(len(rows), dtype=np.int64)
+    first[inverse[::-1]] = np.arange(len(inverse) - 1, -1, -1)
+    return first, inverse
+
+
+def _scatter(value, inverse, shape, axis):
+    """
+    Return the rows of ``value`` selected by ``inverse`` along ``axis`` of
+    the broadcast ``shape``, unless ``value`` is constant along the axis.
+    """
+    value_axis = axis - (len(shape) - np.ndim(value))
+    if value_axis < 0 or np.shape(value)[value_axis] != shape[axis]:
+        return value
+    return np.take(value, inverse, axis=value_axis)
+
+
+def _evaluate_unique(
+    kernel, args, kwargs, chunksize=None, max_memory=None, *, daylight=None
+):
+    """
+    Evaluate a kernel for the unique timestamps and sites only.
+
+    The duplicate rows along each axis of the broadcast shape of the
+    arguments, e.g., repeated pairs of timestamp and site, are removed before
+    the evaluation, and the results are scattered back to all rows. Since
+    the calculations are element-wise, the results are identical to
+    evaluating all elements.
+
+    Returns
+    -------
+    dict
+    """
+    values = [*args, *kwargs.values()]
+    shape = np.broadcast_shapes(*(_shape(value) for value in values))
+    inverses = {}
+    for axis in range(len(shape)):
+        rows = _unique_rows(values, shape, axis)
+        if rows is None:
+            continue
+        first, inverses[axis] = rows
+        values = [_chunk(value, first, shape, axis) for value in values]
+    reduced_shape = np.broadcast_shapes(*(_shape(value) for value in values))
+    result = _evaluate_in_chunks(
+        kernel,
+        values[: len(args)],
+        dict(zip(kwargs, values[len(args) :])),
+        chunksize,
+        max_memory,
+        daylight=daylight,
+    )
+    for axis, inverse in inverses.items():
+        result = {
+            name: _scatter(value, inverse, reduced_shape, axis)
+            for name, value in result.items()
+        }
+    return result
+
+
+def _solar_day_terms(days):
+    """
+    Return the sine and cosine of the declination and the Greenwich hour
+    angle at 00:00 UTC of the sun at noon UTC of whole days since 1970-01-01,
+    using the low-precision formulas of the Astronomical Almanac [1]_.
+
+    References
+    ----------
+    .. [1] The Astronomical Almanac, U.S. Naval Observatory, "Low precision
+       formulas for the Sun", Section C.
+    """
+    n = days - 10957  # days since J2000.0
+    mean_anomaly = np.deg2rad(357.528 + 0.9856003 * n)  # [radians]
+    ecliptic_longitude = np.deg2rad(
+        280.460
+        + 0.9856474 * n
+        + 1.915 * np.sin(mean_anomaly)
+        + 0.020 * np.sin(2 * mean_anomaly)
+    )  # [radians]
+    obliquity = np.deg2rad(23.439 - 0.0000004 * n)  # [radians]
+    sin_longitude = np.sin(ecliptic_longitude)
+    right_ascension = np.arctan2(
+        np.cos(obliquity) * sin_longitude, np.cos(ecliptic_longitude)
+    )  # [radians]
+    sin_declination = np.sin(obliquity) * sin_longitude
+    # Greenwich mean sidereal time at 00:00 UTC minus right ascension
+    hour_angle = np.deg2rad(100.46061837 + 0.98564736629 * n) - right_ascension
+    return sin_declination, np.sqrt(1 - sin_declination**2), hour_angle
+
+
+def _low_precision_sin_elevation(time, latitude, longitude=None):
+    """
+    Calculate the sine of the solar elevation from declination and hour
+    angle envelopes of whole days.
+
+    The declination and the equation of time of noon UTC are used for the
+    whole day, such that the trigonometric functions of the sun are
+    evaluated once per day. The elevation deviates from the accurate
+    elevation by less than 0.3 degrees for years 1700 to 2300.
+
+    Returns
+    -------
+    np.ndarray
+        Sine of the solar elevation, not accounting for refraction. [-]
+    """
+    latitude, longitude, sin_latitude, cos_latitude = _location_terms(
+        latitude, longitude
+    )
+    days = time.days
+    if days.size and np.ptp(days) < days.size:
+        # tabulate the consecutive days and look them up
+        first = days.min()
+        terms = _solar_day_terms(np.arange(first, days.max() + 1))
+        terms = [term[days - first] for term in terms]
+    else:
+        terms = _solar_day_terms(days)
+    sin_declination, cos_declination, hour_angle = terms
+    hour_angle = hour_angle + 2 * np.pi * time.fraction + np.deg2rad(longitude)
+    return sin_latitude * sin_declination + cos_latitude * cos_declination * np.cos(
+        hour_angle
+    )
+
+
+def _evaluate_daylight(
+    kernel, args, kwargs, chunksize=None, max_memory=None, threshold=-1.0
+):
+    """
+    Evaluate a kernel for the elements with the sun above a threshold only.
+
+    The elements whose low-precision elevation, see
+    :py:func:`_low_precision_sin_elevation`, is below ``threshold`` by more
+    than ``_DAYLIGHT_MARGIN`` are certainly below ``threshold`` and set to
+    NaN. The kernel is evaluated for the timestamps with at least one other
+    element only, such that the location-independent terms are still shared
+    by the sites. The results of the other elements are identical to
+    evaluating all elements. If a timestamp is outside the years 1700 to
+    2300, for which the margin is validated, all elements are evaluated.
+    The first three positional arguments of the kernel are the times,
+    latitude, and longitude.
+
+    Returns
+    -------
+    dict
+    """
+    days = args[0].days
+    if np.any(days < _DAYLIGHT_DAYS[0]) or np.any(days >= _DAYLIGHT_DAYS[1]):
+        return _evaluate_in_chunks(kernel, args, kwargs, chunksize, max_memory)
+    values = [*args, *kwargs.values()]
+    shape = np.broadcast_shapes(*(_shape(value) for value in values))
+    sin_elevation = _low_precision_sin_elevation(*args[:3])
+    bound = np.sin(np.deg2rad(threshold - _DAYLIGHT_MARGIN))
+    day = np.broadcast_to(sin_elevation >= bound, shape)
+    if day.all():
+        return _evaluate_in_chunks(kernel, args, kwargs, chunksize, max_memory)
+    rows = np.flatnonzero(day.reshape(len(day), -1).any(axis=1))
+    # at night everywhere, one timestamp is evaluated for the names and
+    # dtypes of the results
+    key = rows if len(rows) else np.zeros(1, dtype=np.int64)
+    values = [_chunk(value, key, shape) for value in values]
+    result = _evaluate_in_chunks(
+        kernel,
+        values[: len(args)],
+        dict(zip(kwargs, values[len(args) :])),
+        chunksize,
+        max_memory,
+    )
+    outputs = {}
+    for name, value in result.items():
+        outputs[name] = np.full(shape, np.nan, dtype=value.dtype)
+        outputs[name][rows] = value[: len(rows)]
+        outputs[name][~day] = np.nan
+    return outputs
+
+
+def _evaluate_in_chunks(
+    kernel,
+    args,
+    kwargs,
+    chunksize=None,
+    max_memory=None,
+    *,
+    axis=0,
+    executor=None,
+    dedupe=False,
+    daylight=None,
+):
+    """
+    Evaluate a kernel in chunks along an axis, by default the timestamps.
+
+    The arguments that vary along ``axis`` of their broadcast shape are
+    sliced into chunks, the others are passed to each chunk unchanged. The
+    results of the chunks are written into arrays of the full shape.
+    Since the calculations are element-wise, the results are identical to
+    evaluating all elements at once.
+
+    Parameters
+    ----------
+    kernel : callable
+        Kernel in :py:mod:`solposx.kernels` returning a dict of arrays.
+    args : tuple
+        Positional arguments of ``kernel``.
+    kwargs : dict
+        Keyword arguments of ``kernel``.
+    chunksize : int, optional
+        Number of elements along ``axis`` per chunk.
+    max_memory : int, optional
+        Memory budget for the temporary arrays of a chunk. If both
+        ``chunksize`` and ``max_memory`` are specified, the smaller chunk is
+        used. [bytes]
+    axis : int, default : 0
+        Axis of the broadcast shape of the arguments to split into chunks.
+    executor : concurrent.futures.Executor, optional
+        Executor evaluating the chunks concurrently. By default, the chunks
+        are evaluated one after the other.
+    dedupe : bool, default : False
+        Evaluate the unique timestamps and sites only, see
+        :py:func:`_evaluate_unique`. Not combined with ``axis`` and
+        ``executor``.
+    daylight : float, optional
+        Evaluate the elements with the sun above this elevation only and set
+        the others to NaN, see :py:func:`_evaluate_daylight`. Not combined
+        with ``axis`` and ``executor``. [degrees]
+
+    Returns
+    -------
+    dict
+
+    Raises
+    ------
+    ValueError
+        Raised if ``chunksize`` is less than 1.
+    """
+    if dedupe:
+        return _evaluate_unique(
+            kernel, args, kwargs, chunksize, max_memory, daylight=daylight
+        )
+    if daylight is not None:
+        return _evaluate_daylight(
+            kernel, args, kwargs, chunksize, max_memory, threshold=daylight
+        )
+    if chunksize is None and max_memory is None:
+        return kernel(*args, **kwargs)
+    if chunksize is not None and chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}.")
+    shape = np.broadcast_shapes(*(_shape(value) for value in (*args, *kwargs.values())))
+    size = shape[axis] if shape else 1
+    chunk_size = chunksize
+    if max_memory is not None:
+        row_bytes = _BYTES_PER_ELEMENT * max(1, math.prod(shape) // max(1, size))
+        chunk_in_budget = max(1, int(max_memory) // row_bytes)
+        chunk_size = (
+            chunk_in_budget if chunk_size is None else min(chunk_size, chunk_in_budget)
+        )
+    if size <= chunk_size:
+        return kernel(*args, **kwargs)
+
+    def evaluate(key):
+        return kernel(
+            *(_chunk(value, key, shape, axis) for value in args),
+            **{name: _chunk(value, key, shape, axis) for name, value in kwargs.items()},
+        )
+
+    keys = [slice(start, start + chunk_size) for start in range(0, size, chunk_size)]
+    map_chunks = map if executor is None else executor.map
+    outputs = None
+    for key, result in zip(keys, map_chunks(evaluate, keys)):
+        if outputs is None:
+            outputs = {
+                name: np.empty(shape, dtype=value.dtype)
+                for name, value in result.items()
+            }
+        for name, value in result.items():
+            outputs[name][(slice(None),) * axis + (key,)] = value
+    return outputs
+
+
+def _solpos_output(result, index, output="dataframe"):
+    """
+    Flatten a dict of (times, sites) arrays into the requested output type.
+
+    Parameters
+    ----------
+    result : dict
+        Dictionary of arrays of the solar position quantities.
+    index : pandas.Index
+        Index of the flattened results, only used for ``'dataframe'``.
+    output : str, default : 'dataframe'
+        Can be one of ``'dataframe'``, ``'dict'``, ``'recarray'``, or
+        ``'ndarray'``.
+
+    Returns
+    -------
+    pandas.DataFrame, dict, numpy.recarray, or numpy.ndarray
+
+    Raises
+    ------
+    ValueError
+        Raised if ``output`` is not one of the available options.
+    """
+    columns = {name: np.reshape(value, -1) for name, value in result.items()}
+    if output == "dataframe":
+        return pd.DataFrame(columns, index=index)
+    if output == "dict":
+        return columns
+    if output == "recarray":
+        return np.rec.fromarrays(list(columns.values()), names=list(columns))
+    if output == "ndarray":
+        return np.column_stack(list(columns.values()))
+    raise ValueError(
+        f"Unknown output: {output}. Available options are: "
+        "['dataframe', 'dict', 'recarray', 'ndarray']."
+    )
+
+
+def _refraction_params(output, *params):
+    """Convert the parameters of a refraction function for ``output``."""
+    if output is None:
+        return params
+    if output == "ndarray":
+        return tuple(np.asarray(param) for param in params)
+    raise ValueError(
+        f"Unknown output: {output}. Available options are: [None, 'ndarray']."
+    )
+
+
+def _refraction_output(refraction, output):
+    """Return the refraction angle as the type selected by ``output``."""
+    if output == "ndarray":
+        return np.asarray(refraction)
+    return refraction
+
+
+def _set_where(values, mask, replacement):
+    """
+    Set the elements of ``values`` selected by ``mask`` to those of
+    ``replacement``, which has the shape of ``values`` or is a scalar.
+
+    Arrays and pandas objects are modified in place and keep their type.
+    Scalars, which do not support item assignment, e.g., the results of
+    operations on 0-d arrays, are returned as the selected value.
+    """
+    if np.ndim(values) == 0:
+        return replacement if mask else values
+    values[mask] = replacement if np.ndim(replacement) == 0 else replacement[mask]
+    return values
+
+
+def _ufunc_output(value):
+    """Return a 0-d array as a scalar, as NumPy ufuncs do, other values as is."""
+    if isinstance(value, np.ndarray) and value.ndim == 0:
+        return value[()]
+    return value
+
+
+def _float_dtype(dtype):
+    """Return ``dtype`` as a NumPy dtype, which must be float32 or float64."""
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be numpy.float32 or numpy.float64, not {dtype}.")
+    return dtype
+
+
+def _as_dtype(value, dtype):
+    """
+    Convert ``value`` to an array of ``dtype``.
+
+    Values are returned unchanged for float64, such that the double-precision
+    calculations are not affected.
+    """
+    if dtype == np.float64:
+        return value
+    if isinstance(value, np.ndarray):
+        return value.astype(dtype, copy=False)
+    return np.asarray(value, dtype=dtype)
+
+
+def _clip_unit(value):
+    """
+    Clip the argument of an inverse sine or cosine to [-1, 1].
+
+    Rounding can push the argument slightly beyond the domain near the zenith
+    and the poles, in double precision, e.g., the azimuth of Michalsky close
+    to the zenith, and more so in single precision. The compiled kernels and
+    :py:mod:`solposx.scalar` clip the same arguments.
+    """
+    return np.clip(value, -1, 1)
+
+
+def _julian_date_to_time_bundle(jd_ut):
+    """Return ``jd_ut`` if it is a TimeBundle, otherwise create one."""
+    if isinstance(jd_ut, TimeBundle):
+        return jd_ut
+    return TimeBundle.from_julian_date(jd_ut)
+
+
 def calc_error(zenith_1, azimuth_1, zenith_2, azimuth_2):
     """
     Calculate angular difference metrics between two sets of solar positions.
@@ -0,0 +1,10 @@
+from solposx.ufunc import refraction  # noqa: F401
+from solposx.ufunc.solarposition import (  # noqa: F401
+    iqbal,
+    michalsky,
+    noaa,
+    psa,
+    sg2,
+    usno,
+    walraven,
+)
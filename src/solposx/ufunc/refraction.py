@@ -0,0 +1,156 @@
+"""Refraction models broadcasting their inputs like NumPy ufuncs."""
+
+from solposx import refraction
+from solposx.tools import _ufunc_output
+
+
+def archer(elevation):
+    """
+    Atmospheric refraction correction based on the Archer algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.archer`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle. [degrees]
+    """
+    return _ufunc_output(refraction.archer(elevation, output="ndarray"))
+
+
+def bennett(elevation, pressure=101325.0, temperature=12.0):
+    """
+    Atmospheric refraction correction based on the Bennett algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.bennett`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+    pressure : array-like, default 101325
+        Annual average atmospheric pressure. [Pascal]
+    temperature : array-like, default 12
+        Annual average air temperature. [C]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle of the broadcast shape of the inputs.
+        [degrees]
+    """
+    return _ufunc_output(
+        refraction.bennett(elevation, pressure, temperature, output="ndarray")
+    )
+
+
+def hughes(elevation, pressure=101325.0, temperature=12.0):
+    """
+    Atmospheric refraction correction based on the Hughes algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.hughes`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+    pressure : array-like, default 101325
+        Annual average atmospheric pressure. [Pascal]
+    temperature : array-like, default 12
+        Annual average temperature. [C]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle of the broadcast shape of the inputs.
+        [degrees]
+    """
+    return _ufunc_output(
+        refraction.hughes(elevation, pressure, temperature, output="ndarray")
+    )
+
+
+def michalsky(elevation):
+    """
+    Atmospheric refraction correction based on the Michalsky algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.michalsky`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle. [degrees]
+    """
+    return _ufunc_output(refraction.michalsky(elevation, output="ndarray"))
+
+
+def sg2(elevation, pressure=101325.0, temperature=12.0):
+    """
+    Atmospheric refraction correction based on the SG2 algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.sg2`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+    pressure : array-like, default 101325
+        Annual average atmospheric pressure. [Pascal]
+    temperature : array-like, default 12
+        Annual average temperature. [C]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle of the broadcast shape of the inputs.
+        [degrees]
+    """
+    return _ufunc_output(
+        refraction.sg2(elevation, pressure, temperature, output="ndarray")
+    )
+
+
+def spa(elevation, pressure=101325.0, temperature=12.0, *, refraction_limit=-0.5667):
+    """
+    Atmospheric refraction correction from the SPA algorithm.
+
+    Broadcasting version of :py:func:`solposx.refraction.spa`.
+
+    Parameters
+    ----------
+    elevation : array-like
+        True solar elevation angle (not accounting for refraction). [degrees]
+    pressure : array-like, default 101325
+        Annual average local pressure. [Pa]
+    temperature : array-like, default 12
+        Annual average local air temperature. [C]
+    refraction_limit : float, default -0.5667
+        Solar elevation angle below which refraction is not applied, as the sun
+        is assumed to be below horizon. Note that the sun diameter is added to
+        this. [degrees]
+
+    Returns
+    -------
+    numpy.ndarray or scalar
+        Atmospheric refraction angle of the broadcast shape of the inputs.
+        [degrees]
+    """
+    return _ufunc_output(
+        refraction.spa(
+            elevation,
+            pressure,
+            temperature,
+            refraction_limit=refraction_limit,
+            output="ndarray",
+        )
+    )
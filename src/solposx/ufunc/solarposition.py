@@ -0,0 +1,298 @@
+"""Solar position functions broadcasting their inputs like NumPy ufuncs."""
+
+import numpy as np
+import pandas as pd
+from solposx import kernels
+from solposx.site import _is_site
+from solposx.tools import TimeBundle, _pandas_to_utc, _ufunc_output
+
+
+def _time_bundle(times):
+    """Return the TimeBundle of timestamps of any shape."""
+    if isinstance(times, TimeBundle):
+        return times
+    if isinstance(times, pd.Series):
+        times = pd.DatetimeIndex(times)
+    if isinstance(times, pd.Index):
+        return TimeBundle(times)
+    if isinstance(times, pd.Timestamp):
+        # must be localized, like pandas indexes
+        times = _pandas_to_utc(times).to_datetime64()
+    return TimeBundle(np.asarray(times))
+
+
+def _evaluate(kernel, times, *site_params, **kwargs):
+    """Evaluate ``kernel`` on broadcast timestamps and site parameters."""
+    site_params = [
+        param if param is None or _is_site(param) else np.asarray(param)
+        for param in site_params
+    ]
+    result = kernel(_time_bundle(times), *site_params, **kwargs)
+    return {name: _ufunc_output(value) for name, value in result.items()}
+
+
+def iqbal(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the Iqbal algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.iqbal`, e.g., ``dtype``,
+        ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. The values are arrays of the broadcast shape of the
+        inputs, or scalars if all inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.iqbal
+
+    Examples
+    --------
+    >>> times = pd.date_range('2020', '2021', freq='1h', tz='UTC').values
+    >>> latitude, longitude = np.arange(-60, 61), np.arange(-180, 180)
+    >>> solpos = iqbal(times[:, None, None], latitude[:, None], longitude)
+    >>> solpos['zenith'].shape
+    (8785, 121, 360)
+    """
+    return _evaluate(kernels.iqbal, times, latitude, longitude, **kwargs)
+
+
+def michalsky(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the Michalsky algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.michalsky`, e.g.,
+        ``spencer_correction``, ``julian_date``, ``dtype``, ``out``, or
+        ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'apparent_elevation'``,
+        ``'zenith'``, ``'apparent_zenith'``, and ``'azimuth'``. The values
+        are arrays of the broadcast shape of the inputs, or scalars if all
+        inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.michalsky
+    """
+    return _evaluate(kernels.michalsky, times, latitude, longitude, **kwargs)
+
+
+def noaa(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the NOAA algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.noaa`, e.g., ``delta_t``,
+        ``dtype``, ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'apparent_elevation'``,
+        ``'zenith'``, ``'apparent_zenith'``, and ``'azimuth'``. The values
+        are arrays of the broadcast shape of the inputs, or scalars if all
+        inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.noaa
+    """
+    return _evaluate(kernels.noaa, times, latitude, longitude, **kwargs)
+
+
+def psa(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the PSA algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.psa`, e.g.,
+        ``coefficients``, ``dtype``, ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. The values are arrays of the broadcast shape of the
+        inputs, or scalars if all inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.psa
+    """
+    return _evaluate(kernels.psa, times, latitude, longitude, **kwargs)
+
+
+def sg2(times, latitude, longitude=None, elevation=0, **kwargs):
+    """
+    Calculate solar position using the SG2 algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    elevation : array-like, default 0
+        Altitude of the location above sea level. Omitted if ``latitude``
+        is a Site or Fleet. [m]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.sg2`, e.g., ``pressure``,
+        ``temperature``, ``dtype``, ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'apparent_elevation'``,
+        ``'zenith'``, ``'apparent_zenith'``, and ``'azimuth'``. The values
+        are arrays of the broadcast shape of the inputs, or scalars if all
+        inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.sg2
+    """
+    return _evaluate(kernels.sg2, times, latitude, longitude, elevation, **kwargs)
+
+
+def usno(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the USNO algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.usno`, e.g., ``delta_t``,
+        ``gmst_option``, ``dtype``, ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. The values are arrays of the broadcast shape of the
+        inputs, or scalars if all inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.usno
+    """
+    return _evaluate(kernels.usno, times, latitude, longitude, **kwargs)
+
+
+def walraven(times, latitude, longitude=None, **kwargs):
+    """
+    Calculate solar position using the Walraven algorithm, broadcasting the
+    inputs like a NumPy ufunc.
+
+    Parameters
+    ----------
+    times : array-like, pandas.DatetimeIndex, or TimeBundle
+        Timestamps of any shape as ``numpy.datetime64`` or int64 nanoseconds
+        since 1970-01-01, which are interpreted as UTC. pandas objects must
+        be localized.
+    latitude : array-like, Site, or Fleet
+        Latitude in decimal degrees. Positive north of equator, negative
+        to south. [degrees]
+    longitude : array-like, optional
+        Longitude in decimal degrees. Positive east of prime meridian,
+        negative to west. Omitted if ``latitude`` is a Site or Fleet.
+        [degrees]
+    **kwargs
+        Parameters of :py:func:`solposx.kernels.walraven`, e.g., ``dtype``,
+        ``out``, or ``backend``.
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys ``'elevation'``, ``'zenith'``, and
+        ``'azimuth'``. The values are arrays of the broadcast shape of the
+        inputs, or scalars if all inputs are scalars. [degrees]
+
+    See Also
+    --------
+    solposx.solarposition.walraven
+    """
+    return _evaluate(kernels.walraven, times, latitude, longitude, **kwargs)
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Fleet, Site
+from solposx.aio import ticks
+from solposx.solarposition import noaa
+from solposx.solarposition import psa
+
+
+async def _collect(generator, n, delay=0):
+    result = []
+    async for tick in generator:
+        result.append((time.time_ns(), tick))
+        if len(result) == n:
+            break
+        await asyncio.sleep(delay)
+    await generator.aclose()
+    return result
+
+
+@pytest.mark.parametrize('period', ['20ms', 0.02, pd.Timedelta('20ms')])
+def test_ticks(period):
+    fleet = Fleet([45, -30, 0], [10, -120, 0])
+    result = asyncio.run(_collect(ticks('noaa', fleet, period, block=3), 8))
+    times = pd.DatetimeIndex([t for _, (t, _) in result])
+    step = pd.Timedelta('20ms')
+    # consecutive multiples of the period
+    assert (times.as_unit('ns').asi8 % step.value == 0).all()
+    assert (np.diff(times) == step).all()
+    # published at the tick, not before
+    lags = np.array([now - t.value for now, (t, _) in result])
+    assert (lags >= 0).all()
+    assert np.median(lags) < step.value
+    expected = noaa(times, fleet, output='dict')
+    for name, value in expected.items():
+        actual = np.stack([solpos[name] for _, (_, solpos) in result])
+        np.testing.assert_array_equal(actual, value.reshape(8, 3))
+
+
+def test_ticks_skip():
+    # a consumer that is slower than the period skips the missed ticks
+    with ThreadPoolExecutor(1) as executor:
+        result = asyncio.run(_collect(
+            ticks('psa', Site(45, 10), '10ms', block=2, executor=executor),
+            4, delay=0.055))
+    times = pd.DatetimeIndex([t for _, (t, _) in result])
+    assert (np.diff(times) >= pd.Timedelta('50ms')).all()
+    solpos = result[-1][1][1]
+    expected = psa(times[-1:], Site(45, 10), output='dict')
+    assert solpos['zenith'].shape == (1,)
+    np.testing.assert_array_equal(solpos['zenith'], expected['zenith'])
+
+
+@pytest.mark.parametrize('args,kwargs,match', [
+    (('nasa_horizons', Site(45, 10), 0.1), {}, 'Unknown algorithm'),
+    (('noaa', Site(45, 10), 0), {}, 'period must be positive'),
+    (('noaa', Site(45, 10), '-1s'), {}, 'period must be positive'),
+    (('noaa', Site(45, 10), 0.1), {'block': 0}, 'block must be'),
+])
+def test_ticks_invalid(args, kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        ticks(*args, **kwargs)
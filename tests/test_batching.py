@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Coalescer
+from solposx.solarposition import noaa
+from solposx.solarposition import sg2
+
+
+@pytest.fixture
+def requests():
+    times = pd.date_range('2020-06-21', freq='37min', periods=200, tz='UTC')
+    latitudes = np.linspace(-60, 60, 200)
+    longitudes = np.linspace(-180, 180, 200)
+    return times, latitudes, longitudes
+
+
+def test_coalescer(requests):
+    times, latitudes, longitudes = requests
+    with Coalescer('sg2', window=0.01, max_batch=64) as coalescer:
+        with ThreadPoolExecutor(32) as executor:
+            results = list(executor.map(coalescer, times, latitudes,
+                                        longitudes))
+        stats = coalescer.stats()
+    expected = sg2(times, latitudes[:, None], longitudes[:, None],
+                   output='dict')
+    for name, values in expected.items():
+        np.testing.assert_allclose([r[name] for r in results], values,
+                                   rtol=0, atol=1e-10)
+    assert all(type(r['zenith']) is float for r in results)
+    assert stats['requests'] == 200
+    # the requests were coalesced into batches of at most max_batch
+    assert 4 <= stats['batches'] < 200
+    assert stats['mean_batch_size'] == 200 / stats['batches']
+    assert stats['throughput'] > 0
+    assert 0 < stats['latency_p50'] <= stats['latency_p90'] \
+        <= stats['latency_p99'] <= stats['latency_max']
+
+
+def test_coalescer_max_batch(requests):
+    times, latitudes, longitudes = requests
+    # a full batch is calculated without waiting for the window
+    with Coalescer('noaa', window=60, max_batch=10, delta_t=None) as coalescer:
+        futures = [coalescer.submit(*r) for r in zip(times, latitudes,
+                                                     longitudes)]
+        results = [f.result(timeout=30) for f in futures]
+        assert coalescer.stats()['batches'] == 20
+    expected = noaa(times, latitudes[:, None], longitudes[:, None],
+                    delta_t=None, output='dict')
+    np.testing.assert_allclose([r['azimuth'] for r in results],
+                               expected['azimuth'], rtol=0, atol=1e-10)
+
+
+def test_coalescer_time_formats():
+    time = pd.Timestamp('2020-06-21 14:00', tz='Europe/Berlin')
+    with Coalescer('psa', window=0) as coalescer:
+        results = [
+            coalescer(time, 45, 10),
+            coalescer('2020-06-21 12:00+00:00', 45, 10),
+            coalescer(time.to_pydatetime(), 45, 10),
+            coalescer(np.datetime64('2020-06-21T12:00'), 45, 10),
+        ]
+        with pytest.raises(TypeError, match='timezone naive'):
+            coalescer('2020-06-21 12:00', 45, 10)
+    assert all(r == results[0] for r in results)
+
+
+def test_coalescer_invalid_request():
+    # an invalid request fails without failing the rest of its batch
+    with Coalescer('sg2', window=0.05) as coalescer:
+        invalid = coalescer.submit('1950-01-01 00:00Z', 45, 10)
+        valid = coalescer.submit('2020-01-01 00:00Z', 45, 10)
+        with pytest.raises(ValueError, match='between 1980 and 2030'):
+            invalid.result()
+        assert np.isfinite(valid.result()['zenith'])
+        assert coalescer.stats()['batches'] == 1
+
+
+def test_coalescer_cancelled():
+    with Coalescer('noaa', window=0.05) as coalescer:
+        # a batch of cancelled requests only
+        future = coalescer.submit('2020-01-01 00:00Z', 45, 10)
+        assert future.cancel()
+        time.sleep(0.2)
+        # a cancelled request is skipped, the others are calculated
+        cancelled = coalescer.submit('2020-01-01 00:00Z', 45, 10)
+        valid = coalescer.submit('2020-01-01 01:00Z', 45, 10)
+        assert cancelled.cancel()
+        assert np.isfinite(valid.result(timeout=30)['zenith'])
+        assert np.isfinite(
+            coalescer('2020-01-01 02:00Z', 45, 10)['zenith'])
+        assert coalescer.stats()['requests'] == 2
+
+
+def test_coalescer_unexpected_error():
+    with Coalescer('noaa', window=0.05) as coalescer:
+        calculate = coalescer._calculate
+
+        def failing(batch):
+            batch[0][3].set_result({})
+            raise RuntimeError('unexpected')
+
+        coalescer._calculate = failing
+        first = coalescer.submit('2020-01-01 00:00Z', 45, 10)
+        second = coalescer.submit('2020-01-01 01:00Z', 45, 10)
+        assert first.result(timeout=30) == {}
+        with pytest.raises(RuntimeError, match='unexpected'):
+            second.result(timeout=30)
+        # the background thread calculates the next requests
+        coalescer._calculate = calculate
+        assert np.isfinite(
+            coalescer('2020-01-01 02:00Z', 45, 10)['zenith'])
+
+
+def test_coalescer_close():
+    coalescer = Coalescer('noaa', window=60)
+    future = coalescer.submit('2020-01-01 00:00Z', 45, 10)
+    # the pending requests are calculated on close
+    coalescer.close()
+    assert future.done()
+    assert np.isfinite(future.result()['zenith'])
+    with pytest.raises(RuntimeError, match='closed'):
+        coalescer.submit('2020-01-01 00:00Z', 45, 10)
+    assert not any(t.name == coalescer._worker.name
+                   for t in threading.enumerate())
+
+
+def test_coalescer_stats_empty():
+    with Coalescer() as coalescer:
+        assert repr(coalescer) == \
+            "Coalescer('sg2', window=0.002, max_batch=1024)"
+        stats = coalescer.stats()
+    assert stats['requests'] == 0
+    assert stats['batches'] == 0
+    assert np.isnan(stats['mean_batch_size'])
+    assert np.isnan(stats['latency_p99'])
+
+
+@pytest.mark.parametrize('kwargs,match', [
+    ({'algorithm': 'nasa_horizons'}, 'Unknown algorithm'),
+    ({'window': -1}, 'window must not be negative'),
+    ({'max_batch': 0}, 'max_batch must be'),
+])
+def test_coalescer_invalid(kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        Coalescer(**kwargs)
@@ -0,0 +1,159 @@
+import struct
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx.solarposition import ephemeris_table
+from solposx.solarposition import EphemerisTable, precompute_ephemeris
+from solposx.solarposition import geocentric, topocentric
+from solposx.solarposition import iqbal
+from solposx.solarposition import michalsky
+from solposx.solarposition import noaa
+from solposx.solarposition import psa
+from solposx.solarposition import sg2
+from solposx.solarposition import usno
+from solposx.solarposition import walraven
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'julian_date': 'pandas'}),
+    (noaa, {'delta_t': None}),
+    (psa, {}),
+    (sg2, {}),
+    (usno, {'gmst_option': 2}),
+    (walraven, {}),
+])
+def test_ephemeris_table(tmp_path, monkeypatch, algorithm, kwargs):
+    # several chunks per table
+    monkeypatch.setattr(ephemeris_table, '_CHUNK', 1000)
+    path = tmp_path / 'table.eph'
+    name = algorithm.__name__
+    table = precompute_ephemeris(path, name, '2020-03-19 00:00Z',
+                                 '2020-03-21 01:00+01:00', freq='1min',
+                                 **kwargs)
+    assert table.algorithm == name
+    assert table.kwargs == kwargs
+    assert len(table) == 2 * 1440 + 1
+    assert table.start == pd.Timestamp('2020-03-19', tz='UTC')
+    assert table.end == pd.Timestamp('2020-03-21', tz='UTC')
+    assert table.freq == pd.Timedelta('1min')
+    assert name in repr(table)
+    times = pd.date_range(table.start, table.end, freq='7min')
+    assert table.terms == list(geocentric(times, name, **kwargs).terms)
+    # identical at the timestamps of the table
+    ephemeris = EphemerisTable(path).geocentric(times)
+    assert ephemeris.index is times
+    pd.testing.assert_frame_equal(topocentric(ephemeris, 45, 10),
+                                  algorithm(times, 45, 10, **kwargs))
+    # interpolated between them
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, 2 * 86400 * 10**9, 2000)
+    times = table.start + pd.to_timedelta(np.sort(offsets))
+    # and calculated directly in the last minute of the UTC day
+    times = times.append(pd.DatetimeIndex(['2020-03-19 23:59:56Z',
+                                           '2020-03-20 23:59:00.5Z']))
+    latitude = rng.uniform(-89, 89, (len(times), 1))
+    longitude = rng.uniform(-180, 180, (len(times), 1))
+    result = topocentric(table.geocentric(times), latitude, longitude,
+                         output='dict')
+    expected = algorithm(times, latitude, longitude, output='dict', **kwargs)
+    np.testing.assert_allclose(result['elevation'], expected['elevation'],
+                               rtol=0, atol=1e-6)
+
+
+def test_ephemeris_table_midnight(tmp_path):
+    # terms of iqbal are discontinuous at midnight
+    table = precompute_ephemeris(tmp_path / 'table.eph', 'iqbal',
+                                 '2020-03-19 00:00Z', '2020-03-21 00:00Z')
+    times = pd.DatetimeIndex(['2020-03-19 23:59:56Z', '2020-03-20 00:00Z',
+                              '2020-03-20 00:00:04Z'])
+    pd.testing.assert_frame_equal(topocentric(table.geocentric(times), 45, 10),
+                                  iqbal(times, 45, 10))
+
+
+def test_ephemeris_table_sites(tmp_path):
+    table = precompute_ephemeris(tmp_path / 'table.eph', 'sg2',
+                                 '2020-01-01 00:00Z', '2020-01-02 00:00Z',
+                                 freq='15min')
+    times = pd.date_range('2020-01-01 06:00', freq='1h', periods=12,
+                          tz='Europe/Berlin')
+    result = topocentric(table.geocentric(times), [[45, -30]], [[10, -120]],
+                         elevation=[[0, 500]])
+    expected = sg2(times, [[45, -30]], [[10, -120]], elevation=[[0, 500]])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_ephemeris_table_outside(tmp_path):
+    table = precompute_ephemeris(tmp_path / 'table.eph', 'noaa',
+                                 '2020-01-01 00:00Z', '2020-01-02 00:00Z')
+    for time in ['2019-12-31 23:59:59Z', '2020-01-02 00:00:01Z']:
+        times = pd.DatetimeIndex([time])
+        with pytest.raises(ValueError, match='range of the table'):
+            table.geocentric(times)
+
+
+@pytest.mark.parametrize('args,kwargs,match', [
+    (('spa', '2020-01-01 00:00Z', '2020-01-02 00:00Z'), {},
+     'Unknown algorithm'),
+    (('noaa', '2020-01-01 00:00Z', '2020-01-02 00:00Z'), {'freq': '-1min'},
+     'freq must be positive'),
+    (('noaa', '2020-01-01 00:00Z', '2020-01-01 00:00:30Z'), {},
+     'at least two timestamps'),
+])
+def test_precompute_ephemeris_invalid(tmp_path, args, kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        precompute_ephemeris(tmp_path / 'table.eph', *args, **kwargs)
+
+
+def test_precompute_ephemeris_unsupported(tmp_path):
+    # sg2 supports 1980 to 2030, checked before the file is written
+    path = tmp_path / 'table.eph'
+    with pytest.raises(ValueError):
+        precompute_ephemeris(path, 'sg2', '2029-12-31 00:00Z',
+                             '2030-01-02 00:00Z')
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_precompute_ephemeris_failure(tmp_path, monkeypatch):
+    # an existing table is kept if a chunk fails
+    path = tmp_path / 'table.eph'
+    precompute_ephemeris(path, 'noaa', '2020-01-01 00:00Z',
+                         '2020-01-02 00:00Z', freq='1h')
+    monkeypatch.setattr(ephemeris_table, '_CHUNK', 10)
+    original = ephemeris_table.TimeBundle
+    calls = []
+
+    def failing(ticks):
+        calls.append(ticks)
+        if len(calls) > 2:
+            raise RuntimeError('failed chunk')
+        return original(ticks)
+
+    monkeypatch.setattr(ephemeris_table, 'TimeBundle', failing)
+    with pytest.raises(RuntimeError, match='failed chunk'):
+        precompute_ephemeris(path, 'psa', '2020-01-01 00:00Z',
+                             '2020-01-02 00:00Z', freq='1h')
+    assert list(tmp_path.iterdir()) == [path]
+    assert EphemerisTable(path).algorithm == 'noaa'
+
+
+def test_ephemeris_table_invalid_file(tmp_path):
+    path = tmp_path / 'table.eph'
+    path.write_bytes(b'not a table')
+    with pytest.raises(ValueError, match='not an ephemeris table file'):
+        EphemerisTable(path)
+    path.write_bytes(struct.pack('<10sHI', b'SOLPOSXEPH', 99, 0))
+    with pytest.raises(ValueError, match='format version 99'):
+        EphemerisTable(path)
+
+
+def test_ephemeris_table_main(tmp_path, capsys):
+    path = tmp_path / 'table.eph'
+    ephemeris_table.main([str(path), '--algorithm', 'psa', '--start',
+                          '2020-01-01 00:00Z', '--end', '2020-01-01 12:00Z',
+                          '--freq', '1h'])
+    assert 'Wrote EphemerisTable(algorithm=' in capsys.readouterr().out
+    table = EphemerisTable(path)
+    assert table.algorithm == 'psa'
+    assert len(table) == 13
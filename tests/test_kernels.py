@@ -0,0 +1,278 @@
+import importlib
+import sys
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Fleet, Site
+from solposx import kernels
+from solposx import solarposition
+from solposx.tools import TimeBundle
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-01-01', '2020-12-31', freq='7h13min', tz='UTC')
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    ('iqbal', {}),
+    ('michalsky', {}),
+    ('michalsky', {'julian_date': 'pandas'}),
+    ('michalsky', {'spencer_correction': False}),
+    ('noaa', {}),
+    ('noaa', {'delta_t': None}),
+    ('psa', {'coefficients': 2001}),
+    ('sg2', {}),
+    ('usno', {'gmst_option': 2}),
+    ('walraven', {}),
+])
+def test_kernel_matches_solarposition(algorithm, kwargs, times):
+    expected = getattr(solarposition, algorithm)(times, 45, 10, **kwargs)
+    # two-part julian dates reproduce the solarposition functions exactly
+    days, fraction = TimeBundle(times).days, TimeBundle(times).fraction
+    result = getattr(kernels, algorithm)(
+        (days + 2440587.5, fraction), 45, 10, **kwargs)
+    assert list(result.keys()) == list(expected.columns)
+    for c in expected.columns:
+        assert isinstance(result[c], np.ndarray)
+        np.testing.assert_array_equal(result[c], expected[c].to_numpy())
+    # single julian dates are accurate to the float64 resolution (~40 us)
+    result = getattr(kernels, algorithm)(
+        times.to_julian_date().to_numpy(), 45, 10, **kwargs)
+    for c in expected.columns:
+        np.testing.assert_allclose(result[c], expected[c], atol=1e-6)
+
+
+def test_kernel_julian_date_array():
+    result = kernels.noaa(np.array([2459140.0208333335]), 45, 10)
+    expected = solarposition.noaa(
+        pd.DatetimeIndex(['2020-10-17T12:30+00:00']), 45, 10)
+    for c in expected.columns:
+        np.testing.assert_allclose(result[c], expected[c], rtol=1e-9)
+
+
+def test_kernel_sg2_year_out_of_range():
+    with pytest.raises(ValueError, match='valid only between 1980 and 2030'):
+        kernels.sg2(np.array([2415020.5]), 50, 10)
+
+
+def test_kernel_time_bundle(times):
+    time = TimeBundle(times)
+    result = kernels.sg2(time, 45, 10)
+    expected = solarposition.sg2(times, 45, 10)
+    for c in expected.columns:
+        np.testing.assert_array_equal(result[c], expected[c].to_numpy())
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    ('iqbal', {}),
+    ('michalsky', {}),
+    ('michalsky', {'spencer_correction': False}),
+    ('noaa', {}),
+    ('noaa', {'delta_t': None}),
+    ('psa', {'coefficients': 2001}),
+    ('sg2', {'elevation': 1000}),
+    ('usno', {'gmst_option': 2}),
+    ('walraven', {}),
+])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_kernel_workspace(algorithm, kwargs, dtype, times):
+    kernel = getattr(kernels, algorithm)
+    time = TimeBundle(times)
+    jd = time.julian_date
+    fleet = Fleet([45, -30, 90], [10, -120, 0])
+    workspace = kernels.Workspace()
+    for args in [(jd, 45, 10), (jd[:, np.newaxis], fleet), (time, Site(45, 10)),
+                 ((time.days + 2440587.5, time.fraction), np.array(45), 10)]:
+        expected = kernel(*args, dtype=dtype, **kwargs)
+        for _ in range(3):
+            result = kernel(*args, dtype=dtype, workspace=workspace, **kwargs)
+            assert list(result) == list(expected)
+            for name, value in result.items():
+                assert type(value) is np.ndarray
+                np.testing.assert_array_equal(value, expected[name])
+        out = {'zenith': np.empty_like(expected['zenith'])}
+        result = kernel(*args, dtype=dtype, workspace=workspace, out=out,
+                        **kwargs)
+        assert result['zenith'] is out['zenith']
+        np.testing.assert_array_equal(out['zenith'], expected['zenith'])
+
+
+@pytest.mark.parametrize('algorithm', [
+    'iqbal', 'michalsky', 'noaa', 'psa', 'sg2', 'usno', 'walraven',
+])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_kernel_workspace_allocations(algorithm, dtype):
+    kernel = getattr(kernels, algorithm)
+    jd = 2459000.5 + np.arange(200_000) / 1440
+    fleet = Fleet([45, -30, 10], [10, -120, 50])
+    workspace = kernels.Workspace(max_memory=2**20)
+    for args in [(jd, Site(45, 10)), (jd[:50_000, np.newaxis], fleet)]:
+        out = {name: np.empty(value.shape, value.dtype)
+               for name, value in kernel(*args, dtype=dtype).items()}
+        kernel(*args, dtype=dtype, out=out, workspace=workspace)
+        tracemalloc.start()
+        try:
+            current, _ = tracemalloc.get_traced_memory()
+            kernel(*args, dtype=dtype, out=out, workspace=workspace)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # the memory traced during a call, which includes all array
+        # allocations of NumPy, stays within the budget of the workspace
+        # rather than growing with the batch of 100 bytes per element
+        assert peak - current <= workspace.max_memory
+
+
+def test_kernel_out():
+    jd = 2459000.5 + np.arange(10) / 24
+    expected = kernels.psa(jd, 45, 10)
+    out = {'azimuth': np.empty(10), 'zenith': np.empty(10)}
+    result = kernels.psa(jd, 45, 10, out=out)
+    assert list(result) == ['azimuth', 'zenith']
+    np.testing.assert_array_equal(out['azimuth'], expected['azimuth'])
+    with pytest.raises(ValueError, match='Unknown output: apparent_zenith'):
+        kernels.psa(jd, 45, 10, out={'apparent_zenith': np.empty(10)})
+
+
+def test_workspace():
+    workspace = kernels.Workspace(max_memory=10_000)
+    assert repr(workspace) == 'Workspace(max_memory=10000)'
+    jd = 2459000.5 + np.arange(100) / 24
+    expected = kernels.sg2(jd, 45, 10, elevation=np.arange(100.0))
+    # blocks of 26 timestamps of 384 bytes, without out arrays
+    result = kernels.sg2(jd, 45, 10, elevation=np.arange(100.0),
+                         workspace=workspace)
+    assert list(result) == list(expected)
+    for name, value in expected.items():
+        assert result[name].dtype == value.dtype
+        np.testing.assert_array_equal(result[name], value)
+    # two-part Julian dates and lists are split into blocks, too
+    jd_ut = (np.floor(jd), jd - np.floor(jd))
+    latitude = list(range(-50, 50))
+    expected = kernels.noaa(jd_ut, latitude, 10)
+    result = kernels.noaa(jd_ut, latitude, 10, workspace=workspace)
+    np.testing.assert_array_equal(result['zenith'], expected['zenith'])
+    with pytest.raises(ValueError, match='Unknown output: apparent_zenith'):
+        kernels.psa(jd, 45, 10, out={'apparent_zenith': np.empty(100)},
+                    workspace=workspace)
+
+
+_NUMBA_CASES = [
+    ('iqbal', {}),
+    ('michalsky', {}),
+    ('michalsky', {'julian_date': 'pandas'}),
+    ('michalsky', {'spencer_correction': False}),
+    ('noaa', {}),
+    ('psa', {'coefficients': 2001}),
+    ('sg2', {'elevation': 1000}),
+    ('usno', {'delta_t': None}),
+    ('usno', {'gmst_option': 2}),
+    ('walraven', {}),
+]
+
+
+def _assert_numba_close(result, expected, atol):
+    assert list(result) == list(expected)
+    for name, value in result.items():
+        assert type(value) is np.ndarray
+        assert value.shape == np.shape(expected[name])
+        difference = np.abs(value - expected[name])
+        if name == 'azimuth':
+            difference = np.minimum(difference, 360 - difference)
+        np.testing.assert_array_less(difference, atol)
+
+
+@pytest.fixture
+def numba_python(monkeypatch):
+    # the compiled kernels evaluated as Python functions, such that they are
+    # traced by coverage
+    numba = pytest.importorskip('numba')
+    from solposx.kernels import _numba
+    monkeypatch.setattr(numba.config, 'DISABLE_JIT', True)
+    importlib.reload(_numba)
+    yield
+    monkeypatch.undo()
+    importlib.reload(_numba)
+
+
+@pytest.mark.parametrize('algorithm,kwargs', _NUMBA_CASES)
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_kernel_numba(algorithm, kwargs, dtype, times):
+    pytest.importorskip('numba')
+    kernel = getattr(kernels, algorithm)
+    time = TimeBundle(times)
+    jd = time.julian_date
+    fleet = Fleet([45, -30, 80, -0.5], [10, -120, 0, 179], elevation=500)
+    for args in [(jd, 45, 10), (jd[:, np.newaxis], fleet), (time, Site(-45, 10)),
+                 ((time.days + 2440587.5, time.fraction), np.array(45), 10),
+                 (jd[:24].reshape(2, 3, 4), 60, np.array([-10, 0, 10, 20]))]:
+        expected = kernel(*args, **kwargs)
+        result = kernel(*args, dtype=dtype, backend='numba', **kwargs)
+        assert all(value.dtype == dtype for value in result.values())
+        # calculated in double precision irrespective of dtype
+        _assert_numba_close(result, expected,
+                            1e-9 if dtype == np.float64 else 1e-4)
+    out = {'zenith': np.empty(len(jd), dtype)}
+    result = kernel(jd, 45, 10, backend='numba', dtype=dtype, out=out,
+                    **kwargs)
+    assert result['zenith'] is out['zenith']
+
+
+def test_kernel_clip_unit():
+    # close to the zenith, rounding pushes the argument of the inverse sine
+    # of the azimuth of michalsky beyond 1 in double precision, which both
+    # backends clip
+    jd = 2459000.5 + np.arange(86120, 86140) / 172800
+    latitude = kernels.michalsky_geocentric(jd)['declination']
+    result = kernels.michalsky(jd, latitude, 0)
+    assert result['elevation'].min() > 89.9
+    assert not np.isnan(result['azimuth']).any()
+    pytest.importorskip('numba')
+    expected = kernels.michalsky(jd, latitude, 0, backend='numba')
+    np.testing.assert_allclose(result['azimuth'], expected['azimuth'],
+                               rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('algorithm,kwargs', _NUMBA_CASES)
+def test_kernel_numba_python(algorithm, kwargs, numba_python):
+    kernel = getattr(kernels, algorithm)
+    time = TimeBundle(pd.date_range('2020-10-01', '2020-10-02', freq='1h',
+                                    tz='UTC'))
+    jd = time.julian_date
+    fleet = Fleet([45, -3, 80], [10, 0, -120])
+    for args in [(jd, 45, 10), (jd[:, np.newaxis], fleet),
+                 (jd.reshape(1, -1, 1), np.array([45, -30]), 10)]:
+        expected = kernel(*args, **kwargs)
+        result = kernel(*args, backend='numba', **kwargs)
+        _assert_numba_close(result, expected, 1e-9)
+
+
+def test_kernel_numba_missing(monkeypatch):
+    pytest.importorskip('numba')
+    monkeypatch.delitem(sys.modules, 'solposx.kernels._numba')
+    monkeypatch.delattr(kernels, '_numba')
+    monkeypatch.setitem(sys.modules, 'numba', None)
+    jd = 2459000.5 + np.arange(10) / 24
+    expected = kernels.sg2(jd, 45, 10)
+    with pytest.warns(UserWarning, match="falling back to backend='numpy'"):
+        result = kernels.sg2(jd, 45, 10, backend='numba')
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+
+def test_kernel_numba_invalid():
+    jd = 2459000.5 + np.arange(10) / 24
+    with pytest.raises(ValueError, match='Unknown backend: cython'):
+        kernels.noaa(jd, 45, 10, backend='cython')
+    pytest.importorskip('numba')
+    with pytest.raises(ValueError, match='3 is not a valid `gmst_option`'):
+        kernels.usno(jd, 45, 10, gmst_option=3, backend='numba')
+    with pytest.raises(ValueError, match='Unknown coefficients set: 1999'):
+        kernels.psa(jd, 45, 10, coefficients=1999, backend='numba')
+    with pytest.raises(ValueError, match='valid only between 1980 and 2030'):
+        kernels.sg2(np.array([2415020.5]), 50, 10, backend='numba')
+    with pytest.raises(ValueError, match='dtype must be'):
+        kernels.iqbal(jd, 45, 10, dtype=np.int64, backend='numba')
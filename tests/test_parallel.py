@@ -0,0 +1,152 @@
+import gc
+import multiprocessing
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Fleet
+from solposx import parallel
+from solposx.parallel import compute, run_fleet
+from solposx.tools import TimeBundle
+from solposx.solarposition import iqbal
+from solposx.solarposition import michalsky
+from solposx.solarposition import noaa
+from solposx.solarposition import psa
+from solposx.solarposition import sg2
+from solposx.solarposition import spa
+from solposx.solarposition import usno
+from solposx.solarposition import walraven
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'julian_date': 'pandas', 'spencer_correction': False}),
+    (noaa, {'delta_t': None}),
+    (psa, {'coefficients': 2001}),
+    (sg2, {'elevation': [[0, 1000, 2000]], 'pressure': 90000}),
+    (usno, {'gmst_option': 2}),
+    (walraven, {'dtype': np.float32}),
+])
+@pytest.mark.parametrize('n_threads,chunksize', [(1, None), (4, None), (3, 5)])
+def test_compute(algorithm, kwargs, n_threads, chunksize, times):
+    per_row = np.linspace(-80, 80, len(times))[:, np.newaxis]
+    for latitude, longitude in [
+        (45, 10),  # single site
+        ([[45, -30, 90]], [[10, -120, 0]]),  # site axis
+        (per_row, 10),  # one site per timestamp
+        (Fleet([45, -30, 0], [10, -120, 0], elevation=[0, 1000, 2000]), None),
+    ]:
+        if isinstance(latitude, Fleet) or np.shape(latitude)[:1] == (49,):
+            kwargs = {k: v for k, v in kwargs.items() if k != 'elevation'}
+        expected = algorithm(times, latitude, longitude, **kwargs)
+        result = compute(algorithm.__name__, times, latitude, longitude,
+                         n_threads=n_threads, chunksize=chunksize, **kwargs)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_compute_site_axis(times):
+    # a single timestamp for many sites is split along the sites
+    latitudes = np.linspace(-80, 80, 101)
+    for latitude, longitude in [(latitudes[np.newaxis], 10),
+                                (Fleet(latitudes, 10), None)]:
+        expected = sg2(times[:1], latitude, longitude, output='dict')
+        result = compute('sg2', times[:1], latitude, longitude, n_threads=4,
+                         output='dict')
+        assert list(result) == list(expected)
+        for name in expected:
+            np.testing.assert_array_equal(result[name], expected[name])
+
+
+def test_compute_invalid(times):
+    with pytest.raises(ValueError, match='Unknown algorithm: spa'):
+        compute('spa', times, 45, 10)
+    with pytest.raises(ValueError, match='n_threads must be at least 1'):
+        compute('noaa', times, 45, 10, n_threads=0)
+    with pytest.raises(ValueError, match='chunksize must be at least 1'):
+        compute('noaa', times, 45, 10, chunksize=0)
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (noaa, {'delta_t': None}),
+    (sg2, {'elevation': 1000, 'pressure': 90000}),
+    (spa, {}),
+    (walraven, {'dtype': np.float32}),
+])
+@pytest.mark.parametrize('n_workers,chunksize', [(2, None), (3, 4)])
+def test_run_fleet(algorithm, kwargs, n_workers, chunksize, times):
+    latitudes = np.linspace(-80, 80, 11)
+    longitudes = np.linspace(-150, 150, 11)
+    result = run_fleet(algorithm.__name__, times, latitudes, longitudes,
+                       n_workers=n_workers, chunksize=chunksize, **kwargs)
+    expected = algorithm(times, [latitudes], [longitudes], output='dict',
+                         **kwargs)
+    assert result.shape == (2, len(times), len(latitudes))
+    assert result.dtype == expected['zenith'].dtype
+    for i, column in enumerate(['zenith', 'azimuth']):
+        np.testing.assert_array_equal(
+            result[i], expected[column].reshape(len(times), -1))
+
+
+def test_run_fleet_spawn(times):
+    fleet = Fleet(np.linspace(-80, 80, 5), 10, elevation=[0, 100, 200, 300,
+                                                          400])
+    (apparent_zenith,) = run_fleet(
+        'sg2', times, fleet, columns=['apparent_zenith'], n_workers=2,
+        mp_context=multiprocessing.get_context('spawn'))
+    expected = sg2(times, fleet, output='dict')['apparent_zenith']
+    np.testing.assert_array_equal(apparent_zenith.reshape(-1), expected)
+
+
+def test_run_fleet_shared_memory(times):
+    result = run_fleet('noaa', times, [45, -30], [10, -120], n_workers=1)
+    block = weakref.ref(result.base)
+    zenith = result[0]
+    del result
+    gc.collect()
+    # the shared memory block is kept alive by the views of the result
+    assert block() is not None
+    np.testing.assert_array_equal(
+        zenith, noaa(times, [[45, -30]], [[10, -120]], output='dict')[
+            'zenith'].reshape(len(times), -1))
+    del zenith
+    gc.collect()
+    assert block() is None
+
+
+def test_run_fleet_worker(times):
+    # the worker functions, called in this process
+    fleet = Fleet(np.linspace(-80, 80, 5), 10)
+    shape = (1, len(times), len(fleet))
+    shared_memory = SharedMemory(create=True, size=8 * np.prod(shape))
+    try:
+        parallel._init_worker(shared_memory.name, shape, np.float64, 'psa',
+                              TimeBundle(times), fleet, ('elevation',), {})
+        parallel._run_chunk(slice(1, 3))
+        result = parallel._worker.pop('out')
+        parallel._worker.clear()
+    finally:
+        shared_memory.unlink()
+    expected = psa(times, fleet[1:3], output='dict')['elevation']
+    np.testing.assert_array_equal(result[0, :, 1:3].reshape(-1), expected)
+
+
+def test_run_fleet_invalid(times):
+    with pytest.raises(ValueError, match='Unknown algorithm: nasa_horizons'):
+        run_fleet('nasa_horizons', times, [45], [10])
+    with pytest.raises(ValueError, match='Unknown column: apparent_zenith'):
+        run_fleet('psa', times, [45], [10], columns=['apparent_zenith'])
+    with pytest.raises(ValueError, match='n_workers must be at least 1'):
+        run_fleet('noaa', times, [45], [10], n_workers=0)
+    with pytest.raises(ValueError, match='chunksize must be at least 1'):
+        run_fleet('noaa', times, [45], [10], chunksize=0)
+    # errors of the workers are raised
+    times = pd.date_range('2030-12-31 23:00', periods=3, freq='1h', tz='UTC')
+    with pytest.raises(ValueError, match='only between 1980 and 2030'):
+        run_fleet('sg2', times, [45], [10], n_workers=1)
@@ -0,0 +1,110 @@
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import grid
+from solposx.solarposition import michalsky
+from solposx.solarposition import noaa
+from solposx.solarposition import sg2
+from solposx.solarposition import usno
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-06-21', freq='3h', periods=8, tz='UTC')
+
+
+@pytest.fixture
+def lats():
+    return np.linspace(89, -89, 7)
+
+
+@pytest.fixture
+def lons():
+    return np.linspace(-180, 170, 5)
+
+
+def _expected(algorithm, times, lats, lons, column, **kwargs):
+    # reference values calculated pixel by pixel
+    expected = np.empty((len(times), len(lats), len(lons)))
+    for i, latitude in enumerate(lats):
+        for j, longitude in enumerate(lons):
+            solpos = algorithm(times, latitude, longitude, **kwargs)
+            expected[:, i, j] = solpos[column]
+    return expected
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (noaa, {'delta_t': None}),
+    (michalsky, {'spencer_correction': False, 'julian_date': 'pandas'}),
+    (usno, {'gmst_option': 2}),
+    (sg2, {'elevation': 1000, 'pressure': 90000}),
+])
+@pytest.mark.parametrize('max_memory', [2**28, 1000, 5000])
+def test_grid(algorithm, kwargs, max_memory, times, lats, lons):
+    result = grid(times, lats, lons, algorithm=algorithm.__name__,
+                  max_memory=max_memory, **kwargs)
+    assert list(result) == ['zenith', 'azimuth']
+    for column in result:
+        expected = _expected(algorithm, times, lats, lons, column, **kwargs)
+        np.testing.assert_allclose(result[column], expected, rtol=1e-12)
+
+
+def test_grid_two_dimensional(times, lats, lons):
+    longitude, latitude = np.meshgrid(lons, lats)
+    elevation = np.arange(latitude.size).reshape(latitude.shape) * 100
+    result = grid(times, latitude, longitude, algorithm='sg2',
+                  elevation=elevation, columns=['apparent_zenith'])
+    expected = sg2(times, latitude[2, 3], longitude[2, 3],
+                   elevation=elevation[2, 3])
+    np.testing.assert_allclose(result['apparent_zenith'][:, 2, 3],
+                               expected['apparent_zenith'], rtol=1e-12)
+
+
+def test_grid_memmap(tmp_path, times, lats, lons):
+    result = grid(times, lats, lons, path=tmp_path, dtype=np.float32,
+                  max_memory=1000)
+    assert isinstance(result['zenith'], np.memmap)
+    zenith = np.load(tmp_path / 'zenith.npy')
+    assert zenith.dtype == np.float32
+    assert zenith.shape == (len(times), len(lats), len(lons))
+    expected = _expected(noaa, times, lats, lons, 'zenith', dtype=np.float32)
+    np.testing.assert_array_equal(zenith, expected)
+
+
+def test_grid_out(times, lats, lons):
+    out = {'elevation': np.full((len(times), len(lats), len(lons)), np.nan)}
+    result = grid(times, lats, lons, algorithm='psa', out=out)
+    assert result['elevation'] is out['elevation']
+    assert not np.isnan(out['elevation']).any()
+
+
+def test_grid_invalid(times, lats, lons):
+    with pytest.raises(ValueError, match='must have shape'):
+        grid(times, lats, lons, out={'zenith': np.empty((1, 1))})
+    with pytest.raises(ValueError, match='two-dimensional arrays of a raster'):
+        grid(times, np.zeros((2, 7, 1)), lons)
+    with pytest.raises(ValueError, match='Unknown column: apparent_zenith'):
+        grid(times, lats, lons, algorithm='psa', columns=['apparent_zenith'])
+    with pytest.raises(ValueError, match='Unknown algorithm: spa'):
+        grid(times, lats, lons, algorithm='spa')
+
+
+@pytest.mark.parametrize('algorithm', [
+    'iqbal', 'michalsky', 'noaa', 'psa', 'sg2', 'usno', 'walraven'])
+def test_grid_max_memory(algorithm):
+    # the peak memory of the temporary arrays stays within the budget
+    times = pd.date_range('2020-06-21', freq='1h', periods=48, tz='UTC')
+    lats = np.linspace(60, -60, 200)
+    lons = np.linspace(-180, 180, 200)
+    out = {name: np.empty((48, 200, 200)) for name in ('zenith', 'azimuth')}
+    max_memory = 2**22
+    tracemalloc.start()
+    try:
+        grid(times, lats, lons, algorithm=algorithm, out=out,
+             max_memory=max_memory)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak <= max_memory
@@ -81,6 +81,20 @@ def test_algorithm(algorithm, expected, kwargs, test_elevation_angles):
     result_series = algorithm(elevation=test_elevation_angles_series, **kwargs)
     pd.testing.assert_series_equal(expected_series, result_series)
 
+    # numpy array output of pandas series input
+    result_ndarray = algorithm(elevation=test_elevation_angles_series,
+                               output='ndarray', **kwargs)
+    assert type(result_ndarray) is np.ndarray
+    np.testing.assert_almost_equal(expected(), result_ndarray)
+
+
+@pytest.mark.parametrize('algorithm', [
+    archer, bennett, hughes, michalsky, sg2, spa,
+])
+def test_algorithm_invalid_output(algorithm, test_elevation_angles):
+    with pytest.raises(ValueError, match='Unknown output: series'):
+        algorithm(test_elevation_angles, output='series')
+
 
 def test_spa_refraction_limit():
     assert spa(elevation=-2, refraction_limit=-1) == 0
@@ -88,3 +102,20 @@ def test_spa_refraction_limit():
     assert spa(elevation=-2, refraction_limit=-2) != 0
     assert spa(elevation=-0.26667, refraction_limit=0) != 0
     assert spa(elevation=-0.26668, refraction_limit=0) != 1
+
+
+@pytest.mark.parametrize('algorithm,expected', [
+    (archer, expected_archer),
+    (bennett, expected_bennett),
+    (hughes, expected_hughes),
+    (michalsky, expected_michalsky),
+    (sg2, expected_sg2),
+    (spa, expected_spa),
+])
+def test_algorithm_scalar(algorithm, expected, test_elevation_angles):
+    for elevation, value in zip(test_elevation_angles, expected()):
+        np.testing.assert_almost_equal(algorithm(elevation), value)
+        result = algorithm(np.array(elevation), output='ndarray')
+        assert type(result) is np.ndarray
+        assert result.shape == ()
+        np.testing.assert_almost_equal(result, value)
@@ -0,0 +1,91 @@
+import math
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import kernels, scalar
+from solposx.tools import TimeBundle, _calendar_from_days
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('1981-01-01', '2029-12-31', freq='97h13min',
+                         tz='UTC')
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    ('iqbal', {}),
+    ('michalsky', {}),
+    ('michalsky', {'spencer_correction': False}),
+    ('michalsky', {'julian_date': 'pandas'}),
+    ('noaa', {}),
+    ('psa', {}),
+    ('psa', {'coefficients': 2001}),
+    ('sg2', {}),
+    ('sg2', {'elevation': 2000}),
+    ('usno', {}),
+    ('usno', {'delta_t': None, 'gmst_option': 2}),
+    ('walraven', {}),
+])
+@pytest.mark.parametrize('latitude,longitude', [
+    (-60, -120), (-0.5, 179), (0, 0), (45, 10), (80, -30), (90, 0),
+])
+def test_algorithm(algorithm, kwargs, latitude, longitude, times):
+    function = getattr(scalar, algorithm)
+    expected = getattr(kernels, algorithm)(TimeBundle(times), latitude,
+                                           longitude, **kwargs)
+    seconds = times.as_unit('ns').asi8 / 1e9
+    result = [function(t, latitude, longitude, **kwargs) for t in seconds]
+    zenith, azimuth = np.array(result).T
+    assert all(type(value) is float for value in result[0])
+    np.testing.assert_allclose(zenith, expected['zenith'], rtol=0, atol=1e-9)
+    if abs(latitude) < 90:  # the azimuth is undefined at the poles
+        difference = np.abs(azimuth - expected['azimuth'])
+        difference = np.minimum(difference, 360 - difference)
+        # the PSA algorithm uses an integer Julian date formula
+        np.testing.assert_array_less(difference,
+                                     1e-7 if algorithm == 'psa' else 1e-9)
+
+
+def test_walraven_before_1980():
+    times = pd.date_range('1960-01-01', '1980-01-01', freq='307h', tz='UTC')
+    expected = kernels.walraven(TimeBundle(times), 45, 10)
+    result = [scalar.walraven(t, 45, 10) for t in times.as_unit('s').asi8]
+    np.testing.assert_allclose(np.array(result).T,
+                               [expected['zenith'], expected['azimuth']],
+                               rtol=0, atol=1e-9)
+
+
+def test_algorithm_numpy_scalar():
+    seconds = np.float64(1.6e9)
+    assert scalar.noaa(seconds, 45, 10) == scalar.noaa(1.6e9, 45, 10)
+
+
+def test_algorithm_invalid():
+    with pytest.raises(ValueError, match='has to be either'):
+        scalar.michalsky(1.6e9, 45, 10, julian_date='unix')
+    with pytest.raises(ValueError, match='Unknown coefficients set: 1999'):
+        scalar.psa(1.6e9, 45, 10, coefficients=1999)
+    with pytest.raises(ValueError, match='valid only between 1980 and 2030'):
+        scalar.sg2(0, 45, 10)
+    with pytest.raises(ValueError, match='3 is not a valid `gmst_option`'):
+        scalar.usno(1.6e9, 45, 10, gmst_option=3)
+
+
+def test_noaa_zenith():
+    # the azimuth is undefined with the sun at the zenith
+    _, _, zenith, _, azimuth = scalar._noaa_topocentric(0, 720, 0, 0, 1)
+    assert zenith == 0
+    assert math.isnan(azimuth)
+
+
+def test_clip_unit():
+    assert [scalar._clip_unit(x) for x in (1.5, -1.5, 0.5)] == [1, -1, 0.5]
+    assert math.isnan(scalar._clip_unit(math.nan))
+
+
+def test_calendar():
+    days = np.arange(-1000000, 1000000, 97)
+    expected = np.array(_calendar_from_days(days)).T
+    result = np.array([scalar._calendar(int(day)) for day in days])
+    np.testing.assert_array_equal(result, expected)
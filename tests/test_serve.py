@@ -0,0 +1,405 @@
+import asyncio
+import concurrent.futures
+import http.client
+import io
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Site, solarposition
+from solposx.serve import ALGORITHMS, Service, main
+from solposx.solarposition import noaa
+from solposx.solarposition import psa
+from solposx.solarposition import sg2
+
+
+@pytest.fixture
+def service():
+    return Service(window=0.02, max_batch=64, cache_size=2)
+
+
+@pytest.fixture
+def port(service):
+    # run the service in an event loop of a background thread
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(service.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+def _request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    payload = response.read()
+    connection.close()
+    return response, payload
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-06-21', freq='3h', periods=8, tz='UTC')
+
+
+def test_serve_json(port, times):
+    body = {
+        'times': [t.isoformat() for t in times],
+        'latitude': 45, 'longitude': 10, 'elevation': 500, 'pressure': 90000,
+        'temperature': 20,
+    }
+    response, payload = _request(port, 'POST', '/solarposition/sg2', body)
+    assert response.status == 200
+    assert response.getheader('Content-Type') == 'application/json'
+    result = json.loads(payload)
+    expected = sg2(times, 45, 10, elevation=500, pressure=90000, temperature=20)
+    assert pd.DatetimeIndex(result.pop('time')).equals(times)
+    pd.testing.assert_frame_equal(pd.DataFrame(result, index=times), expected,
+                                  check_freq=False)
+
+
+@pytest.mark.parametrize('path,headers', [
+    ('/solarposition/noaa?format=npz', {}),
+    ('/solarposition/noaa', {'Accept': 'application/x-npz'}),
+])
+def test_serve_npz(port, times, path, headers):
+    body = {'times': times.as_unit('ns').asi8.tolist(),
+            'latitude': -30, 'longitude': -70, 'options': {'delta_t': None}}
+    response, payload = _request(port, 'POST', path, body, headers)
+    assert response.status == 200
+    assert response.getheader('Content-Type') == 'application/x-npz'
+    result = dict(np.load(io.BytesIO(payload)))
+    np.testing.assert_array_equal(result.pop('time'),
+                                  times.as_unit('ns').asi8)
+    expected = noaa(times, -30, -70, delta_t=None, output='dict')
+    assert result.keys() == expected.keys()
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+
+def test_serve_batching(port, service, times):
+    # concurrent requests are merged into batches with one call per site
+    sites = [(45, 10), (45, 10), (-30, -70)] * 8
+
+    def request(site):
+        body = {'times': [t.isoformat() for t in times],
+                'latitude': site[0], 'longitude': site[1]}
+        response, payload = _request(port, 'POST', '/solarposition/psa', body)
+        assert response.status == 200
+        return json.loads(payload)['zenith']
+
+    with ThreadPoolExecutor(len(sites)) as executor:
+        results = list(executor.map(request, sites))
+    for site, zenith in zip(sites, results):
+        expected = psa(times, *site)
+        np.testing.assert_allclose(zenith, expected['zenith'], rtol=0,
+                                   atol=1e-10)
+    counters = service._counters
+    assert counters['requests', 'psa'] == 24
+    assert counters['batches', ''] < 24
+    assert counters['calls', ''] < 24
+    assert counters['timestamps', ''] == 24 * len(times)
+
+
+def test_serve_daylight_only(port, times):
+    # values of the skipped rows are null
+    body = {'times': [t.isoformat() for t in times], 'latitude': 45,
+            'longitude': 10, 'options': {'daylight_only': True}}
+    response, payload = _request(port, 'POST', '/solarposition/psa', body)
+    assert response.status == 200
+    assert b'NaN' not in payload
+    result = json.loads(payload)
+    expected = psa(times, 45, 10, daylight_only=True)
+    assert None in result['elevation']
+    elevation = np.array(result['elevation'], dtype=float)
+    np.testing.assert_array_equal(elevation, expected['elevation'])
+
+
+def test_serve_calculate_invalid(times):
+    # an invalid request does not fail the other requests of the site
+    async def calculate():
+        service = Service(window=0.05)
+        site = Site(45, 10)
+        invalid = pd.DatetimeIndex(['2050-01-01'], tz='UTC')
+        results = await asyncio.gather(
+            service.calculate('sg2', times, site),
+            service.calculate('sg2', invalid, site),
+            service.calculate('sg2', times[1:], site),
+            return_exceptions=True)
+        return service, results
+
+    service, results = asyncio.run(calculate())
+    assert service._counters['batches', ''] == 1
+    assert service._counters['calls', ''] == 4
+    assert isinstance(results[1], ValueError)
+    expected = sg2(times, Site(45, 10), output='dict')
+    np.testing.assert_array_equal(results[0]['zenith'], expected['zenith'])
+    np.testing.assert_array_equal(results[2]['zenith'],
+                                  expected['zenith'][1:])
+
+
+def test_serve_metrics(port, times):
+    body = {'times': [times[0].isoformat()], 'latitude': 45,
+            'longitude': 10}
+    for latitude in (45, 45, 50, 55, 45):
+        body['latitude'] = latitude
+        _request(port, 'POST', '/solarposition/iqbal', body)
+    _request(port, 'POST', '/solarposition/iqbal', {})
+    response, payload = _request(port, 'GET', '/metrics')
+    assert response.status == 200
+    assert response.getheader('Content-Type').startswith('text/plain')
+    metrics = dict(line.rsplit(' ', 1) for line in payload.decode().splitlines()
+                   if not line.startswith('#'))
+    assert metrics['solposx_requests_total{algorithm="iqbal"}'] == '5'
+    assert metrics['solposx_errors_total'] == '1'
+    assert metrics['solposx_site_cache_hits_total'] == '1'
+    assert metrics['solposx_site_cache_misses_total'] == '4'
+    assert metrics['solposx_site_cache_size'] == '2'
+    assert metrics['solposx_request_latency_seconds_count'] == '5'
+    assert float(metrics['solposx_request_latency_seconds{quantile="0.5"}']) > 0
+
+
+def test_serve_metrics_empty(service):
+    metrics = service.metrics()
+    assert 'solposx_request_latency_seconds_count 0\n' in metrics
+    assert 'quantile' not in metrics
+
+
+def test_serve_algorithms(port):
+    response, payload = _request(port, 'GET', '/algorithms')
+    assert response.status == 200
+    assert json.loads(payload) == list(ALGORITHMS)
+    assert 'skyfield' not in ALGORITHMS
+
+
+def test_serve_keep_alive(port, times):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for _ in range(3):
+        connection.request('GET', '/algorithms')
+        response = connection.getresponse()
+        assert response.getheader('Connection') == 'keep-alive'
+        response.read()
+    connection.close()
+
+
+@pytest.mark.parametrize('method,path,body,status,match', [
+    ('GET', '/unknown', None, 404, 'Not found'),
+    ('POST', '/solarposition/unknown', {}, 404, 'Unknown algorithm'),
+    ('GET', '/solarposition/noaa', None, 405, 'not allowed'),
+    ('POST', '/metrics', {}, 405, 'not allowed'),
+    ('POST', '/solarposition/noaa', b'{', 400, 'JSONDecodeError'),
+    ('POST', '/solarposition/noaa', [], 400, 'JSON object'),
+    ('POST', '/solarposition/noaa', {'times': []}, 400, 'latitude'),
+    ('POST', '/solarposition/noaa',
+     {'times': [[0]], 'latitude': 0, 'longitude': 0}, 400, 'list of'),
+    ('POST', '/solarposition/noaa',
+     {'times': ['2020-01-01'], 'latitude': 0, 'longitude': 0}, 400,
+     'timezone naive'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': 0, 'longitude': 0, 'options': 1}, 400,
+     'options must be'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': 'north', 'longitude': 0}, 400, 'ValueError'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': [45], 'longitude': 0}, 400, 'TypeError'),
+    ('POST', '/solarposition/noaa',
+     {'times': {'a': 0}, 'latitude': 0, 'longitude': 0}, 400, 'list of'),
+    ('POST', '/solarposition/noaa', b'\xff', 400, 'UnicodeDecodeError'),
+    ('POST', '/solarposition/sg2',
+     {'times': [0], 'latitude': 0, 'longitude': 0}, 400,
+     'between 1980 and 2030'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': 0, 'longitude': 0,
+      'options': {'unknown': 1}}, 400, 'unexpected keyword'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': 0, 'longitude': 0,
+      'options': {'output': 'numpy'}}, 400, 'unexpected keyword'),
+    ('POST', '/solarposition/noaa',
+     {'times': [0], 'latitude': 0, 'longitude': 0,
+      'options': {'pressure': 1}}, 400, 'not in options'),
+])
+def test_serve_errors(port, method, path, body, status, match):
+    response, payload = _request(port, method, path, body)
+    assert response.status == status
+    assert match in json.loads(payload)['error']
+
+
+def test_serve_internal_error(port, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('calculation failed')
+
+    monkeypatch.setattr(solarposition, 'noaa', fail)
+    body = {'times': [0], 'latitude': 0, 'longitude': 0}
+    response, payload = _request(port, 'POST', '/solarposition/noaa', body)
+    assert response.status == 500
+    assert json.loads(payload) == {
+        'error': 'RuntimeError: calculation failed'}
+
+
+def test_serve_calculate_max_batch(times):
+    # a full batch is calculated before the end of the window
+    async def calculate():
+        service = Service(window=0.05, max_batch=2)
+        site = Site(45, 10)
+        results = await asyncio.gather(*(
+            service.calculate('noaa', times[i:], site) for i in range(3)))
+        await asyncio.sleep(0.1)
+        return service, results
+
+    service, results = asyncio.run(calculate())
+    assert service._counters['batches', ''] == 2
+    assert service._counters['calls', ''] == 2
+    expected = noaa(times, Site(45, 10), output='dict')
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result['zenith'], expected['zenith'][i:])
+
+
+def _raw_request(port, request):
+    with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+        sock.sendall(request)
+        response = b''
+        while chunk := sock.recv(1024):
+            response += chunk
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return head, json.loads(payload)
+
+
+@pytest.mark.parametrize('request_', [
+    b'garbage\r\n\r\n',
+    b'POST /solarposition/noaa HTTP/1.1\r\nContent-Length: x\r\n\r\n',
+    b'POST /solarposition/noaa HTTP/1.1\r\nContent-Length: -1\r\n\r\n',
+], ids=['request line', 'length', 'negative length'])
+def test_serve_malformed_request(port, request_):
+    # malformed requests are answered with 400 and the connection is closed
+    head, payload = _raw_request(port, request_)
+    assert head.startswith(b'HTTP/1.1 400 Bad Request\r\n')
+    assert b'Connection: close' in head
+    assert payload == {'error': 'Malformed HTTP request.'}
+
+
+def test_serve_incomplete_request(port):
+    # the connection is closed if it ends within a request
+    with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+        sock.sendall(b'POST /solarposition/noaa HTTP/1.1\r\n'
+                     b'Content-Length: 10\r\n\r\n{}')
+        sock.shutdown(socket.SHUT_WR)
+        assert sock.recv(1024) == b''
+
+
+def test_serve_payload_too_large(port, service):
+    length = service.max_body + 1
+    head, payload = _raw_request(
+        port, b'POST /solarposition/noaa HTTP/1.1\r\n'
+        b'Content-Length: %d\r\n\r\n' % length)
+    assert head.startswith(b'HTTP/1.1 413 Payload Too Large\r\n')
+    assert payload == {
+        'error': f'The request body exceeds {service.max_body} bytes.'}
+    assert service._counters['errors', ''] == 1
+
+
+class _FailingExecutor(concurrent.futures.Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise RuntimeError('executor failed')
+
+
+class _BlockingExecutor(concurrent.futures.Executor):
+    def submit(self, fn, *args, **kwargs):
+        # a calculation that never finishes
+        return concurrent.futures.Future()
+
+
+def test_serve_calculate_executor_error(times):
+    # a failure of the executor is set on all requests of the batch
+    async def calculate():
+        service = Service(window=0.01, executor=_FailingExecutor())
+        return await asyncio.gather(
+            service.calculate('noaa', times, Site(45, 10)),
+            service.calculate('noaa', times, Site(50, 10)),
+            return_exceptions=True)
+
+    results = asyncio.run(calculate())
+    assert [str(result) for result in results] == ['executor failed'] * 2
+
+
+def test_serve_executor_error(times):
+    service = Service(window=0.01, executor=_FailingExecutor())
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(service.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        body = {'times': [0], 'latitude': 0, 'longitude': 0}
+        response, payload = _request(server.sockets[0].getsockname()[1],
+                                     'POST', '/solarposition/noaa', body)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+    assert response.status == 500
+    assert json.loads(payload) == {'error': 'RuntimeError: executor failed'}
+
+
+def test_serve_calculate_cancelled(times):
+    # a cancelled request does not fail the other requests of the batch
+    async def calculate():
+        service = Service(window=0.01)
+        site = Site(45, 10)
+        first = asyncio.ensure_future(service.calculate('noaa', times, site))
+        second = asyncio.ensure_future(
+            service.calculate('noaa', times[1:], site))
+        await asyncio.sleep(0)
+        first.cancel()
+        return first, await second
+
+    first, result = asyncio.run(calculate())
+    assert first.cancelled()
+    expected = noaa(times[1:], Site(45, 10), output='dict')
+    np.testing.assert_array_equal(result['zenith'], expected['zenith'])
+
+
+def test_serve_calculate_task_cancelled(times):
+    # the requests of a batch are cancelled with the calculation
+    async def calculate():
+        service = Service(window=0.01, executor=_BlockingExecutor())
+        request = asyncio.ensure_future(
+            service.calculate('noaa', times, Site(45, 10)))
+        await asyncio.sleep(0.05)
+        (task,) = service._tasks
+        task.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        return request
+
+    assert asyncio.run(calculate()).cancelled()
+
+
+def test_serve_http10(port):
+    with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+        sock.sendall(b'GET /algorithms HTTP/1.0\r\n\r\n')
+        response = b''
+        while chunk := sock.recv(1024):
+            response += chunk
+    assert response.startswith(b'HTTP/1.0 200 OK\r\n')
+    assert b'Connection: close\r\n' in response
+
+
+def test_serve_main(monkeypatch, capsys):
+    async def serve_forever(self):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(asyncio.Server, 'serve_forever', serve_forever)
+    main(['--port', '0', '--window', '0.01'])
+    assert 'Serving solar positions on http://127.0.0.1:' in \
+        capsys.readouterr().out
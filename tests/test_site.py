@@ -0,0 +1,129 @@
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Site, Fleet
+from solposx import kernels
+from solposx.solarposition import iqbal
+from solposx.solarposition import michalsky
+from solposx.solarposition import noaa
+from solposx.solarposition import psa
+from solposx.solarposition import sg2
+from solposx.solarposition import sg2_c
+from solposx.solarposition import skyfield
+from solposx.solarposition import spa
+from solposx.solarposition import usno
+from solposx.solarposition import walraven
+from solposx.solarposition import geocentric, topocentric
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+
+
+def test_site():
+    site = Site(45, 10, elevation=200, pressure=90000, temperature=20)
+    assert not hasattr(site, '__dict__')
+    with pytest.raises(AttributeError):
+        site.timezone = 'UTC'
+    assert site.sin_latitude == np.sin(np.radians(45))
+    assert site.cos_latitude == np.cos(np.radians(45))
+    assert repr(site) == (
+        'Site(latitude=45.0, longitude=10.0, elevation=200.0, '
+        'pressure=90000.0, temperature=20.0)')
+
+
+def test_fleet():
+    fleet = Fleet([45, -30, 90], [10, -120, 0], elevation=[0, 100, 200])
+    assert not hasattr(fleet, '__dict__')
+    assert len(fleet) == 3
+    assert fleet.shape == (3,)
+    assert repr(fleet) == 'Fleet(<3 sites>)'
+    np.testing.assert_array_equal(fleet.pressure, [101325] * 3)
+    np.testing.assert_array_equal(
+        fleet.sin_latitude, np.sin(np.radians([45, -30, 90])))
+    site = fleet[1]
+    assert isinstance(site, Site)
+    assert (site.latitude, site.longitude, site.elevation) == (-30, -120, 100)
+    assert site.parallax_x == fleet.parallax_x[1]
+    subset = fleet[1:]
+    assert isinstance(subset, Fleet)
+    np.testing.assert_array_equal(subset.latitude, [-30, 90])
+    roundtrip = Fleet.from_sites([fleet[i] for i in range(len(fleet))])
+    for name in Site.__slots__:
+        np.testing.assert_array_equal(
+            getattr(roundtrip, name), getattr(fleet, name))
+
+
+def test_fleet_invalid_shape():
+    with pytest.raises(ValueError, match='one-dimensional'):
+        Fleet([[45, -30]], [10, -120])
+    with pytest.raises(ValueError, match='one-dimensional'):
+        Fleet(45, 10)
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_algorithm_site(algorithm, times):
+    for latitude, longitude in [(45, 10), (-30, -120), (90, 0), (-90, 0)]:
+        expected = algorithm(times, latitude, longitude)
+        result = algorithm(times, Site(latitude, longitude))
+        pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_algorithm_fleet(algorithm, times):
+    latitudes = [45, -30, 90, 0]
+    longitudes = [10, -120, 0, 180]
+    expected = algorithm(times, [latitudes], [longitudes])
+    result = algorithm(times, Fleet(latitudes, longitudes))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('algorithm', [sg2, sg2_c])
+def test_algorithm_fleet_refraction(algorithm, times):
+    fleet = Fleet([45, -30], [10, -120], elevation=[0, 4000],
+                  pressure=[101325, 61000], temperature=[12, -10])
+    result = algorithm(times, fleet)
+    expected = algorithm(times, -30, -120, elevation=4000, pressure=61000,
+                         temperature=-10)
+    pd.testing.assert_frame_equal(
+        result.xs(1, level='site'), expected, check_freq=False)
+    result = algorithm(times, fleet[1])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_spa_site_refraction(times):
+    site = Site(-30, -120, elevation=4000, pressure=61000, temperature=-10)
+    expected = spa(times, -30, -120, elevation=4000, air_pressure=61000,
+                   temperature=-10)
+    pd.testing.assert_frame_equal(spa(times, site), expected)
+
+
+@pytest.mark.parametrize('algorithm', [
+    'iqbal', 'michalsky', 'noaa', 'psa', 'sg2', 'usno', 'walraven',
+])
+def test_kernel_site(algorithm, times):
+    kernel = getattr(kernels, algorithm)
+    site = Site(45, 10, elevation=1000)
+    kwargs = {'elevation': 1000} if algorithm == 'sg2' else {}
+    expected = kernel(times.to_julian_date().values, 45, 10, **kwargs)
+    result = kernel(times.to_julian_date().values, site)
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+
+def test_topocentric_fleet(times):
+    ephemeris = geocentric(times, 'sg2')
+    result = topocentric(ephemeris, Fleet([45, -30], [10, -120], [0, 500]))
+    expected = sg2(times, [[45, -30]], [[10, -120]], elevation=[[0, 500]])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('algorithm', [noaa, sg2, spa])
+def test_missing_longitude(algorithm, times):
+    with pytest.raises(TypeError, match='longitude must be specified'):
+        algorithm(times, 45)
@@ -1,6 +1,9 @@
+import tracemalloc
+
 import pandas as pd
 import numpy as np
 import pytest
+from solposx import Fleet
 from solposx.solarposition import iqbal
 from solposx.solarposition import michalsky
 from solposx.solarposition import nasa_horizons
@@ -12,6 +15,8 @@ from solposx.solarposition import skyfield
 from solposx.solarposition import spa
 from solposx.solarposition import usno
 from solposx.solarposition import walraven
+from solposx.solarposition import geocentric, topocentric
+from solposx.tools import TimeBundle
 
 
 psa_2020_coefficients = [
@@ -519,6 +524,19 @@ def test_usno_gmst_option_value_error():
         )
 
 
+def test_usno_fractional_seconds():
+    # the fractional seconds are included in the hours since midnight, such
+    # that the solar position at half a second is the mean of its neighbours
+    times = pd.date_range('2020-03-01 00:00:00.5', freq='37min', periods=200,
+                          tz='UTC')
+    result = usno(times, 45, 10)[['zenith', 'azimuth']].to_numpy()
+    before = usno(times - pd.Timedelta('0.5s'), 45, 10)
+    after = usno(times + pd.Timedelta('0.5s'), 45, 10)
+    mean = (before[['zenith', 'azimuth']].to_numpy()
+            + after[['zenith', 'azimuth']].to_numpy()) / 2
+    np.testing.assert_allclose(result, mean, rtol=0, atol=1e-6)
+
+
 def test_noaa_refraction_85_degrees():
     # Test that NOAA sets refraction to zero for solar
     # elevation angles between (85 and 90]
@@ -642,6 +660,15 @@ def test_nasa_horizons(expected_nasa):
     )
     for c in expected_nasa.columns:
         pd.testing.assert_series_equal(expected_nasa[c], result[c])
+    result = nasa_horizons(
+        latitude=50,
+        longitude=10,
+        start='2020-01-01',
+        end='2020-01-02',
+        output='dict',
+    )
+    for c in expected_nasa.columns:
+        np.testing.assert_array_equal(expected_nasa[c].to_numpy(), result[c])
 
 
 def test_nasa_horizons_refracted(expected_nasa_refracted):
@@ -717,3 +744,435 @@ def test_sg2_year_out_of_range():
             times=pd.date_range('2035-01-01', '2035-01-02', tz='UTC'),
             latitude=50, longitude=10,
         )
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_time_bundle_input(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='Etc/GMT+2')
+    time = TimeBundle(times)
+    expected = algorithm(times, 50, 10)
+    # the same TimeBundle can be reused for several locations
+    for _ in range(2):
+        result = algorithm(time, 50, 10)
+        pd.testing.assert_frame_equal(expected, result)
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_datetime64_input(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC',
+                          unit='ns')
+    expected = algorithm(times, 50, 10)
+    for values in [times.tz_localize(None).to_numpy(), times.asi8]:
+        result = algorithm(values, 50, 10)
+        pd.testing.assert_frame_equal(expected, result, check_freq=False)
+
+
+@pytest.mark.parametrize('algorithm,expected', [
+    (iqbal, expected_iqbal),
+    (michalsky, expected_michalsky_original_julian),
+    (noaa, expected_noaa),
+    (psa, expected_psa_2020),
+    (spa, expected_spa),
+    (usno, expected_usno),
+    (walraven, expected_walraven),
+])
+def test_algorithm_mixed_timezones(algorithm, expected, test_conditions):
+    # all rows are calculated in a single call despite the mixed time zones
+    expected = expected().set_index(test_conditions.index)
+    time = TimeBundle.from_mixed_timezones(test_conditions.index)
+    # arrays of shape (N, 1) specify one site per timestamp
+    kwargs = {}
+    if algorithm is spa:
+        kwargs['elevation'] = test_conditions[['elevation']].fillna(0).to_numpy(
+            dtype=float)
+    result = algorithm(
+        time,
+        test_conditions[['latitude']].to_numpy(dtype=float),
+        test_conditions[['longitude']].to_numpy(dtype=float),
+        **kwargs,
+    )
+    pd.testing.assert_frame_equal(expected, result, rtol=1e-9)
+
+
+@pytest.mark.parametrize('algorithm,geocentric_kwargs,topocentric_kwargs', [
+    (iqbal, {}, {}),
+    (michalsky, {'julian_date': 'pandas'}, {'spencer_correction': False}),
+    (noaa, {'delta_t': None}, {}),
+    (psa, {'coefficients': 2001}, {}),
+    (sg2, {}, {'elevation': 500, 'pressure': 90000, 'temperature': 20}),
+    (usno, {'delta_t': 69, 'gmst_option': 2}, {}),
+    (walraven, {}, {}),
+])
+def test_geocentric_topocentric(algorithm, geocentric_kwargs,
+                                topocentric_kwargs):
+    times = pd.date_range('2020-01-01', '2020-12-31', freq='5h', tz='Etc/GMT+2')
+    ephemeris = geocentric(times, algorithm.__name__, **geocentric_kwargs)
+    assert len(ephemeris) == len(times)
+    assert ephemeris.index is times
+    assert ephemeris.algorithm in repr(ephemeris)
+    # the same ephemeris is projected to several locations
+    for latitude, longitude in [(45, 10), (-30, -120), (90, 0)]:
+        expected = algorithm(times, latitude, longitude, **geocentric_kwargs,
+                             **topocentric_kwargs)
+        result = topocentric(ephemeris, latitude, longitude,
+                             **topocentric_kwargs)
+        pd.testing.assert_frame_equal(expected, result)
+
+
+def test_geocentric_unknown_algorithm():
+    times = pd.date_range('2020-01-01', '2020-01-02', tz='UTC')
+    with pytest.raises(ValueError, match='Unknown algorithm: spa'):
+        geocentric(times, 'spa')
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_sites_broadcasting(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    latitudes = [45, -30, 90, 0]
+    longitudes = [10, -120, 0, 180]
+    # arrays of shape (1, M) form a site axis
+    result = algorithm(times, [latitudes], [longitudes])
+    assert result.index.names == [None, 'site']
+    pd.testing.assert_index_equal(result.index.levels[0], times)
+    for site, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+        expected = algorithm(times, latitude, longitude)
+        pd.testing.assert_frame_equal(
+            result.xs(site, level='site'), expected, check_freq=False)
+    # scalars are broadcast against the sites
+    result = algorithm(times, [latitudes], 10)
+    expected = algorithm(times, latitudes[1], 10)
+    pd.testing.assert_frame_equal(
+        result.xs(1, level='site'), expected, check_freq=False)
+    # arrays of shape (N, 1) and one-dimensional arrays of length N specify
+    # one site per timestamp
+    per_row = np.tile(latitudes, 3)[:len(times), np.newaxis]
+    result = algorithm(times, per_row, 10)
+    pd.testing.assert_index_equal(result.index, times)
+    for i in [0, 1, 2, 6]:
+        expected = algorithm(times[i:i + 1], per_row[i, 0], 10)
+        pd.testing.assert_frame_equal(result.iloc[i:i + 1], expected)
+    pd.testing.assert_frame_equal(
+        algorithm(times, per_row[:, 0], np.full(len(times), 10)), result)
+    with pytest.raises(ValueError, match='must be of length 10'):
+        algorithm(times, latitudes, longitudes)
+
+
+@pytest.mark.parametrize('algorithm', [sg2, sg2_c, spa])
+def test_sites_broadcasting_elevation(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    result = algorithm(times, 45, 10, elevation=[[0, 4000]])
+    expected = algorithm(times, 45, 10, elevation=4000)
+    pd.testing.assert_frame_equal(
+        result.xs(1, level='site'), expected, check_freq=False)
+
+
+@pytest.mark.parametrize('algorithm', [sg2, spa])
+def test_sites_broadcasting_elevation_per_row(algorithm):
+    # one elevation per timestamp, broadcast against the sites
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    elevation = np.linspace(0, 4000, len(times))
+    result = algorithm(times, [[45, -30]], [[10, -120]], elevation=elevation)
+    expected = algorithm(times, -30, -120, elevation=elevation)
+    pd.testing.assert_frame_equal(
+        result.xs(1, level='site'), expected, check_freq=False)
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, sg2_c, skyfield, spa, usno, walraven,
+])
+def test_algorithm_output(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    expected = algorithm(times, [[45, -30]], [[10, -120]])
+    result = algorithm(times, [[45, -30]], [[10, -120]], output='dataframe')
+    pd.testing.assert_frame_equal(result, expected)
+    result = algorithm(times, [[45, -30]], [[10, -120]], output='dict')
+    assert list(result) == list(expected.columns)
+    for name, value in result.items():
+        np.testing.assert_array_equal(value, expected[name].to_numpy())
+    result = algorithm(times, [[45, -30]], [[10, -120]], output='recarray')
+    assert isinstance(result, np.recarray)
+    assert list(result.dtype.names) == list(expected.columns)
+    np.testing.assert_array_equal(result.azimuth, expected['azimuth'])
+    result = algorithm(times, [[45, -30]], [[10, -120]], output='ndarray')
+    np.testing.assert_array_equal(result, expected.to_numpy())
+    with pytest.raises(ValueError, match='Unknown output: series'):
+        algorithm(times, 45, 10, output='series')
+
+
+def test_topocentric_output():
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    ephemeris = geocentric(times, 'noaa')
+    result = topocentric(ephemeris, 45, 10, output='ndarray')
+    np.testing.assert_array_equal(result, noaa(times, 45, 10).to_numpy())
+
+
+def test_sites_broadcasting_invalid_shape():
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    with pytest.raises(ValueError, match='at most two dimensions'):
+        noaa(times, np.zeros((1, 1, 2)), 10)
+
+
+def test_topocentric_sites_broadcasting():
+    times = pd.date_range('2020-01-01', '2020-12-31', freq='5h', tz='UTC')
+    ephemeris = geocentric(times, 'sg2')
+    result = topocentric(ephemeris, [[45, -30]], [[10, -120]],
+                         elevation=[[0, 500]])
+    expected = sg2(times, [[45, -30]], [[10, -120]], elevation=[[0, 500]])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('algorithm', [
+    iqbal, michalsky, noaa, psa, sg2, usno, walraven,
+])
+def test_algorithm_float32(algorithm):
+    times = pd.date_range('2000-01-01', '2029-12-31', freq='7h', tz='UTC')
+    latitudes = [-90, -60, -30, 0, 30, 60, 90]
+    longitudes = [-180, -120, -60, 0, 60, 120, 180]
+    expected = algorithm(times, [latitudes], [longitudes])
+    result = algorithm(times, [latitudes], [longitudes], dtype=np.float32)
+    assert (result.dtypes == np.float32).all()
+    assert not result.isna().any().any()
+    # error bounds documented in docs/source/solarposition.rst
+    zenith_error = np.abs(result['zenith'] - expected['zenith'])
+    assert zenith_error.max() < 0.02
+    assert zenith_error[expected['zenith'] < 90].max() < 0.005
+    azimuth_error = np.abs(
+        (result['azimuth'] - expected['azimuth'] + 180) % 360 - 180)
+    # the azimuth is undefined near the zenith and at the poles
+    daytime = (expected['zenith'] > 10) & (expected['zenith'] < 90)
+    poles = np.isin(result.index.get_level_values('site'), [0, 6])
+    assert azimuth_error[daytime & ~poles].max() < 0.2
+
+
+def test_geocentric_float32():
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    ephemeris = geocentric(times, 'sg2', dtype=np.float32)
+    assert all(value.dtype == np.float32
+               for value in ephemeris.terms.values())
+    result = topocentric(ephemeris, 45, 10, output='dict')
+    assert all(value.dtype == np.float32 for value in result.values())
+
+
+@pytest.mark.parametrize('algorithm', [noaa, sg2])
+def test_algorithm_invalid_dtype(algorithm):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='5h', tz='UTC')
+    with pytest.raises(ValueError, match='dtype must be numpy.float32'):
+        algorithm(times, 45, 10, dtype=np.float16)
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'julian_date': 'pandas'}),
+    (noaa, {'delta_t': None}),
+    (psa, {}),
+    (sg2, {'elevation': 500}),
+    (usno, {'gmst_option': 2}),
+    (walraven, {}),
+])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_algorithm_chunked(algorithm, kwargs, dtype):
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+    per_row = np.linspace(-80, 80, len(times))[:, np.newaxis]
+    for latitude, longitude in [
+        (45, 10),  # single site
+        ([[45, -30, 90]], [[10, -120, 0]]),  # site axis
+        (per_row, 10),  # one site per timestamp
+        (Fleet([45, -30], [10, -120]), None),
+    ]:
+        expected = algorithm(times, latitude, longitude, dtype=dtype,
+                             **kwargs)
+        for chunk in [{'chunksize': 1}, {'chunksize': 10},
+                      {'chunksize': 1000}, {'max_memory': 5000},
+                      {'max_memory': 0},
+                      {'chunksize': 10, 'max_memory': 5000}]:
+            result = algorithm(times, latitude, longitude, dtype=dtype,
+                               **chunk, **kwargs)
+            pd.testing.assert_frame_equal(result, expected)
+    # cached time fields are sliced into the chunks
+    time = TimeBundle(times)
+    for name in ['year', 'hour', 'julian_date']:
+        getattr(time, name)
+    result = algorithm(time, 45, 10, dtype=dtype, chunksize=10, **kwargs)
+    expected = algorithm(times, 45, 10, dtype=dtype, **kwargs)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'spencer_correction': False}),
+    (noaa, {}),
+    (psa, {'coefficients': 2001}),
+    (sg2, {'elevation': 500}),
+    (usno, {'delta_t': None}),
+    (walraven, {}),
+])
+def test_algorithm_numba(algorithm, kwargs):
+    pytest.importorskip('numba')
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+    for latitude, longitude in [
+        (45, 10),
+        ([[45, -30, 80]], [[10, -120, 0]]),
+        (Fleet([45, -30], [10, -120]), None),
+    ]:
+        expected = algorithm(times, latitude, longitude, **kwargs)
+        for chunk in [{}, {'chunksize': 10}]:
+            result = algorithm(times, latitude, longitude, backend='numba',
+                               **chunk, **kwargs)
+            pd.testing.assert_frame_equal(result, expected, rtol=0,
+                                          atol=1e-9)
+
+
+def test_algorithm_chunked_delta_t_array():
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+    delta_t = np.linspace(60, 70, len(times))
+    for algorithm in [noaa, usno]:
+        expected = algorithm(times, 45, 10, delta_t=delta_t)
+        result = algorithm(times, 45, 10, delta_t=delta_t,
+                           chunksize=7)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_algorithm_chunked_memory():
+    # the temporary arrays are bounded by max_memory regardless of the
+    # number of timestamps, only the results grow with the timestamps
+    max_memory = 2**20
+    for periods in [100_000, 400_000]:
+        times = pd.date_range('2020-01-01', periods=periods, freq='1min',
+                              tz='UTC')
+        time = TimeBundle(times)
+        tracemalloc.start()
+        result = sg2(time, 45, 10, max_memory=max_memory, output='dict')
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(result['zenith']) == periods
+        assert peak - current < max_memory
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'julian_date': 'pandas'}),
+    (noaa, {'delta_t': None}),
+    (psa, {}),
+    (sg2, {'elevation': 500}),
+    (usno, {'gmst_option': 2}),
+    (walraven, {}),
+])
+def test_algorithm_dedupe(algorithm, kwargs):
+    # joined dataset with repeated pairs of timestamp and site
+    rng = np.random.default_rng(0)
+    hours = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+    times = hours[rng.integers(0, len(hours), 500)]
+    sites = np.array([[45, 10], [-30, -120], [45, 10], [90, 0]])
+    per_row = sites[rng.integers(0, len(sites), 500)]
+    for latitude, longitude in [
+        (45, 10),  # single site
+        (sites[np.newaxis, :, 0], sites[np.newaxis, :, 1]),  # site axis
+        (Fleet([45], [10]), None),  # site axis of one site
+        (sites[np.newaxis, :, 0], 10),  # site axis of latitudes
+        (per_row[:, :1], per_row[:, 1:]),  # one site per timestamp
+        (Fleet(sites[:, 0], sites[:, 1]), None),
+        (np.repeat(sites[:1, :1], 500, axis=0), 10),  # a single unique row
+    ]:
+        expected = algorithm(times, latitude, longitude, **kwargs)
+        for options in [{}, {'chunksize': 10}]:
+            result = algorithm(times, latitude, longitude, dedupe=True,
+                               **options, **kwargs)
+            pd.testing.assert_frame_equal(result, expected)
+    # duplicate Julian dates of a TimeBundle without timestamps
+    time = TimeBundle.from_julian_date(np.repeat([2458849.5, 2458850.25], 3))
+    expected = algorithm(time, sites[np.newaxis, :, 0], sites[np.newaxis, :, 1], output='dict',
+                         **kwargs)
+    result = algorithm(time, sites[np.newaxis, :, 0], sites[np.newaxis, :, 1], dedupe=True,
+                       output='dict', **kwargs)
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+
+def test_algorithm_dedupe_empty():
+    times = pd.DatetimeIndex([], tz='UTC')
+    result = noaa(times, 45, 10, dedupe=True)
+    pd.testing.assert_frame_equal(result, noaa(times, 45, 10))
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    (iqbal, {}),
+    (michalsky, {'julian_date': 'pandas'}),
+    (noaa, {'delta_t': None}),
+    (psa, {}),
+    (sg2, {'elevation': 500}),
+    (usno, {'gmst_option': 2}),
+    (walraven, {}),
+])
+def test_algorithm_daylight_only(algorithm, kwargs):
+    times = pd.date_range('2020-03-18', '2020-03-23', freq='7min', tz='UTC')
+    sites = np.array([[45, 10], [-30, -120], [0, 179], [89, 0], [-89, 0]])
+    per_row = np.resize(sites, (len(times), 2))
+    for latitude, longitude in [
+        (45, 10),  # single site
+        (sites[np.newaxis, :, 0], sites[np.newaxis, :, 1]),  # site axis
+        (Fleet([45], [10]), None),  # site axis of one site
+        (per_row[:, :1], per_row[:, 1:]),  # one site per timestamp
+        (Fleet(sites[:, 0], sites[:, 1]), None),
+    ]:
+        expected = algorithm(times, latitude, longitude, output='dict',
+                             **kwargs)
+        for options in [{}, {'chunksize': 100, 'dedupe': True},
+                        {'daylight_threshold': 10}]:
+            result = algorithm(times, latitude, longitude, daylight_only=True,
+                               output='dict', **options, **kwargs)
+            threshold = options.get('daylight_threshold', -1)
+            night = np.isnan(result['elevation'])
+            assert night.any()
+            # conservative, i.e., no row above the threshold is skipped
+            assert (expected['elevation'][night] < threshold).all()
+            for name, value in expected.items():
+                assert np.isnan(result[name][night]).all()
+                np.testing.assert_array_equal(result[name][~night],
+                                              value[~night])
+
+
+def test_algorithm_daylight_only_night():
+    times = pd.date_range('2020-06-21', freq='1h', periods=4, tz='UTC')
+    result = noaa(times, -60, 0, daylight_only=True, dtype=np.float32)
+    assert result.isna().all().all()
+    assert (result.dtypes == np.float32).all()
+    # all rows are calculated in the polar day
+    result = noaa(times, 80, 0, daylight_only=True)
+    pd.testing.assert_frame_equal(result, noaa(times, 80, 0))
+    times = pd.DatetimeIndex([], tz='UTC')
+    result = noaa(times, 45, 10, daylight_only=True)
+    pd.testing.assert_frame_equal(result, noaa(times, 45, 10))
+
+
+@pytest.mark.parametrize('algorithm', [michalsky, walraven])
+@pytest.mark.parametrize('start', ['0500-06-01', '2800-06-01', '3500-06-01'])
+def test_algorithm_daylight_only_outside(algorithm, start):
+    # all rows are calculated outside the years 1700 to 2300
+    times = np.arange(np.datetime64(start, 'm'), np.datetime64(start, 'm') +
+                      4 * 1440, 7)
+    result = algorithm(times, [[45, -30]], [[10, -120]], daylight_only=True,
+                       output='dict')
+    expected = algorithm(times, [[45, -30]], [[10, -120]], output='dict')
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
+
+
+def test_algorithm_daylight_only_dataframe():
+    times = pd.date_range('2020-01-01', '2020-01-02', freq='1h', tz='UTC')
+    expected = sg2(times, [[45, 50]], [[10, 10]])
+    result = sg2(times, [[45, 50]], [[10, 10]], daylight_only=True)
+    pd.testing.assert_index_equal(result.index, expected.index)
+    pd.testing.assert_frame_equal(result.dropna(),
+                                  expected[result.notna().all(axis=1)])
+
+
+def test_algorithm_chunked_invalid():
+    times = pd.date_range('2020-01-01', '2020-01-03', freq='1h', tz='UTC')
+    with pytest.raises(ValueError, match='chunksize must be at least 1'):
+        noaa(times, 45, 10, chunksize=0)
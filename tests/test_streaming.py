@@ -0,0 +1,97 @@
+import itertools
+
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import Fleet, Site, stream
+from solposx.solarposition import noaa
+from solposx.solarposition import spa
+
+
+@pytest.fixture
+def site():
+    return Site(45, 10)
+
+
+def test_stream_range(site):
+    times = pd.date_range('2020-06-21', '2020-06-22', freq='10min', tz='UTC')
+    blocks = list(stream('noaa', times[0], '10min', site, end=times[-1],
+                         block=50))
+    assert [len(b) for b in blocks] == [50, 50, 45]
+    result = pd.concat(blocks)
+    pd.testing.assert_frame_equal(result, noaa(times, site), check_freq=False)
+
+
+def test_stream_range_end_on_block(site):
+    blocks = list(stream('psa', '2020-01-01 00:00+01:00', '1h', site,
+                         end='2020-01-01 05:00+01:00', block=3))
+    assert [len(b) for b in blocks] == [3, 3]
+    assert str(blocks[0].index.tz) == 'UTC+01:00'
+
+
+def test_stream_unbounded(site):
+    blocks = stream('noaa', pd.Timestamp('2020-03-29', tz='Europe/Berlin'),
+                    '1h', site, block=24, output='dict')
+    first, second, third = itertools.islice(blocks, 3)
+    assert all(len(b['zenith']) == 24 for b in (first, second, third))
+    # the time range continues across blocks
+    times = pd.date_range('2020-03-29', periods=72, freq='1h',
+                          tz='Europe/Berlin')
+    expected = noaa(times, site, output='dict')
+    np.testing.assert_array_equal(
+        np.concatenate([first['zenith'], second['zenith'], third['zenith']]),
+        expected['zenith'])
+
+
+def test_stream_chunks():
+    fleet = Fleet([45, -30], [10, -120])
+    times = pd.date_range('2020-01-01', periods=12, freq='1h', tz='UTC')
+    chunks = iter([
+        times[:5],
+        pd.Series(times[5:9]),
+        times[9:].values,
+        times[:0],
+    ])
+    blocks = list(stream('spa', chunks, None, fleet, block=3))
+    assert [len(b) // 2 for b in blocks] == [3, 2, 3, 1, 3]
+    expected = spa(times, fleet)
+    pd.testing.assert_frame_equal(pd.concat(blocks), expected,
+                                  check_freq=False)
+
+
+def test_stream_chunks_lazy(site):
+    def chunks():
+        yield pd.date_range('2020-01-01', periods=4, freq='1h', tz='UTC')
+        raise RuntimeError('second chunk requested')
+
+    blocks = stream('noaa', chunks(), None, site, block=2)
+    assert len(next(blocks)) == 2
+    assert len(next(blocks)) == 2
+    with pytest.raises(RuntimeError, match='second chunk'):
+        next(blocks)
+
+
+def test_stream_chunks_naive(site):
+    chunks = [pd.date_range('2020-01-01', periods=4, freq='1h')]
+    with pytest.raises(TypeError, match='timezone naive'):
+        next(stream('noaa', chunks, None, site))
+
+
+@pytest.mark.parametrize('args,kwargs,match', [
+    (('nasa_horizons', '2020-01-01 00:00Z', '1s'), {}, 'Unknown algorithm'),
+    (('noaa', '2020-01-01 00:00Z', '1s'), {'block': 0}, 'block must be'),
+    (('noaa', '2020-01-01 00:00Z', None), {}, 'freq must be specified'),
+    (('noaa', [], '1s'), {}, 'freq must be None'),
+])
+def test_stream_invalid(site, args, kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        stream(*args, site, **kwargs)
+
+
+@pytest.mark.parametrize('start,end', [
+    ('2020-01-01', None),
+    ('2020-01-01 00:00Z', '2020-01-02'),
+])
+def test_stream_naive(site, start, end):
+    with pytest.raises(TypeError, match='timezone naive'):
+        stream('noaa', start, '1h', site, end=end)
@@ -2,6 +2,13 @@ import pandas as pd
 import numpy as np
 import pytest
 from solposx.tools import _pandas_to_utc, _fractional_hour, calc_error
+from solposx.tools import _split_ticks, _split_julian_date, _calendar_from_days
+from solposx.tools import TimeBundle
+from solposx.tools import _scatter
+from solposx.tools import _low_precision_sin_elevation
+from solposx.tools import DayCache, day_cache
+from solposx import kernels
+from solposx.solarposition import noaa
 
 
 @pytest.fixture
@@ -119,3 +126,258 @@ def test_calc_error_special_cases():
         'azimuth_bias': -180, 'azimuth_mad': 180, 'azimuth_rmsd': 180,
         'combined_rmsd': 90,
     })
+
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+def test_split_ticks(unit):
+    times = pd.DatetimeIndex(
+        ['1800-10-17T12:30', '1969-12-31T23:59:59.5', '2020-02-29T00:00',
+         '2200-10-17T05:50:10'], tz='UTC').as_unit(unit)
+    days, fraction = _split_ticks(times.asi8, unit)
+    assert days.dtype == np.int64
+    np.testing.assert_array_equal(days, [-61802, -1, 18321, 84295])
+    assert np.all((fraction >= 0) & (fraction < 1))
+    np.testing.assert_allclose(days + 2440587.5 + fraction,
+                               times.to_julian_date(), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(fraction * 24, _fractional_hour(times), rtol=0,
+                               atol=1e-12)
+
+
+def test_split_ticks_not_a_time():
+    ticks = np.array(['2020-01-01T06', 'NaT'], dtype='datetime64[s]')
+    days, fraction = _split_ticks(ticks.view(np.int64), 's')
+    np.testing.assert_array_equal(days, [18262, 0])
+    np.testing.assert_array_equal(fraction, [0.25, np.nan])
+
+
+def test_split_julian_date():
+    days, fraction = _split_julian_date(2440587.5 + np.array([-1.25, 0, 1.75]))
+    np.testing.assert_array_equal(days, [-2, 0, 1])
+    np.testing.assert_array_equal(fraction, [0.75, 0, 0.75])
+    # two-part julian dates retain the full precision of the fraction
+    days, fraction = _split_julian_date((2459139.5, 1 / 3))
+    assert days == 18552
+    assert fraction == 1 / 3
+
+
+def test_calendar_from_days():
+    times = pd.date_range('1600-01-01', '2400-12-31', freq='1D', unit='s')
+    days = times.asi8 // 86400
+    year, month, day, dayofyear = _calendar_from_days(days)
+    np.testing.assert_array_equal(year, times.year)
+    np.testing.assert_array_equal(month, times.month)
+    np.testing.assert_array_equal(day, times.day)
+    np.testing.assert_array_equal(dayofyear, times.dayofyear)
+
+
+@pytest.fixture
+def times_index_mixed():
+    return pd.DatetimeIndex(
+        ['1800-10-17T12:30', '2020-02-29T23:59:59.999999', '2020-03-01T00:00',
+         '2200-10-17T05:50:10'], tz='Etc/GMT+2')
+
+
+def test_time_bundle(times_index_mixed):
+    time = TimeBundle(times_index_mixed)
+    times_utc = times_index_mixed.tz_convert('UTC')
+    assert time.index is times_index_mixed
+    np.testing.assert_array_equal(time.year, times_utc.year)
+    np.testing.assert_array_equal(time.month, times_utc.month)
+    np.testing.assert_array_equal(time.day, times_utc.day)
+    np.testing.assert_array_equal(time.dayofyear, times_utc.dayofyear)
+    np.testing.assert_allclose(time.hour, _fractional_hour(times_utc),
+                               rtol=0, atol=1e-12)
+    np.testing.assert_allclose(time.julian_date, times_utc.to_julian_date(),
+                               rtol=0, atol=1e-9)
+    # fields are calculated once and cached
+    assert time.julian_date is time.julian_date
+    assert time.year is time.year
+
+
+def test_time_bundle_missing_tz():
+    with pytest.raises(TypeError, match='stamps are timezone naive.'):
+        TimeBundle(pd.date_range('2020-01-01', '2020-01-02'))
+
+
+def test_time_bundle_from_julian_date(times_index_mixed):
+    time = TimeBundle(times_index_mixed)
+    time_jd = TimeBundle.from_julian_date(
+        (time.days + 2440587.5, time.fraction))
+    np.testing.assert_array_equal(time_jd.days, time.days)
+    np.testing.assert_array_equal(time_jd.fraction, time.fraction)
+    pd.testing.assert_index_equal(
+        time_jd.index, times_index_mixed.tz_convert('UTC').as_unit('ns'))
+
+
+@pytest.mark.parametrize('unit', ['D', 's', 'ms', 'us', 'ns'])
+def test_time_bundle_datetime64(times_index_mixed, unit):
+    times_utc = times_index_mixed.tz_convert('UTC').floor(unit)
+    values = times_utc.tz_localize(None).to_numpy().astype(f'datetime64[{unit}]')
+    time = TimeBundle(values)
+    expected = TimeBundle(times_utc)
+    np.testing.assert_array_equal(time.days, expected.days)
+    np.testing.assert_array_equal(time.fraction, expected.fraction)
+    np.testing.assert_array_equal(time.year, expected.year)
+    pd.testing.assert_index_equal(time.index.as_unit('ns'),
+                                  times_utc.as_unit('ns'))
+
+
+def test_time_bundle_datetime64_months():
+    time = TimeBundle(np.array(['2020-03', '2021-01'], dtype='datetime64[M]'))
+    np.testing.assert_array_equal(time.days, [18322, 18628])
+    np.testing.assert_array_equal(time.fraction, [0, 0])
+
+
+def test_time_bundle_int64_nanoseconds():
+    times = pd.date_range('2020-01-01', '2020-01-02', freq='7h', tz='UTC')
+    time = TimeBundle(times.as_unit('ns').asi8)
+    expected = TimeBundle(times)
+    np.testing.assert_array_equal(time.days, expected.days)
+    np.testing.assert_array_equal(time.fraction, expected.fraction)
+    pd.testing.assert_index_equal(time.index, times.as_unit('ns'))
+
+
+def test_time_bundle_invalid_dtype():
+    with pytest.raises(TypeError, match='must be of dtype numpy.datetime64'):
+        TimeBundle(np.array([2459139.5]))
+
+
+def test_time_bundle_from_mixed_timezones():
+    local = ['2020-10-17T12:30', '2020-10-17T12:30', '2020-07-01T00:00']
+    times = pd.Series(
+        [pd.Timestamp(t, tz=tz) for t, tz in zip(
+            local, ['UTC', 'Etc/GMT-2', 'America/Denver'])],
+        index=['a', 'b', 'c'])
+    expected = pd.DatetimeIndex(
+        ['2020-10-17T12:30', '2020-10-17T10:30', '2020-07-01T06:00'],
+        tz='UTC')
+    # instants, per-row UTC offsets, and per-row time zone names
+    for time in [
+        TimeBundle.from_mixed_timezones(times),
+        TimeBundle.from_mixed_timezones(local, utc_offset=[0, 2, -6]),
+        TimeBundle.from_mixed_timezones(
+            local, utc_offset=np.array([0, 120, -360], dtype='timedelta64[m]')),
+        TimeBundle.from_mixed_timezones(
+            pd.Index(local), tz=['UTC', 'Etc/GMT-2', 'America/Denver']),
+    ]:
+        pd.testing.assert_index_equal(time.utc_index.as_unit('ns'),
+                                      expected.as_unit('ns'))
+        np.testing.assert_array_equal(time.days, TimeBundle(expected).days)
+    # the index is aligned with the original rows
+    assert TimeBundle.from_mixed_timezones(times).index is times.index
+    assert TimeBundle.from_mixed_timezones(times.to_numpy()).index.equals(
+        expected)
+    time = TimeBundle.from_mixed_timezones(pd.Index(local), tz='Etc/GMT-2')
+    np.testing.assert_array_equal(time.hour, [10.5, 10.5, 22])
+
+
+def test_time_bundle_from_mixed_timezones_errors():
+    times = pd.date_range('2020-01-01', periods=2, freq='1h', tz='UTC')
+    with pytest.raises(ValueError, match='either `utc_offset` or `tz`'):
+        TimeBundle.from_mixed_timezones(times, utc_offset=1, tz='UTC')
+    with pytest.raises(TypeError, match='must be time-zone naive'):
+        TimeBundle.from_mixed_timezones(times, utc_offset=1)
+
+
+def test_scatter():
+    inverse = np.array([0, 1, 1, 0])
+    # values constant along the axis are not scattered
+    for value in [np.arange(3.), np.arange(3.)[:, None], np.float64(1)]:
+        assert _scatter(value, inverse, (3, 2), 1) is value
+    result = _scatter(np.arange(6.).reshape(3, 2), inverse, (3, 2), 1)
+    np.testing.assert_array_equal(result, [[0, 1, 1, 0], [2, 3, 3, 2],
+                                           [4, 5, 5, 4]])
+
+
+@pytest.mark.parametrize('start,end', [
+    ('1700-01-01', '2300-01-01'),  # sparse days, calculated per timestamp
+    ('2020-01-01', '2020-01-05'),  # consecutive days, tabulated
+])
+def test_low_precision_sin_elevation(start, end):
+    rng = np.random.default_rng(0)
+    start, end = np.datetime64(start, 's'), np.datetime64(end, 's')
+    times = start + rng.integers(0, (end - start).astype(int), 2000)
+    latitude = rng.uniform(-90, 90, 2000)
+    longitude = rng.uniform(-180, 180, 2000)
+    time = TimeBundle(times)
+    result = np.rad2deg(np.arcsin(
+        _low_precision_sin_elevation(time, latitude, longitude)))
+    expected = noaa(time, latitude[:, None], longitude[:, None],
+                    output='dict')
+    np.testing.assert_allclose(result, expected['elevation'], rtol=0,
+                               atol=0.3)
+
+
+def test_day_cache():
+    cache = DayCache(maxsize=3)
+    calls = []
+
+    def function(days):
+        calls.append(days.size)
+        return days * 2, days.astype(np.float32) / 2
+
+    days = np.array([[-1, 5000], [2000, 0]])  # four blocks of 1024 days
+    result = cache.lookup('double', days, function)
+    # more blocks than maxsize are calculated without the cache
+    assert calls == [4]
+    np.testing.assert_array_equal(result[0], days * 2)
+    assert cache.cache_info() == (0, 0, 3, 0)
+    days = np.array([1023, 1024, 0, 2047, 20])
+    for _ in range(2):
+        result = cache.lookup('double', days, function)
+        np.testing.assert_array_equal(result[0], days * 2)
+        np.testing.assert_array_equal(result[1], days.astype(np.float32) / 2)
+        assert result[1].dtype == np.float32
+    assert calls == [4, 1024, 1024]
+    assert cache.cache_info() == (2, 2, 3, 2)
+    # the least recently used blocks are evicted
+    cache.lookup('double', np.array([3000, 4000]), function)
+    assert cache.cache_info().currsize == 3
+    cache.lookup('half', np.array([1]), function)
+    assert cache.cache_info() == (2, 5, 3, 3)
+    assert ('double', 0) not in cache._blocks
+    result = cache.lookup('double', np.array([], dtype=np.int64), function)
+    assert result[0].shape == (0,)
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 3, 0)
+    assert repr(cache) == 'DayCache(maxsize=3)'
+
+
+def test_day_cache_sparse():
+    # only the blocks containing timestamps are calculated and cached
+    cache = DayCache(maxsize=3)
+    calls = []
+
+    def function(days):
+        calls.append(days.size)
+        return (days * 2,)
+
+    days = np.array([[50000, -30000], [10, 50001], [-29900, 20]])
+    result = cache.lookup('double', days, function)
+    np.testing.assert_array_equal(result[0], days * 2)
+    assert calls == [1024] * 3
+    assert cache.cache_info() == (0, 3, 3, 3)
+    assert sorted(block for _, block in cache._blocks) == [-30, 0, 48]
+    result = cache.lookup('double', days[::-1], function)
+    np.testing.assert_array_equal(result[0], days[::-1] * 2)
+    assert cache.cache_info() == (3, 3, 3, 3)
+
+
+@pytest.mark.parametrize('kernel,kwargs', [
+    (kernels.iqbal, {}),
+    (kernels.noaa, {'delta_t': None}),
+    (kernels.usno, {'delta_t': None}),
+    (kernels.psa, {}),
+    (kernels.walraven, {}),
+])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_day_cache_identical(monkeypatch, kernel, kwargs, dtype):
+    # timestamps across several blocks of days
+    jd = 2458000.5 + np.arange(0, 3000, 0.37)
+    day_cache.cache_clear()
+    result = kernel(jd, 45, 10, dtype=dtype, **kwargs)
+    assert day_cache.cache_info().currsize > 0
+    monkeypatch.setattr(day_cache, 'maxsize', 0)
+    expected = kernel(jd, 45, 10, dtype=dtype, **kwargs)
+    for name, value in expected.items():
+        np.testing.assert_array_equal(result[name], value)
@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+import pytest
+from solposx import kernels, refraction, ufunc
+from solposx.site import Fleet, Site
+from solposx.tools import TimeBundle
+
+
+@pytest.fixture
+def times():
+    return pd.date_range('2020-03-20', '2020-03-22', freq='3h', tz='UTC')
+
+
+@pytest.mark.parametrize('algorithm,kwargs', [
+    ('iqbal', {}),
+    ('michalsky', {'spencer_correction': False}),
+    ('noaa', {'delta_t': None}),
+    ('psa', {'coefficients': 2001}),
+    ('sg2', {'elevation': 1000}),
+    ('usno', {'gmst_option': 2}),
+    ('walraven', {}),
+])
+def test_algorithm(algorithm, kwargs, times):
+    function = getattr(ufunc, algorithm)
+    kernel = getattr(kernels, algorithm)
+    latitude = np.array([-80, -30, 0, 45, 80])
+    longitude = np.array([-170, -60, 0, 120])
+    result = function(times.values[:, None, None], latitude[:, None],
+                      longitude, **kwargs)
+    expected = kernel(TimeBundle(times.values[:, None, None]),
+                      latitude[:, None], longitude, **kwargs)
+    assert list(result) == list(expected)
+    for name, value in result.items():
+        assert value.shape == (len(times), len(latitude), len(longitude))
+        np.testing.assert_array_equal(value, expected[name])
+    # every element equals the calculation of a single timestamp and site
+    for i, j, k in [(0, 0, 0), (3, 2, 1), (16, 4, 3)]:
+        scalar = function(times.values[i], latitude[j], longitude[k],
+                          **kwargs)
+        for name, value in scalar.items():
+            assert isinstance(value, np.float64)
+            np.testing.assert_allclose(value, result[name][i, j, k],
+                                       rtol=0, atol=1e-10)
+
+
+def test_algorithm_times(times):
+    expected = ufunc.noaa(times.values, 45, 10)
+    for value in [times, pd.Series(times), TimeBundle(times),
+                  times.tz_convert('Europe/Berlin'),
+                  times.values.astype('datetime64[ns]').view(np.int64)]:
+        result = ufunc.noaa(value, 45, 10)
+        for name, array in result.items():
+            np.testing.assert_array_equal(array, expected[name])
+    result = ufunc.noaa(times.tz_convert('Europe/Berlin')[5], 45, 10)
+    for name, value in result.items():
+        assert value == expected[name][5]
+    with pytest.raises(TypeError, match='timezone naive'):
+        ufunc.noaa(times.tz_localize(None), 45, 10)
+    with pytest.raises(TypeError, match='timezone naive'):
+        ufunc.noaa(times.tz_localize(None)[5], 45, 10)
+
+
+def test_algorithm_sites(times):
+    fleet = Fleet([45, -30], [10, 20], elevation=[0, 500])
+    result = ufunc.sg2(times.values[:, None], fleet)
+    expected = ufunc.sg2(times.values[:, None], [45, -30], [10, 20], [0, 500])
+    for name, value in result.items():
+        assert value.shape == (len(times), 2)
+        np.testing.assert_array_equal(value, expected[name])
+    result = ufunc.psa(times.values[0], Site(45, 10))
+    assert all(isinstance(value, np.float64) for value in result.values())
+
+
+def test_algorithm_out(times):
+    out = {'zenith': np.empty((len(times), 3))}
+    result = ufunc.usno(times.values[:, None], [0, 30, 60], 10, out=out)
+    assert result['zenith'] is out['zenith']
+
+
+@pytest.mark.parametrize('model,params', [
+    ('archer', []),
+    ('bennett', ['pressure', 'temperature']),
+    ('hughes', ['pressure', 'temperature']),
+    ('michalsky', []),
+    ('sg2', ['pressure', 'temperature']),
+    ('spa', ['pressure', 'temperature']),
+])
+def test_refraction(model, params):
+    function = getattr(ufunc.refraction, model)
+    elevation = np.array([-1, -0.6, 0, 1, 4, 6, 10, 90])
+    values = {'pressure': np.array([90000, 101325])[:, None, None],
+              'temperature': np.array([0, 12, 30])[:, None]}
+    kwargs = {name: values[name] for name in params}
+    result = function(elevation, **kwargs)
+    shape = np.broadcast_shapes(elevation.shape,
+                                *(np.shape(value) for value in kwargs.values()))
+    assert result.shape == shape
+    # every element equals the model of the scalar inputs
+    for index in np.ndindex(shape):
+        scalars = {name: np.broadcast_to(value, shape)[index]
+                   for name, value in kwargs.items()}
+        expected = getattr(refraction, model)(elevation[index[-1]], **scalars)
+        value = function(elevation[index[-1]], **scalars)
+        assert isinstance(value, np.float64)
+        np.testing.assert_allclose(value, expected, rtol=1e-14)
+        np.testing.assert_allclose(result[index], expected, rtol=1e-14)
+
+
+def test_refraction_limit():
+    assert ufunc.refraction.spa(-2, refraction_limit=-1) == 0